@@ -0,0 +1,27 @@
+# File: batch_recommend.py
+import sys
+import argparse
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.components.batch_recommender import BatchRecommender
+
+# Offline entry point for exporting the recommendations of the whole catalogue
+# Usage: python batch_recommend.py --top-k 5 --format jsonl --workers 4
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export top-k recommendations for every book in the catalogue.")
+    parser.add_argument("--top-k", type=int, default=None, help="number of recommendations per book")
+    parser.add_argument("--format", dest="output_format", choices=["jsonl", "parquet"], default=None, help="output file format")
+    parser.add_argument("--output", dest="output_path", default=None, help="output file path")
+    parser.add_argument("--workers", dest="n_workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--batch-size", type=int, default=None, help="books per neighbour query")
+    args = parser.parse_args()
+
+    try:
+        logging.info("Batch recommendation export started")
+        exporter = BatchRecommender()
+        exporter.export(**vars(args))
+        logging.info("Batch recommendation export completed")
+
+    except Exception as e:
+        logging.error(f"Batch recommendation export terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
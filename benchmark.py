@@ -0,0 +1,53 @@
+# File: benchmark.py
+import sys
+import json
+import argparse
+from pathlib import Path
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.benchmark.runner import BenchmarkRunner, flatten_report
+
+# Entry point for the benchmark suite of the recommendation hot paths
+# Usage: python benchmark.py --users 1000 --titles 2000 --density 0.12 [--profile] [--update-baseline]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ML pipeline and the recommenders on synthetic data.")
+    parser.add_argument("--users", dest="n_users", type=int, default=None, help="number of synthetic users")
+    parser.add_argument("--titles", dest="n_titles", type=int, default=None, help="number of synthetic book titles")
+    parser.add_argument("--density", type=float, default=None, help="fraction of the users x titles matrix that is rated")
+    parser.add_argument("--requests", dest="n_requests", type=int, default=None, help="calls per latency benchmark")
+    parser.add_argument("--semantic-books", dest="n_semantic_books", type=int, default=None, help="number of synthetic semantic books")
+    parser.add_argument("--no-semantic", action="store_true", help="skip the semantic recommender benchmark")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile dump per benchmark")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    try:
+        runner = BenchmarkRunner(n_users = args.n_users, n_titles = args.n_titles, density = args.density,
+                                 n_requests = args.n_requests, n_semantic_books = args.n_semantic_books,
+                                 profile = args.profile)
+        # without a baseline there is nothing to check regressions against, fail before benchmarking
+        if not args.update_baseline and not runner.benchmark_config.baseline_path.exists():
+            logging.error(f"No benchmark baseline found at {runner.benchmark_config.baseline_path}, "
+                          "store one with --update-baseline")
+            sys.exit(1)
+
+        report = runner.run(semantic = not args.no_semantic)
+
+        report_path = Path(runner.benchmark_config.root_dir, "report.json")
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent = 2)
+
+        for key, value in flatten_report(report).items():
+            print(f"{key:<60} {value}")
+        logging.info(f"Benchmark report saved at {report_path}")
+
+        regressions = runner.check_baseline(report, update = args.update_baseline)
+
+    except Exception as e:
+        logging.error(f"Benchmark terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
+
+    if regressions:
+        for regression in regressions:
+            logging.error(f"Performance regression: {regression}")
+        sys.exit(1)
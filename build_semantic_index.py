@@ -0,0 +1,44 @@
+# File: build_semantic_index.py
+import sys
+import json
+import argparse
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.components.vector_index import SemanticIndexBuilder, PartitionedVectorIndex, PARTITION_STRATEGIES
+from src.components.quantized_index import accuracy_report, QUANTIZATIONS, QUANTIZED_DIR
+
+# Offline entry point for (re)building the partitioned vectorstore of the semantic recommender
+# Usage: python build_semantic_index.py --partitions 4 --strategy category --accuracy-report
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed the semantic books dataset and build the partitioned vector index.")
+    parser.add_argument("--partitions", dest="n_partitions", type=int, default=None, help="number of partitions")
+    parser.add_argument("--strategy", choices=PARTITION_STRATEGIES, default=None, help="partition by ISBN hash or by category")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default=None, help="quantization of the exact engine")
+    parser.add_argument("--keyword-only", action="store_true", help="only rebuild the BM25 keyword index, without embedding calls")
+    parser.add_argument("--accuracy-report", action="store_true", help="compare the quantized engine against Chroma after the build")
+    parser.add_argument("--queries", type=int, default=200, help="number of accuracy report queries")
+    args = parser.parse_args()
+
+    try:
+        logging.info("Semantic index build started")
+        if args.keyword_only:
+            manifest = SemanticIndexBuilder().build_keyword_index()
+            logging.info(f"Keyword index build completed: {manifest['terms']} terms")
+        else:
+            manifest = SemanticIndexBuilder().build(n_partitions=args.n_partitions, strategy=args.strategy,
+                                                    quantization=args.quantization)
+            logging.info(f"Semantic index build completed: {manifest['n_partitions']} partitions")
+
+        if args.accuracy_report:
+            recommend_config = get_app_configuration().semantic_recommender_config()
+            persist_dir = recommend_config.chroma_persist_dir
+            report = accuracy_report(persist_dir, PartitionedVectorIndex(persist_dir), n_queries=args.queries,
+                                     rescore_factor=recommend_config.rescore_factor)
+            with open(persist_dir / QUANTIZED_DIR / "accuracy_report.json", "w") as f:
+                json.dump(report, f, indent=2)
+            print(json.dumps(report, indent=2))
+
+    except Exception as e:
+        logging.error(f"Semantic index build terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
@@ -0,0 +1,25 @@
+# File: evaluate.py
+import sys
+import argparse
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.components.evaluation import RecommenderEvaluator, format_report
+
+# Offline entry point for comparing the quality, latency and memory of the user recommendation engines
+# Usage: python evaluate.py --engines popularity cosine:50 euclidean:50 --k 10 --workers 4
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the user recommendation engines on held-out ratings.")
+    parser.add_argument("--engines", nargs="+", default=None, help="engine specs: popularity, cosine:<n>, euclidean:<n>")
+    parser.add_argument("--k", type=int, default=None, help="number of recommendations per user")
+    parser.add_argument("--workers", dest="n_workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+
+    try:
+        logging.info("Offline evaluation started")
+        report = RecommenderEvaluator().evaluate(**vars(args))
+        print(format_report(report))
+        logging.info("Offline evaluation completed")
+
+    except Exception as e:
+        logging.error(f"Offline evaluation terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
@@ -0,0 +1,23 @@
+# File: fetch_posters.py
+import sys
+import argparse
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.components.poster_cache import PosterCache
+
+# Entry point for caching the poster thumbnails of the served catalogue locally
+# Usage: python fetch_posters.py [--workers 16] [--refresh]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch and resize the catalogue posters into the local poster cache.")
+    parser.add_argument("--workers", dest="max_workers", type=int, default=None, help="number of concurrent downloads")
+    parser.add_argument("--refresh", action="store_true", help="refetch posters that are already cached or marked dead")
+    args = parser.parse_args()
+
+    try:
+        logging.info("Poster caching started")
+        PosterCache().fetch(refresh = args.refresh, max_workers = args.max_workers)
+        logging.info("Poster caching completed")
+
+    except Exception as e:
+        logging.error(f"Poster caching terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
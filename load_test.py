@@ -0,0 +1,71 @@
+# File: load_test.py
+import os
+import sys
+import json
+import argparse
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.benchmark.load_generator import (LoadGenerator, StubEmbeddingServer, StubEmbeddings, format_load_report,
+                                          prepare_synthetic_workspace, vectorstore_dimensions)
+
+# Entry point for load testing the recommenders with mixed concurrent requests and a stub embedding service
+# Usage: python load_test.py --concurrency 1 4 16 32 --qps 100 --duration 10 [--synthetic] [--http | --url URL]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the recommenders at increasing concurrency.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=None, help="concurrent users of every load level")
+    parser.add_argument("--qps", type=float, default=None, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=None, help="seconds per load level")
+    parser.add_argument("--synthetic", action="store_true", help="train and index the synthetic benchmark dataset first")
+    parser.add_argument("--http", action="store_true", help="send the requests through an in-process HTTP front end")
+    parser.add_argument("--url", default=None, help="base url of a running HTTP front end (serve_api.py)")
+    parser.add_argument("--latency-ms", type=float, default=None, help="mean latency of the stub embedding service")
+    parser.add_argument("--error-rate", type=float, default=None, help="failure rate of the stub embedding service")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    try:
+        app_config = get_app_configuration()
+        load_config = app_config.load_test_config()
+        semantic_config = app_config.semantic_recommender_config()
+        if args.synthetic:
+            prepare_synthetic_workspace(app_config, load_config.embedding_dimensions)
+
+        dimensions = vectorstore_dimensions(semantic_config.chroma_persist_dir, load_config.embedding_dimensions)
+        latency_ms = args.latency_ms if args.latency_ms is not None else load_config.embedding_latency_ms
+        error_rate = args.error_rate if args.error_rate is not None else load_config.embedding_error_rate
+
+        with StubEmbeddingServer(dimensions, latency_ms, load_config.embedding_jitter_ms, error_rate,
+                                 load_config.seed) as stub:
+            from src.recommender.ml_recommender import MLRecommender
+            from src.recommender.semantic_recommender import SemanticRecommender
+
+            ml_recommender = MLRecommender(app_config)
+            semantic_recommender = None
+            if os.path.exists(semantic_config.chroma_persist_dir):
+                semantic_recommender = SemanticRecommender(app_config, embedding = StubEmbeddings(stub.url))
+
+            url, server = args.url, None
+            if args.http and url is None:
+                from src.recommender.http_api import RecommendationHTTPServer
+                server = RecommendationHTTPServer(ml_recommender = ml_recommender,
+                                                  semantic_recommender = semantic_recommender).start()
+                url = server.url
+
+            generator = LoadGenerator(app_config, ml_recommender, semantic_recommender, url = url)
+            report = generator.run(args.concurrency, args.qps, args.duration)
+            report["embedding_stub"] = {"latency_ms": latency_ms, "error_rate": error_rate, **stub.stats}
+            if server is not None:
+                server.stop()
+
+        with open(load_config.report_path, "w") as f:
+            json.dump(report, f, indent = 2)
+        print(format_load_report(report))
+        logging.info(f"Load test report saved at {load_config.report_path}")
+
+    except Exception as e:
+        logging.error(f"Load test terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
+
+    finally:
+        os.chdir(cwd)
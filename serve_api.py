@@ -0,0 +1,31 @@
+# File: serve_api.py
+import sys
+import time
+import argparse
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import start_metrics_server
+from src.recommender.warmup import start_warmup
+from src.recommender.http_api import RecommendationHTTPServer
+
+# JSON HTTP front end of the recommenders, e.g. the target of load_test.py --url
+# Usage: python serve_api.py --host 0.0.0.0 --port 8000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the recommenders over a JSON HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    args = parser.parse_args()
+
+    try:
+        start_metrics_server()
+        start_warmup()
+        server = RecommendationHTTPServer(args.host, args.port).start()
+        while True:
+            time.sleep(3600)
+
+    except KeyboardInterrupt:
+        logging.info("HTTP API stopped")
+
+    except Exception as e:
+        logging.error(f"HTTP API terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
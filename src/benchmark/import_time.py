@@ -0,0 +1,54 @@
+# Import-time report for the application entry points.
+# Each module is imported in a fresh interpreter with `-X importtime` so that cold start cost is measured without any module caching.
+import sys
+import subprocess
+
+# Entry points whose cold import cost is tracked
+ENTRY_MODULES = ["app", "src.recommender.ml_recommender", "src.recommender.semantic_recommender", "src.pipeline.ml_pipeline"]
+
+
+def measure_import_time(module, top = 10):
+    """
+    Imports `module` in a fresh interpreter and parses the `-X importtime` output.
+    Args:
+        module (str): Dotted module name to import.
+        top (int, optional): Number of slowest imported packages to return. Defaults to 10.
+
+    Returns:
+        dict: Total cumulative import time in milliseconds and the slowest top-level packages.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output = True, text = True, check = True)
+
+    packages = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        if name == module:
+            total_us = int(cumulative_us)
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+
+    slowest = sorted(packages.items(), key = lambda item: item[1], reverse = True)[:top]
+    return {
+        "total_ms": round(total_us / 1000, 2),
+        "packages_ms": {name: round(us / 1000, 2) for name, us in slowest},
+    }
+
+
+def import_time_report(modules = None):
+    """
+    Measures the cold import time of every entry module.
+    Returns:
+        dict: Import times keyed by module name.
+    """
+    return {module: measure_import_time(module) for module in (modules or ENTRY_MODULES)}
+
+
+if __name__ == "__main__":
+    for module, report in import_time_report(sys.argv[1:] or None).items():
+        print(f"{module:<45} {report['total_ms']:>10.2f} ms")
+        for package, ms in report["packages_ms"].items():
+            print(f"    {package:<41} {ms:>10.2f} ms")
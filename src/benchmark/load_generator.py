@@ -0,0 +1,423 @@
+# Concurrency load generator for the recommenders.
+# The semantic path is served against a local stub of the embedding service (an HTTP server returning hashing
+# embeddings after a configurable latency, failing a configurable fraction of the calls), so no API key is needed and
+# the embedding deadline and keyword fallback are exercised like in production. A run replays an open-loop schedule
+# of mixed ML, user and semantic requests (Poisson arrivals at the target QPS) on N concurrent user threads, calling
+# the recommender classes directly or an HTTP front end. Latencies are measured from the scheduled send time, so the
+# queueing of an overloaded level is part of its tail latency. The hot locks of the recommenders are wrapped while the
+# load runs to measure how long requests wait for them as the concurrency grows.
+import os
+import sys
+import json
+import time
+import queue
+import pickle
+import random
+import threading
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.benchmark.runner import latency_stats
+from src.benchmark.synthetic_data import HashingEmbeddings, WORDS
+
+OPERATIONS = ("ml", "user", "semantic")
+
+
+def vectorstore_dimensions(persist_dir, default):
+    """
+    Embedding size of a partitioned vectorstore, `default` for stores without a partition manifest.
+    """
+    from src.components.vector_index import PARTITION_MANIFEST
+    manifest_path = Path(persist_dir, PARTITION_MANIFEST)
+    if not manifest_path.exists():
+        return default
+    with open(manifest_path) as f:
+        return json.load(f).get("dimensions", default)
+
+
+def prepare_synthetic_workspace(app_config, dimensions):
+    """
+    Trains the ML recommender and builds the semantic vectorstore of the synthetic benchmark dataset in the
+    benchmark workspace, embedding the books like the stub embedding server does.
+    Returns:
+        Path: The workspace; relative artifact paths only resolve to it once it is the working directory.
+    """
+    from src.benchmark.runner import BenchmarkRunner
+    from src.benchmark.synthetic_data import generate_semantic_dataset
+    from src.components.vector_index import SemanticIndexBuilder
+
+    runner = BenchmarkRunner(app_config)
+    zip_file_path = runner.prepare_workspace()
+    os.chdir(runner.workspace)
+    runner.benchmark_pipeline(zip_file_path)
+
+    recommend_config = app_config.semantic_recommender_config()
+    Path(recommend_config.final_books_obj_path).parent.mkdir(parents = True, exist_ok = True)
+    pickle.dump(generate_semantic_dataset(runner.n_semantic_books), open(recommend_config.final_books_obj_path, "wb"))
+    SemanticIndexBuilder(app_config, embedding = HashingEmbeddings(dimensions)).build()
+    return runner.workspace
+
+
+class _StubEmbeddingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["texts"]
+        delay, fail = stub.next_call()
+        time.sleep(delay)
+        if fail:
+            body, status = b'{"error": "injected failure"}', 503
+        else:
+            body, status = json.dumps({"embeddings": stub.embedding.embed_documents(texts)}).encode("utf-8"), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubEmbeddingServer:
+    """
+    Local HTTP stand-in of the remote embedding service: POST {"texts": [...]} returns {"embeddings": [...]} after
+    `latency_ms` (+/- normally distributed `jitter_ms`), or a 503 for a fraction `error_rate` of the calls.
+    """
+    def __init__(self, dimensions = 768, latency_ms = 40, jitter_ms = 10, error_rate = 0.0, seed = 0):
+        self.embedding = HashingEmbeddings(dimensions)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "injected_errors": 0}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubEmbeddingHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/embed"
+
+    def next_call(self):
+        """
+        Draws the latency in seconds and the failure of the next call.
+        """
+        with self.lock:
+            self.stats["calls"] += 1
+            fail = self.rng.random() < self.error_rate
+            self.stats["injected_errors"] += fail
+            return max(self.rng.gauss(self.latency_ms, self.jitter_ms), 0) / 1000, fail
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, name="stub-embedding", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Embedding model calling a `StubEmbeddingServer`; failed calls raise like the remote service client.
+    """
+    def __init__(self, url, timeout = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def embed_documents(self, texts):
+        request = urllib.request.Request(self.url, data = json.dumps({"texts": list(texts)}).encode("utf-8"),
+                                         headers = {"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout = self.timeout) as response:
+            return json.loads(response.read())["embeddings"]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class ContentionLock:
+    """
+    Lock wrapper counting the acquisitions that had to wait and the time spent waiting.
+    """
+    def __init__(self, lock):
+        self.lock = lock
+        self.stats_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.acquisitions, self.contended, self.wait_s, self.max_wait_s = 0, 0, 0.0, 0.0
+
+    def acquire(self, blocking = True, timeout = -1):
+        if self.lock.acquire(blocking = False):
+            waited = None
+        elif not blocking:
+            return False
+        else:
+            start = time.perf_counter()
+            if not self.lock.acquire(timeout = timeout):
+                return False
+            waited = time.perf_counter() - start
+        with self.stats_lock:
+            self.acquisitions += 1
+            if waited is not None:
+                self.contended += 1
+                self.wait_s += waited
+                self.max_wait_s = max(self.max_wait_s, waited)
+        return True
+
+    def release(self):
+        self.lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def report(self):
+        return {"acquisitions": self.acquisitions, "contended": self.contended,
+                "contention_rate": round(self.contended / max(self.acquisitions, 1), 4),
+                "wait_ms": round(self.wait_s * 1000, 3), "max_wait_ms": round(self.max_wait_s * 1000, 3)}
+
+
+def lock_sites(ml_recommender = None, semantic_recommender = None):
+    """
+    The shared locks of the request path, as (name, owner, attribute) triples.
+    """
+    from src.core.metrics import get_registry
+    from src.recommender import ml_recommender as ml_module
+
+    sites = [("metrics.registry", get_registry(), "_lock")]
+    if ml_recommender is not None:
+        sites.append(("ml.single_flight", ml_module._recommend_flight, "lock"))
+    if semantic_recommender is not None:
+        from src.recommender import semantic_recommender as semantic_module
+        from src.components import vector_index
+        sites += [("semantic.single_flight", semantic_module._search_flight, "lock"),
+                  ("semantic.vectorstore", semantic_recommender, "_vectorstore_lock"),
+                  ("semantic.result_cache", semantic_recommender.result_cache, "lock"),
+                  ("vector_index.clients", vector_index, "_clients_lock")]
+    return sites
+
+
+class LoadGenerator:
+    def __init__(self, app_config = None, ml_recommender = None, semantic_recommender = None, url = None):
+        """
+        Initializes the LoadGenerator object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the load test settings.
+            ml_recommender (MLRecommender, optional): ML recommender called by the "ml" and "user" requests.
+            semantic_recommender (SemanticRecommender, optional): Semantic recommender called by the "semantic" requests.
+            url (str, optional): Base url of an HTTP front end (see `RecommendationHTTPServer`); when given, the
+                requests are sent to it and the recommenders are only used to draw the request parameters.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.load_config = app_config.load_test_config()
+            self.ml_recommender = ml_recommender
+            self.semantic_recommender = semantic_recommender
+            self.url = url.rstrip("/") if url else None
+
+            rng = np.random.default_rng(self.load_config.seed)
+            self.queries = [" ".join(rng.choice(WORDS, size = 4)) for _ in range(self.load_config.n_queries)]
+            self.titles, self.user_ids = [], []
+            artifacts = getattr(ml_recommender, "artifacts", None)
+            if artifacts is not None:
+                self.titles = artifacts.book_names.tolist()
+                self.user_ids = artifacts.user_ids.tolist()
+
+            self.mix = {op: weight for op, weight in self.load_config.mix.items()
+                        if weight > 0 and self._supports(op)}
+            if not self.mix:
+                raise ValueError("No request type of the mix can be served by the given recommenders")
+
+        except Exception as e:
+            logging.error(f"Load Generator initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def _supports(self, op):
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown request type in the load mix: {op}")
+        if op == "semantic":
+            return self.semantic_recommender is not None or self.url is not None
+        return bool(self.titles) if op == "ml" else bool(self.user_ids)
+
+
+    def schedule(self, qps, duration, seed):
+        """
+        Open-loop request schedule with Poisson arrivals.
+        Returns:
+            list: (send offset in seconds, request type, parameter) tuples in send order.
+        """
+        rng = random.Random(seed)
+        ops, weights = zip(*self.mix.items())
+        requests, offset = [], rng.expovariate(qps)
+        while offset < duration:
+            op = rng.choices(ops, weights)[0]
+            if op == "ml":
+                parameter = rng.choice(self.titles)
+            elif op == "user":
+                parameter = rng.choice(self.user_ids)
+            else:
+                parameter = rng.choice(self.queries)
+            requests.append((offset, op, parameter))
+            offset += rng.expovariate(qps)
+        return requests
+
+
+    def call(self, op, parameter):
+        """
+        Sends one request, to the HTTP front end or directly to the recommender classes.
+        """
+        if self.url is not None:
+            path, name = {"ml": ("/recommend", "book"), "user": ("/recommend/user", "user_id"),
+                          "semantic": ("/semantic", "query")}[op]
+            with urllib.request.urlopen(f"{self.url}{path}?{urlencode({name: parameter})}",
+                                        timeout = self.load_config.request_timeout) as response:
+                return json.loads(response.read())
+        if op == "ml":
+            return self.ml_recommender.recommend(parameter)
+        if op == "user":
+            return self.ml_recommender.recommend_for_user(parameter)
+        return self.semantic_recommender.semmantic_recommend(parameter)
+
+
+    def run_level(self, concurrency, qps, duration, locks = ()):
+        """
+        Replays one schedule on `concurrency` user threads.
+        Args:
+            concurrency (int): Number of concurrent users.
+            qps (float): Target request rate.
+            duration (float): Length of the schedule in seconds.
+            locks (list, optional): (name, ContentionLock) pairs reported for this level.
+
+        Returns:
+            dict: Achieved throughput, per request type latency percentiles (from the scheduled send time),
+                service time p50 and error rate, and the lock contention of the level.
+        """
+        requests = self.schedule(qps, duration, self.load_config.seed + concurrency)
+        pending = queue.SimpleQueue()
+        for request in requests:
+            pending.put(request)
+        results = {op: {"latencies": [], "service": [], "errors": 0} for op in self.mix}
+        results_lock = threading.Lock()
+        for _, lock in locks:
+            lock.reset()
+
+        def user():
+            while True:
+                try:
+                    offset, op, parameter = pending.get_nowait()
+                except queue.Empty:
+                    return
+                delay = start_time + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                sent = time.perf_counter()
+                try:
+                    self.call(op, parameter)
+                    error = False
+                except Exception as e:
+                    logging.debug(f"Load test request {op} failed: {e}")
+                    error = True
+                done = time.perf_counter()
+                with results_lock:
+                    result = results[op]
+                    result["errors"] += error
+                    result["latencies"].append(done - (start_time + offset))
+                    result["service"].append(done - sent)
+
+        start_time = time.perf_counter()
+        threads = [threading.Thread(target=user, name=f"load-user-{i}", daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start_time
+
+        level = {"requests": len(requests), "target_qps": qps, "throughput_rps": round(len(requests) / wall, 2),
+                 "error_rate": round(sum(r["errors"] for r in results.values()) / max(len(requests), 1), 4),
+                 "operations": {}, "locks": {name: lock.report() for name, lock in locks}}
+        for op, result in results.items():
+            if not result["latencies"]:
+                continue
+            stats = latency_stats(result["latencies"], wall)
+            stats["service_p50_ms"] = round(float(np.percentile(result["service"], 50)) * 1000, 4)
+            stats["error_rate"] = round(result["errors"] / len(result["latencies"]), 4)
+            level["operations"][op] = stats
+        return level
+
+
+    def run(self, concurrency = None, qps = None, duration = None):
+        """
+        Runs one load level per concurrency.
+        Args:
+            concurrency (list, optional): Concurrent users of every level. Defaults to the configured levels.
+            qps (float, optional): Target request rate of every level. Defaults to the configured value.
+            duration (float, optional): Seconds per level. Defaults to the configured value.
+
+        Returns:
+            dict: The load test report, one entry per concurrency level.
+
+        Raises:
+            AppException: If the load test fails
+        """
+        concurrency = concurrency or list(self.load_config.concurrency)
+        qps = qps or self.load_config.qps
+        duration = duration or self.load_config.duration
+        # lock contention is only observable in process
+        sites = lock_sites(self.ml_recommender, self.semantic_recommender) if self.url is None else []
+        originals = [(owner, attribute, getattr(owner, attribute)) for _, owner, attribute in sites]
+        try:
+            locks = []
+            for name, owner, attribute in sites:
+                lock = ContentionLock(getattr(owner, attribute))
+                setattr(owner, attribute, lock)
+                locks.append((name, lock))
+
+            report = {"target": self.url or "classes", "mix": self.mix, "levels": {}}
+            for users in concurrency:
+                logging.info(f"Load level: {users} concurrent users at {qps} qps for {duration}s")
+                if self.semantic_recommender is not None:
+                    # every level starts with a cold result cache
+                    self.semantic_recommender.result_cache.clear()
+                report["levels"][str(users)] = self.run_level(users, qps, duration, locks)
+            return report
+
+        except Exception as e:
+            logging.error(f"Load test failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+        finally:
+            for owner, attribute, lock in originals:
+                setattr(owner, attribute, lock)
+
+
+def format_load_report(report):
+    """
+    Formats a load test report as one table row per concurrency level and request type, followed by the
+    contended locks.
+    """
+    header = (f"{'users':>5} {'request':<9} {'n':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'svc p50 ms':>10} {'errors':>7}")
+    lines = [header, "-" * len(header)]
+    for users, level in report["levels"].items():
+        for op, stats in level["operations"].items():
+            lines.append(f"{users:>5} {op:<9} {stats['n']:>6} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.2f} "
+                         f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['service_p50_ms']:>10.2f} "
+                         f"{stats['error_rate']:>7.2%}")
+        lines.append(f"{users:>5} {'total':<9} {level['requests']:>6} {level['throughput_rps']:>8.1f} "
+                     f"(target {level['target_qps']} qps) {level['error_rate']:>7.2%} errors")
+        for name, lock in level["locks"].items():
+            if lock["contended"]:
+                lines.append(f"{'':>5} lock {name}: {lock['contended']}/{lock['acquisitions']} contended, "
+                             f"{lock['wait_ms']:.2f} ms waited, max {lock['max_wait_ms']:.2f} ms")
+    return "\n".join(lines)
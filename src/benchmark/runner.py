@@ -0,0 +1,387 @@
+# Benchmark runner for the recommendation hot paths.
+# Times and profiles every ML pipeline stage and the recommenders against synthetic data, and compares the results to a stored baseline.
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import zipfile
+import cProfile
+import resource
+import numpy as np
+from pathlib import Path
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.benchmark.synthetic_data import (generate_ratings_dataset, generate_semantic_dataset,
+                                          HashingEmbeddings, WORDS)
+from src.benchmark.import_time import import_time_report
+
+# Minimum absolute change before a metric is reported as a regression, keyed by metric suffix
+MIN_DELTA = {"_s": 0.01, "_ms": 0.1, "_mb": 1.0, "_bytes": 1024}
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def latency_stats(latencies, total_time):
+    """
+    Summarizes per-call latencies.
+    Args:
+        latencies (list): Per-call latencies in seconds.
+        total_time (float): Wall time of the whole run in seconds.
+
+    Returns:
+        dict: p50/p95/p99 latency in milliseconds and throughput in requests per second.
+    """
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "n": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "throughput_rps": round(len(latencies) / total_time, 2) if total_time else 0.0,
+    }
+
+
+def flatten_report(report, prefix = ""):
+    """
+    Flattens the nested numeric metrics of a report into dotted keys.
+    """
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_report(value, prefix = f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def find_regressions(report, baseline, tolerance):
+    """
+    Compares a report against the baseline.
+
+    Latencies, wall/cpu times, memory and artifact sizes regress when they grow by more than `tolerance`;
+    throughput regresses when it drops by more than `tolerance`.
+
+    Returns:
+        list: Human readable description of every regressed metric.
+    """
+    current = flatten_report(report)
+    regressions = []
+    for key, base in flatten_report(baseline).items():
+        if key not in current or key.startswith("scale."):
+            continue
+        value = current[key]
+
+        if key.endswith("throughput_rps"):
+            if value < base * (1 - tolerance):
+                regressions.append(f"{key}: {value} < baseline {base}")
+            continue
+
+        suffix = next((s for s in MIN_DELTA if key.endswith(s)), None)
+        if suffix and value > base * (1 + tolerance) and value - base > MIN_DELTA[suffix]:
+            regressions.append(f"{key}: {value} > baseline {base}")
+
+    return regressions
+
+
+class BenchmarkRunner:
+    def __init__(self, app_config = None, n_users = None, n_titles = None, density = None,
+                 n_requests = None, n_semantic_books = None, profile = False):
+        """
+        Initializes the BenchmarkRunner object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the benchmark settings.
+            n_users, n_titles, density (optional): Scale of the synthetic ratings dataset.
+            n_requests (int, optional): Number of calls per recommender latency benchmark.
+            n_semantic_books (int, optional): Size of the synthetic semantic books dataset.
+            profile (bool, optional): If True, writes a cProfile dump for every benchmark.
+        """
+        try:
+            self.app_config = app_config or get_app_configuration()
+            self.benchmark_config = self.app_config.benchmark_config()
+            self.n_users = n_users or self.benchmark_config.n_users
+            self.n_titles = n_titles or self.benchmark_config.n_titles
+            self.density = density or self.benchmark_config.density
+            self.n_requests = n_requests or self.benchmark_config.n_requests
+            self.n_semantic_books = n_semantic_books or self.benchmark_config.n_semantic_books
+            self.profile = profile
+
+            self.workspace = Path(self.benchmark_config.root_dir, "workspace")
+            self.profile_dir = Path(self.benchmark_config.root_dir, "profiles")
+
+        except Exception as e:
+            logging.error(f"Benchmark configuration initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def _profiled(self, name, fn, *args):
+        """
+        Calls `fn`, writing a cProfile dump named after the benchmark when profiling is enabled.
+        """
+        if not self.profile:
+            return fn(*args)
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args)
+        finally:
+            self.profile_dir.mkdir(parents = True, exist_ok = True)
+            profiler.dump_stats(self.profile_dir / f"{name}.prof")
+
+
+    def measure_stage(self, name, fn, *args):
+        """
+        Runs one pipeline stage and records its wall time, CPU time and the process peak RSS after it.
+        """
+        logging.info(f"Benchmarking stage: {name}")
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        self._profiled(name, fn, *args)
+
+        return {
+            "wall_s": round(time.perf_counter() - wall_start, 4),
+            "cpu_s": round(time.process_time() - cpu_start, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 2),
+        }
+
+
+    def measure_latency(self, name, fn, inputs):
+        """
+        Calls `fn` once per input and records the latency distribution and throughput.
+        """
+        logging.info(f"Benchmarking latency: {name} ({len(inputs)} calls)")
+        latencies = []
+
+        def run():
+            for item in inputs:
+                start = time.perf_counter()
+                fn(item)
+                latencies.append(time.perf_counter() - start)
+
+        total_start = time.perf_counter()
+        self._profiled(name, run)
+        return latency_stats(latencies, time.perf_counter() - total_start)
+
+
+    def prepare_workspace(self):
+        """
+        Creates a clean workspace holding the zipped synthetic raw dataset.
+        Returns:
+            Path: The path of the zipped raw dataset.
+        """
+        if self.workspace.exists():
+            shutil.rmtree(self.workspace)
+        self.workspace.mkdir(parents = True)
+
+        books, ratings = generate_ratings_dataset(self.n_users, self.n_titles, self.density)
+        zip_file_path = self.workspace / "books_data.zip"
+        with zipfile.ZipFile(zip_file_path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+            zip_ref.writestr("books.csv", books.to_csv(sep = ";", index = False).encode("iso8859"))
+            zip_ref.writestr("ratings.csv", ratings.to_csv(sep = ";", index = False).encode("iso8859"))
+
+        logging.info(f"Synthetic dataset generated: {len(books)} books, {len(ratings)} ratings")
+        return zip_file_path
+
+
+    def benchmark_pipeline(self, zip_file_path):
+        """
+        Times every ML pipeline stage on the synthetic dataset.
+        The download step is skipped; ingestion starts from the local zip file.
+        """
+        from src.components.data_ingestion import DataIngestion
+        from src.components.data_validation import DataValidation
+        from src.components.data_transformation import DataTransformation
+        from src.components.model_trainer import ModelTrainer
+
+        return {
+            "data_ingestion": self.measure_stage("data_ingestion", DataIngestion(self.app_config).extract_zip_file, zip_file_path),
+            "data_validation": self.measure_stage("data_validation", DataValidation(self.app_config).validate_dataset),
+            "data_transformation": self.measure_stage("data_transformation", DataTransformation(self.app_config).transform),
+            "model_training": self.measure_stage("model_training", ModelTrainer(self.app_config).train),
+        }
+
+
+    def benchmark_ml_recommender(self):
+        """
+        Measures `MLRecommender.recommend` and `MLRecommender.get_poster` latencies on random catalogue titles, and
+        the user recommendations of random rating users, one at a time and in batches, and the recommendations
+        for sets of 5 seed titles.
+        """
+        from src.recommender.ml_recommender import MLRecommender
+
+        recommender = MLRecommender(self.app_config)
+        artifacts = recommender.artifacts
+        book_names = artifacts.book_names.tolist() if artifacts is not None else list(recommender.books_pivot_table.index)
+        rng = np.random.default_rng(0)
+        titles = [book_names[i] for i in rng.integers(0, len(book_names), self.n_requests)]
+
+        if artifacts is not None:
+            suggestions = [artifacts.kneighbors([artifacts.book_names.index(title)], n_neighbors = 6)[1] for title in titles]
+        else:
+            suggestions = [recommender.model.kneighbors(recommender.books_pivot_table.loc[[title]].values, n_neighbors = 6)[1]
+                           for title in titles]
+
+        seed_sets = [[book_names[i] for i in rng.integers(0, len(book_names), 5)] for _ in range(self.n_requests)]
+        latency = {
+            "ml_recommend": self.measure_latency("ml_recommend", recommender.recommend, titles),
+            "ml_get_poster": self.measure_latency("ml_get_poster", recommender.get_poster, suggestions),
+            "ml_recommend_books_5": self.measure_latency("ml_recommend_books_5", recommender.recommend_for_books, seed_sets),
+        }
+        if artifacts is not None:
+            users = artifacts.user_ids[rng.integers(0, len(artifacts.user_ids), self.n_requests)].tolist()
+            batches = [artifacts.user_ids[rng.integers(0, len(artifacts.user_ids), 100)].tolist()
+                       for _ in range(self.n_requests)]
+            latency["ml_recommend_user"] = self.measure_latency("ml_recommend_user", recommender.recommend_for_user, users)
+            latency["ml_recommend_users_batch_100"] = self.measure_latency("ml_recommend_users_batch_100",
+                                                                           recommender.recommend_for_users, batches)
+        return latency
+
+
+    def benchmark_semantic_recommender(self):
+        """
+        Builds the partitioned vector index of synthetic books with the local hashing embedder and measures
+        `SemanticRecommender.semmantic_recommend` latency, unfiltered and with selective metadata filters.
+        Also times the raw vector search of the Chroma partitions and of the quantized exact engine, the BM25
+        keyword search, and
+        reports the recall of the quantized engine against Chroma.
+        """
+        from src.components.vector_index import SemanticIndexBuilder, PartitionedVectorIndex
+        from src.components.quantized_index import QuantizedVectorIndex, accuracy_report
+        from src.components.keyword_index import KeywordIndex
+        from src.recommender.semantic_recommender import SemanticRecommender
+
+        recommend_config = self.app_config.semantic_recommender_config()
+        Path(recommend_config.final_books_obj_path).parent.mkdir(parents = True, exist_ok = True)
+
+        books = generate_semantic_dataset(self.n_semantic_books)
+        pickle.dump(books, open(recommend_config.final_books_obj_path, "wb"))
+
+        embedding = HashingEmbeddings()
+        build_start = time.perf_counter()
+        manifest = SemanticIndexBuilder(self.app_config, embedding = embedding).build()
+        build_time = time.perf_counter() - build_start
+
+        recommender = SemanticRecommender(self.app_config, embedding = embedding)
+        rng = np.random.default_rng(0)
+        queries = [" ".join(rng.choice(WORDS, size = 5)) for _ in range(self.n_requests)]
+        filters = {"categories": [books["categories"].iloc[0]], "min_year": 2000, "min_rating": 4.0}
+        vectors = [embedding.embed_query(query) for query in queries]
+        persist_dir = recommend_config.chroma_persist_dir
+        chroma_index = PartitionedVectorIndex(persist_dir, max_workers = recommend_config.query_workers)
+        quantized_index = QuantizedVectorIndex(persist_dir, rescore_factor = recommend_config.rescore_factor)
+        keyword_index = KeywordIndex(persist_dir)
+
+        return {
+            "semantic_index_build": {"wall_s": round(build_time, 4), "partitions": manifest["n_partitions"]},
+            "semantic_recommend": self.measure_latency("semantic_recommend", recommender.semmantic_recommend, queries),
+            "semantic_recommend_filtered": self.measure_latency(
+                "semantic_recommend_filtered", lambda query: recommender.semmantic_recommend(query, filters = filters),
+                queries),
+            "semantic_search_chroma": self.measure_latency("semantic_search_chroma",
+                                                           lambda vector: chroma_index.search(vector, 8), vectors),
+            "semantic_search_quantized": self.measure_latency("semantic_search_quantized",
+                                                              lambda vector: quantized_index.search(vector, 8), vectors),
+            "semantic_search_keyword": self.measure_latency("semantic_search_keyword",
+                                                            lambda query: keyword_index.search(query, 8), queries),
+            "semantic_accuracy": accuracy_report(persist_dir, chroma_index, n_queries = self.n_requests,
+                                                 rescore_factor = recommend_config.rescore_factor),
+        }
+
+
+    def artifact_sizes(self):
+        """
+        Returns the size in bytes of every file produced under the workspace artifacts directory.
+        """
+        artifacts_dir = Path("artifacts")
+        sizes = {}
+        for path in sorted(artifacts_dir.rglob("*")):
+            if path.is_file() and "data_ingestion" not in path.parts:
+                sizes[str(path.relative_to(artifacts_dir)).replace(os.sep, "/") + "_bytes"] = path.stat().st_size
+        return sizes
+
+
+    def run(self, semantic = True):
+        """
+        Runs the full benchmark suite inside an isolated workspace.
+        Args:
+            semantic (bool, optional): Whether to benchmark the semantic recommender. Defaults to True.
+
+        Returns:
+            dict: The benchmark report.
+
+        Raises:
+            AppException: If any benchmark fails
+        """
+        cwd = os.getcwd()
+        try:
+            # cold import cost of the entry points, measured from the project root
+            import_time = {module: {"total_ms": times["total_ms"]} for module, times in import_time_report().items()}
+            zip_file_path = self.prepare_workspace()
+            # all relative artifact paths of the configuration resolve inside the workspace
+            os.chdir(self.workspace)
+
+            report = {
+                "scale": {"n_users": self.n_users, "n_titles": self.n_titles, "density": self.density,
+                          "n_requests": self.n_requests},
+                "stages": self.benchmark_pipeline(zip_file_path),
+                "latency": self.benchmark_ml_recommender(),
+            }
+            if semantic:
+                semantic_report = self.benchmark_semantic_recommender()
+                report["stages"]["semantic_index_build"] = semantic_report.pop("semantic_index_build")
+                report["semantic_accuracy"] = semantic_report.pop("semantic_accuracy")
+                report["latency"].update(semantic_report)
+
+            report["import_time"] = import_time
+            report["artifacts"] = self.artifact_sizes()
+            report["peak_rss_mb"] = round(peak_rss_mb(), 2)
+            return report
+
+        except Exception as e:
+            logging.error(f"Benchmark run failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+        finally:
+            os.chdir(cwd)
+
+
+    def check_baseline(self, report, update = False):
+        """
+        Compares the report with the stored baseline, or stores it as the new baseline.
+        Args:
+            report (dict): The benchmark report.
+            update (bool, optional): If True, overwrites the baseline with the report.
+
+        Returns:
+            list: The regressed metrics, empty if none regressed.
+
+        Raises:
+            FileNotFoundError: If no baseline is stored and `update` is False.
+        """
+        baseline_path = self.benchmark_config.baseline_path
+        if update:
+            with open(baseline_path, "w") as f:
+                json.dump(report, f, indent = 2)
+            logging.info(f"Benchmark baseline updated at {baseline_path}")
+            return []
+
+        if not baseline_path.exists():
+            raise FileNotFoundError(f"No benchmark baseline found at {baseline_path}, "
+                                    "store one with python benchmark.py --update-baseline")
+
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        if baseline.get("scale") != report.get("scale"):
+            logging.warning("Benchmark scale differs from the baseline, regressions may be inaccurate")
+
+        return find_regressions(report, baseline, self.benchmark_config.tolerance)
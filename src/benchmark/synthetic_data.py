@@ -0,0 +1,109 @@
+# Synthetic dataset generators used by the benchmark suite.
+# Produces books/ratings files in the raw Book-Crossing layout and a books dataset for the semantic recommender.
+import hashlib
+import numpy as np
+import pandas as pd
+from langchain_core.embeddings import Embeddings
+
+WORDS = ["life", "nature", "war", "peace", "love", "mystery", "history", "science", "magic", "family",
+         "journey", "ocean", "city", "friendship", "crime", "space", "music", "art", "faith", "power",
+         "memory", "childhood", "island", "empire", "revolution", "garden", "winter", "secret", "dream", "river"]
+
+
+def generate_ratings_dataset(n_users, n_titles, density, seed = 42):
+    """
+    Generates books and ratings tables in the raw Book-Crossing layout.
+
+    User activity and book popularity follow a skewed (zipf-like) distribution so that the
+    user/book thresholds of the transformation stage keep a realistic subset of the data.
+
+    Args:
+        n_users (int): Number of users.
+        n_titles (int): Number of book titles.
+        density (float): Fraction of the users x titles matrix that is rated.
+        seed (int, optional): Random seed. Defaults to 42.
+
+    Returns:
+        tuple: (books, ratings) DataFrames with the raw column names.
+    """
+    rng = np.random.default_rng(seed)
+
+    isbns = np.array([f"{i:010d}" for i in range(n_titles)])
+    books = pd.DataFrame({
+        "ISBN": isbns,
+        "Book-Title": [f"Book {i} {WORDS[i % len(WORDS)].title()}" for i in range(n_titles)],
+        "Book-Author": [f"Author {i % max(n_titles // 5, 1)}" for i in range(n_titles)],
+        "Year-Of-Publication": rng.integers(1950, 2025, n_titles),
+        "Publisher": [f"Publisher {i % 50}" for i in range(n_titles)],
+        "Image-URL-S": [f"http://images.example.com/{isbn}.S.jpg" for isbn in isbns],
+        "Image-URL-M": [f"http://images.example.com/{isbn}.M.jpg" for isbn in isbns],
+        "Image-URL-L": [f"http://images.example.com/{isbn}.L.jpg" for isbn in isbns],
+    })
+
+    # per-user rating counts with a mean of `density * n_titles`
+    user_weights = 1.0 / np.arange(1, n_users + 1) ** 0.5
+    counts = np.clip(np.round(user_weights / user_weights.mean() * density * n_titles), 1, n_titles).astype(int)
+    book_weights = 1.0 / np.arange(1, n_titles + 1) ** 0.5
+    book_weights /= book_weights.sum()
+
+    users = np.repeat(np.arange(1, n_users + 1), counts)
+    titles = np.concatenate([rng.choice(n_titles, size = count, replace = False, p = book_weights) for count in counts])
+
+    ratings = pd.DataFrame({
+        "User-ID": users,
+        "ISBN": isbns[titles],
+        "Book-Rating": rng.integers(0, 11, len(users)),
+    })
+
+    return books, ratings
+
+
+def generate_semantic_dataset(n_books, seed = 42):
+    """
+    Generates the cleaned books dataset used by the semantic recommender.
+    Args:
+        n_books (int): Number of books.
+        seed (int, optional): Random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: Books with isbn13, title, description, thumbnail and tagged_description columns.
+    """
+    rng = np.random.default_rng(seed)
+    isbn13 = 9780000000000 + np.arange(n_books)
+    descriptions = [" ".join(rng.choice(WORDS, size = 30)) for _ in range(n_books)]
+
+    books = pd.DataFrame({
+        "isbn13": isbn13,
+        "title": [f"Semantic Book {i}" for i in range(n_books)],
+        "categories": rng.choice(["Fiction", "History", "Science", "Poetry"], size = n_books),
+        "thumbnail": [f"http://books.example.com/{i}.jpg" for i in isbn13],
+        "description": descriptions,
+        "published_year": rng.integers(1950, 2025, n_books),
+        "num_pages": rng.integers(80, 900, n_books),
+        "average_rating": rng.uniform(1, 5, n_books).round(2),
+    })
+    books["tagged_description"] = books["isbn13"].astype(str) + ": " + books["description"]
+    return books
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic local embedding model (feature hashing of words) standing in for the
+    remote Google embedding service.
+    """
+    def __init__(self, dimensions = 256):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype = np.float32)
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
@@ -0,0 +1,192 @@
+import sys
+import json
+import pickle
+import importlib.util
+import numpy as np
+from pathlib import Path
+from multiprocessing import Pool
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.components.serving_artifacts import ServingArtifacts, load_poster_urls
+from src.core.configuration import get_app_configuration
+
+# Per-process state of the batch workers, filled once by `_init_worker`
+_worker_state = {}
+
+
+def _init_worker(serving_dir, legacy_paths, book_names, poster_urls, top_k):
+    """
+    Opens the catalogue once per worker process: the memory-mapped serving artifacts, whose pages are shared
+    by all workers, or with `legacy_paths` (trained model and pivot table pickles) the trained model and the
+    rating matrix it was fitted on.
+    """
+    if legacy_paths is None:
+        artifacts = ServingArtifacts(serving_dir)
+        _worker_state["kneighbors"] = artifacts.kneighbors
+        _worker_state["n_items"] = artifacts.matrix.shape[0]
+        book_names, poster_urls = artifacts.book_names, artifacts.poster_urls
+    else:
+        from scipy.sparse import csr_matrix
+        trained_model_path, books_pivot_table_path = legacy_paths
+        model = pickle.load(open(trained_model_path, "rb"))
+        matrix = csr_matrix(pickle.load(open(books_pivot_table_path, "rb")))
+        _worker_state["kneighbors"] = lambda rows, n_neighbors: model.kneighbors(matrix[rows], n_neighbors = n_neighbors)
+        _worker_state["n_items"] = matrix.shape[0]
+
+    _worker_state["book_names"] = book_names
+    _worker_state["poster_urls"] = poster_urls
+    _worker_state["top_k"] = top_k
+
+
+def _recommend_chunk(bounds):
+    """
+    Computes the top-k neighbours for a contiguous range of catalogue rows with one multi-query
+    `kneighbors` call.
+    Args:
+        bounds (tuple): (start, stop) row range of the catalogue.
+
+    Returns:
+        list: One record per book of the range.
+    """
+    start, stop = bounds
+    book_names = _worker_state["book_names"]
+    poster_urls = _worker_state["poster_urls"]
+    top_k = _worker_state["top_k"]
+
+    n_neighbors = min(top_k + 1, _worker_state["n_items"])
+    distances, indices = _worker_state["kneighbors"](np.arange(start, stop), n_neighbors)
+
+    # drop the query book itself, falling back to the furthest neighbour when it isn't returned
+    rows = np.arange(start, stop)[:, None]
+    keep = indices != rows
+    keep[keep.all(axis=1), -1] = False
+
+    records = []
+    for i, row in enumerate(range(start, stop)):
+        neighbours = indices[i][keep[i]][:top_k]
+        records.append({
+            "book": book_names[row],
+            "recommended_books": list(book_names.take(neighbours)),
+            "poster_urls": list(poster_urls.take(neighbours)),
+            "distances": distances[i][keep[i]][:top_k].round(6).tolist()
+        })
+
+    return records
+
+
+class BatchRecommender:
+    def __init__(self, app_config = None):
+        """
+        Initializes the BatchRecommender object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the configuration
+            for offline batch recommendations.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.batch_config = app_config.batch_recommendation_config()
+
+        except Exception as e:
+            logging.error(f"Batch Recommender configuration initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def _write_jsonl(self, chunks, output_path):
+        """
+        Streams the recommendation records into a JSON-lines file, one chunk at a time.
+        """
+        count = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            for records in chunks:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += len(records)
+
+        return count
+
+
+    def _write_parquet(self, chunks, output_path):
+        """
+        Streams the recommendation records into a parquet file, one row group per chunk.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([("book", pa.string()),
+                            ("recommended_books", pa.list_(pa.string())),
+                            ("poster_urls", pa.list_(pa.string())),
+                            ("distances", pa.list_(pa.float64()))])
+        count = 0
+        with pq.ParquetWriter(output_path, schema) as writer:
+            for records in chunks:
+                writer.write_table(pa.Table.from_pylist(records, schema = schema))
+                count += len(records)
+
+        return count
+
+
+    def export(self, top_k = None, output_format = None, output_path = None, n_workers = None, batch_size = None):
+        """
+        Computes the top-k recommendations with posters for every book in the catalogue and streams
+        them to disk.
+
+        The catalogue is split into row ranges of `batch_size` books. Each range is resolved by a worker
+        process with a single multi-query neighbour search, and finished ranges are written out as soon
+        as they arrive so only a few chunks are ever held in memory. The workers memory-map the serving
+        artifacts; the trained model and pivot table pickles are only loaded when no artifacts were exported.
+
+        Args:
+            top_k (int, optional): Number of recommendations per book. Defaults to the configured value.
+            output_format (str, optional): "jsonl" or "parquet". Defaults to the configured value.
+            output_path (str, optional): Destination file. Defaults to the configured output directory.
+            n_workers (int, optional): Number of worker processes. Defaults to the configured value.
+            batch_size (int, optional): Books per neighbour query. Defaults to the configured value.
+
+        Returns:
+            Path: The path of the written file.
+
+        Raises:
+            AppException: If loading the artifacts, computing or writing the recommendations fails
+        """
+        try:
+            top_k = top_k or self.batch_config.top_k
+            output_format = (output_format or self.batch_config.output_format).lower()
+            n_workers = n_workers or self.batch_config.n_workers
+            batch_size = batch_size or self.batch_config.batch_size
+
+            if output_format not in ("jsonl", "parquet"):
+                raise ValueError(f"Unsupported output format: {output_format}")
+            if output_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+                raise ImportError("The parquet output format requires pyarrow, install it with `pip install pyarrow` "
+                                  "or use the jsonl format")
+
+            if output_path is None:
+                output_path = Path(self.batch_config.output_dir, f"{self.batch_config.output_file}.{output_format}")
+
+            logging.info("Loading artifacts for batch recommendations")
+            if ServingArtifacts.exists(self.batch_config.serving_dir):
+                n_books = len(ServingArtifacts(self.batch_config.serving_dir).book_names)
+                initargs = (self.batch_config.serving_dir, None, None, None, top_k)
+            else:
+                book_names = pickle.load(open(self.batch_config.book_names_obj_path, "rb")).to_numpy(dtype=object)
+                final_ratings = pickle.load(open(self.batch_config.final_ratings_obj_path, "rb"))
+                poster_urls = load_poster_urls(final_ratings, book_names)
+                del final_ratings
+                n_books = len(book_names)
+                legacy_paths = (self.batch_config.trained_model_path, self.batch_config.books_pivot_table_obj_path)
+                initargs = (None, legacy_paths, book_names, poster_urls, top_k)
+
+            bounds = [(start, min(start + batch_size, n_books)) for start in range(0, n_books, batch_size)]
+
+            logging.info(f"Computing top-{top_k} recommendations for {n_books} books with {n_workers} workers")
+            writer = self._write_parquet if output_format == "parquet" else self._write_jsonl
+
+            with Pool(processes = n_workers, initializer = _init_worker, initargs = initargs) as pool:
+                count = writer(pool.imap(_recommend_chunk, bounds), output_path)
+
+            logging.info(f"Batch recommendations for {count} books saved at {output_path}")
+            return Path(output_path)
+
+        except Exception as e:
+            logging.error(f"Batch recommendation export failed: {e}", exc_info=True)
+            raise AppException(e, sys)
@@ -4,16 +4,18 @@ import requests
 import zipfile
 from src.core.logger import logging
 from src.core.exception import AppException
+from src.core.metrics import instrument
 from src.utils import create_directories
-from src.core.configuration import AppConfiguration
+from src.core.configuration import get_app_configuration
 
 class DataIngestion:
-    def __init__(self, app_config = AppConfiguration()):
+    def __init__(self, app_config = None):
         """
         DataIngestion Intialization
         data_ingestion_config: DataIngestionConfig 
         """
         try:
+            app_config = app_config or get_app_configuration()
             self.data_ingestion_config = app_config.data_ingestion_config()
 
         except Exception as e:
@@ -69,6 +71,7 @@ class DataIngestion:
             raise AppException(e, sys)
 
 
+    @instrument("pipeline.data_ingestion")
     def initiate_data_ingestion(self):
         """
         Starts the data ingestion process by downloading the data from given url and saving it into a given location. 
@@ -1,13 +1,59 @@
+import re
 import sys
 import html
 import pickle
+import numpy as np
 import pandas as pd
 from src.core.logger import logging
 from src.core.exception import AppException
-from src.core.configuration import AppConfiguration
+from src.core.metrics import instrument, add_counts
+from src.core.configuration import get_app_configuration
+from src.components.serving_artifacts import export_serving_artifacts
+from src.components.title_index import normalize_title
+from src.components.id_dictionary import IdDictionary
+from src.components.edition_dedup import find_duplicate_editions
+
+# Escape backslashes, double quotes and repeated whitespace, removed from titles in a single pass
+_TITLE_CLEANUP = re.compile(r'[\\"]|(?<=\s)\s+')
+
+
+def normalize_titles(titles):
+    """
+    Cleans a title column and assigns every title its canonical key.
+
+    The column is factorized so the cleanup (HTML unescaping, then one compiled regex pass) runs once per
+    distinct title instead of once per row. Titles whose keys are equal (case, punctuation, accents and
+    quoting variants of the same title) are merged into their most frequent spelling.
+
+    Args:
+        titles (pd.Series): Raw titles.
+
+    Returns:
+        tuple: (canonical titles, title keys) Series aligned with `titles`, NaN for missing titles.
+    """
+    codes, uniques = pd.factorize(titles)
+    cleaned = [_TITLE_CLEANUP.sub("", html.unescape(str(title))).strip() for title in uniques]
+    keys = [normalize_title(title) or title.lower() for title in cleaned]
+    key_codes, key_uniques = pd.factorize(pd.Index(keys))
+
+    # most frequent spelling of each key, ties broken alphabetically
+    variants = pd.DataFrame({"key": key_codes, "title": cleaned,
+                             "count": np.bincount(codes[codes >= 0], minlength=len(uniques))})
+    canonical = (variants.sort_values(["count", "title"], ascending=[False, True])
+                         .drop_duplicates("key").set_index("key")["title"]
+                         .reindex(range(len(key_uniques))).to_numpy(dtype=object))
+
+    present = codes >= 0
+    key_of_row = key_codes[codes[present]]
+    canonical_titles = np.full(len(codes), np.nan, dtype=object)
+    title_keys = np.full(len(codes), np.nan, dtype=object)
+    canonical_titles[present] = canonical[key_of_row]
+    title_keys[present] = key_uniques.to_numpy(dtype=object)[key_of_row]
+    return pd.Series(canonical_titles, index=titles.index), pd.Series(title_keys, index=titles.index)
+
 
 class DataTransformation:
-    def __init__(self, config = AppConfiguration()):
+    def __init__(self, config = None):
         """
         Initializes the DataValidation object.
         Args:
@@ -15,13 +61,59 @@ class DataTransformation:
             for data validation.
         """
         try:
+            config = config or get_app_configuration()
             self.data_transformation_config = config.data_transformation_config()
 
         except Exception as e:
             logging.error(f"Data validation Configuration initialization error: {e}", exc_info=True)
             raise AppException(e, sys)
-        
 
+
+    def collapse_editions(self, df, n_titles):
+        """
+        Merges the near-duplicate editions of every work (MinHash/LSH on the title, verified on title and
+        author) under the title id and title of its most rated edition. The title id -> work title id merge
+        map is saved next to the id dictionaries.
+
+        Args:
+            df (pd.DataFrame): Ratings merged with the books data.
+            n_titles (int): Size of the title id dictionary.
+
+        Returns:
+            tuple: (ratings with the merged title ids and titles, work title by merged edition title)
+        """
+        config = self.data_transformation_config
+        rated = df[df["title_id"] >= 0]
+        items = rated.drop_duplicates("title_id").set_index("title_id")["Title"]
+        authors = (rated.groupby(["title_id", "Author"]).size().sort_values(ascending=False).reset_index()
+                        .drop_duplicates("title_id").set_index("title_id")["Author"].reindex(items.index))
+        weights = rated["title_id"].value_counts().reindex(items.index).to_numpy()
+
+        representatives = find_duplicate_editions(items.tolist(), authors.tolist(), weights,
+                                                  num_perm=config.minhash_permutations, bands=config.lsh_bands,
+                                                  title_similarity=config.title_similarity,
+                                                  author_similarity=config.author_similarity)
+        item_ids = items.index.to_numpy()
+        merge_map = np.arange(n_titles, dtype=np.int32)
+        merge_map[item_ids] = item_ids[representatives]
+
+        tmp_path = config.dictionary_dir / "title_merge_map.tmp.npy"
+        np.save(tmp_path, merge_map, allow_pickle=False)
+        tmp_path.replace(config.dictionary_dir / "title_merge_map.npy")
+
+        merged = representatives != np.arange(len(items))
+        edition_aliases = pd.Series(items.to_numpy()[representatives][merged], index=items.to_numpy()[merged])
+
+        title_ids = df["title_id"].to_numpy()
+        known = title_ids >= 0
+        title_ids = np.where(known, merge_map[np.where(known, title_ids, 0)], title_ids)
+        df = df.assign(title_id=title_ids)
+        df.loc[known, "Title"] = items.reindex(title_ids[known]).to_numpy()
+        logging.info(f"Editions collapsed: {len(items)} rated titles merged into {len(items) - merged.sum()} works")
+        return df, edition_aliases
+
+
+    @instrument("pipeline.data_transformation")
     def transform(self):
         """
         Transforms the data by cleaning book titles, filtering users and books based on rating count, 
@@ -29,13 +121,18 @@ class DataTransformation:
 
         The function performs the following operations:
         - Reads the books and ratings data from configured file paths.
-        - Cleans the book titles by removing escape characters and quotes.
-        - Merges the books and ratings data on ISBN.
+        - Cleans the book titles (escape characters, quotes, HTML entities) and merges the spelling variants
+          of a title under one canonical title key.
+        - Encodes ISBNs, users and canonical titles as dense integer ids with the persistent id dictionaries.
+        - Merges the books and ratings data on the ISBN ids.
+        - Collapses the near-duplicate editions of every work into its most rated edition.
         - Filters users who have rated at least 200 books.
         - Filters books that have received at least 50 ratings.
         - Creates a pivot table with book titles as rows and user IDs as columns, 
           with ratings as values.
         - Saves the transformed pivot table, book names, and final ratings as pickle files.
+        - Releases every intermediate as soon as it is consumed, so the stage peaks at the largest single step.
+        - Exports the memory-mappable serving artifacts used by the ML recommender.
 
         Raises:
             AppException: If any operation during data transformation or saving fails.
@@ -45,37 +142,69 @@ class DataTransformation:
             books = pd.read_csv(self.data_transformation_config.books_data_path, encoding="iso8859", on_bad_lines="skip")
             ratings = pd.read_csv(self.data_transformation_config.ratings_data_path, encoding="iso8859", on_bad_lines="skip")
 
-            books['Title'] = books["Title"].apply(html.unescape)
-            books['Title'] = books["Title"].str.replace(r"\\'", "'", regex=True)
-            books['Title'] = books["Title"].str.replace(r'\\"', '', regex=True)
-            books['Title'] = books["Title"].str.replace(r'"', "", regex=True)
-            books['Title'] = books["Title"].str.replace(r"\\", "", regex=True)
+            raw_titles = books["Title"].nunique()
+            books["Title"], books["title_key"] = normalize_titles(books["Title"])
+            logging.info(f"Titles normalized: {raw_titles} distinct titles merged into {books['title_key'].nunique()} canonical titles")
 
-            df = ratings.merge(books, on="ISBN")
+            # dictionary encode the join and group keys; ids are stable across runs
+            dictionary_dir = self.data_transformation_config.dictionary_dir
+            isbn_ids = IdDictionary(dictionary_dir, "isbn")
+            user_ids = IdDictionary(dictionary_dir, "user")
+            title_ids = IdDictionary(dictionary_dir, "title")
 
-            # Get users who have rated min 200 books
-            user_rating_df = df.groupby("user_id").count()
-            x = user_rating_df["rating"]>=200
-            good_users = x[x].index
+            books["isbn_id"] = isbn_ids.encode(books["ISBN"])
+            books["title_id"] = title_ids.encode(books["title_key"])
+            ratings["isbn_id"] = isbn_ids.encode(ratings["ISBN"], add=False)
+            ratings["user_idx"] = user_ids.encode(ratings["user_id"])
 
-            filtered_ratings = df[df["user_id"].isin(good_users)]
+            ratings = ratings[(ratings["isbn_id"] >= 0) & (ratings["user_idx"] >= 0)]
+            df = ratings.merge(books.drop(columns="ISBN"), on="isbn_id")
+            # every intermediate is released as soon as it is consumed, keeping the peak RSS of the stage low
+            del books, ratings
 
-            # Get books that has received a total of min 50 ratings
-            y = filtered_ratings.groupby("Title").count()["rating"]>=50
-            good_books = y[y].index
+            # collapse the editions of the same work before counting and pivoting
+            edition_aliases = None
+            if self.data_transformation_config.collapse_editions:
+                df, edition_aliases = self.collapse_editions(df, len(title_ids))
+
+            # Get users who have rated min 200 books
+            user_rating_count = np.bincount(df["user_idx"], minlength=len(user_ids))
+            filtered_ratings = df[user_rating_count[df["user_idx"]] >= 200]
+            filtered_ratings = filtered_ratings[filtered_ratings["title_id"] >= 0]
+            del df, user_rating_count
 
-            final_ratings = filtered_ratings[filtered_ratings["Title"].isin(good_books)]
+            # Get books that has received a total of min 50 ratings
+            book_rating_count = np.bincount(filtered_ratings["title_id"], minlength=len(title_ids))
+            final_ratings = filtered_ratings[book_rating_count[filtered_ratings["title_id"]] >= 50]
+            del filtered_ratings, book_rating_count
 
-            # create the pivot table
-            books_pt = final_ratings.pivot_table(index="Title", columns="user_id", values="rating")
+            # create the pivot table on the integer title ids, then label and order the rows by title
+            books_pt = final_ratings.pivot_table(index="title_id", columns="user_id", values="rating")
             books_pt.fillna(0, inplace=True)
+            titles = final_ratings.drop_duplicates("title_id").set_index("title_id")["Title"]
+            books_pt.index = pd.Index(titles.reindex(books_pt.index).to_numpy(), name="Title")
+            books_pt.sort_index(inplace=True)
             book_names = books_pt.index
+            del titles
+
+            for dictionary in (isbn_ids, user_ids, title_ids):
+                dictionary.save()
+            add_counts(rows=len(final_ratings), items=books_pt.shape[0], users=books_pt.shape[1],
+                       nnz=np.count_nonzero(books_pt.to_numpy()))
 
             try:
                 logging.info("Saving the transformed objects as pickle file")
-                pickle.dump(books_pt, open(self.data_transformation_config.serialized_obj_dir/"books_pivot_table.pkl", "wb"))
-                pickle.dump(final_ratings, open(self.data_transformation_config.serialized_obj_dir/"final_ratings.pkl", "wb"))
-                pickle.dump(book_names, open(self.data_transformation_config.common_obj_dir/"book_names.pkl", "wb"))
+                pickle.dump(books_pt, open(self.data_transformation_config.books_pivot_table_obj_path, "wb"))
+                pickle.dump(final_ratings, open(self.data_transformation_config.final_ratings_obj_path, "wb"))
+                pickle.dump(book_names, open(self.data_transformation_config.book_names_obj_path, "wb"))
+
+                # the ratings are spilled to the pickle above; the export only needs the first row of every title
+                catalogue = final_ratings.drop_duplicates("Title")[["Title", "image_url", "title_id"]]
+                del final_ratings
+
+                logging.info("Exporting the serving artifacts")
+                export_serving_artifacts(books_pt, catalogue, self.data_transformation_config.serving_dir,
+                                         edition_aliases, self.data_transformation_config.item_neighbours)
 
             except Exception as e:
                 logging.error(f"Failed to save the transformed objects: {e}", exc_info=True)
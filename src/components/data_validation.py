@@ -1,10 +1,30 @@
 import sys
+import json
+import shutil
+import numpy as np
 from pathlib import Path
+from multiprocessing import Pool
 import pandas as pd
 from src.core.logger import logging
 from src.core.exception import AppException
+from src.core.metrics import instrument, add_counts
 from src.utils import create_directories
-from src.core.configuration import AppConfiguration
+from src.core.configuration import get_app_configuration
+
+# Raw Book-Crossing columns renamed to the schema columns, and raw columns that are not kept
+BOOKS_COLUMN_MAP = {"Book-Title" : "Title",
+                    "Book-Author" : "Author",
+                    "Year-Of-Publication" : "Year",
+                    "Image-URL-L" : "image_url"}
+BOOKS_DROPPED_COLUMNS = ["Image-URL-S", "Image-URL-M"]
+RATINGS_COLUMN_MAP = {"User-ID" : "user_id",
+                      "Book-Rating" : "rating"}
+
+NUMERIC_DTYPES = ("int64", "float64")
+
+# Per-process state of the validation workers, filled once by `_init_worker`
+_worker_state = {}
+
 
 def get_validation(columns, schema):
     """
@@ -12,28 +32,136 @@ def get_validation(columns, schema):
     Args:
         columns (list): Columns to be validated.
         schema (dict): Schema used for the columns validation.
-        
+
+    Returns:
+        bool: True if every column is declared in the schema and every schema column is present, False otherwise.
+    """
+    return set(columns) == set(schema)
+
+
+def _init_worker(datasets, part_dir):
+    """
+    Stores the schemas of the validated datasets once per worker process.
+    """
+    _worker_state["datasets"] = datasets
+    _worker_state["part_dir"] = part_dir
+
+
+def _check_column(values, dtype, rules):
+    """
+    Checks one column of a chunk against its declared dtype and value range.
+    Returns:
+        tuple: (invalid dtype mask, out of range mask, column statistics)
+    """
+    nulls = values.isna()
+    invalid_dtype = pd.Series(False, index=values.index)
+    out_of_range = pd.Series(False, index=values.index)
+    stats = {"count": len(values), "nulls": int(nulls.sum())}
+
+    if dtype in NUMERIC_DTYPES:
+        numbers = pd.to_numeric(values, errors="coerce")
+        invalid_dtype = numbers.isna() & ~nulls
+        if dtype == "int64":
+            invalid_dtype |= numbers.notna() & (numbers % 1 != 0)
+        if "min" in rules:
+            out_of_range |= numbers < rules["min"]
+        if "max" in rules:
+            out_of_range |= numbers > rules["max"]
+
+        valid_numbers = numbers[~invalid_dtype & ~out_of_range].dropna()
+        stats.update({"min": float(valid_numbers.min()) if len(valid_numbers) else None,
+                      "max": float(valid_numbers.max()) if len(valid_numbers) else None,
+                      "sum": float(valid_numbers.sum()), "numeric_count": len(valid_numbers)})
+    else:
+        lengths = values.dropna().str.len()
+        stats.update({"max_length": int(lengths.max()) if len(lengths) else 0})
+
+    stats.update({"invalid_dtype": int(invalid_dtype.sum()), "out_of_range": int(out_of_range.sum())})
+    return invalid_dtype, out_of_range, stats
+
+
+def _validate_chunk(task):
+    """
+    Validates one chunk of a dataset. Valid rows and quarantined rows (with the failed checks) are written to
+    part files of the chunk, so only the statistics are sent back to the parent process.
+    Args:
+        task (tuple): (dataset name, part number, chunk DataFrame of raw string values)
+
     Returns:
-        bool: True if all columns are present in the schema, False otherwise.
+        tuple: (dataset name, part number, rows, quarantined rows, per-column statistics)
     """
-    for col in columns:
-        if col not in schema:
-            validation_status = False
-        else:
-            validation_status = True
+    name, part, chunk = task
+    schema, constraints = _worker_state["datasets"][name]
+    part_dir = Path(_worker_state["part_dir"])
+
+    bad = np.zeros(len(chunk), dtype=bool)
+    reasons = pd.Series("", index=chunk.index)
+    column_stats = {}
+    for column, dtype in schema.items():
+        invalid_dtype, out_of_range, column_stats[column] = _check_column(chunk[column], dtype, constraints.get(column, {}))
+        reasons = reasons.mask(invalid_dtype, reasons + f"{column}:dtype;")
+        reasons = reasons.mask(out_of_range, reasons + f"{column}:range;")
+        bad |= (invalid_dtype | out_of_range).to_numpy()
+
+    chunk[~bad].to_csv(part_dir / f"{name}-valid-{part:06d}.csv", index=False, header=False)
+    if bad.any():
+        chunk[bad].assign(failed_checks=reasons[bad]).to_csv(part_dir / f"{name}-quarantine-{part:06d}.csv",
+                                                             index=False, header=False)
 
-    return validation_status
+    return name, part, len(chunk), int(bad.sum()), column_stats
+
+
+def merge_column_stats(total, stats):
+    """
+    Aggregates the statistics of one chunk into the running per-column statistics.
+    """
+    for column, values in stats.items():
+        if column not in total:
+            total[column] = dict(values)
+            continue
+        merged = total[column]
+        for key, value in values.items():
+            if key == "min":
+                merged[key] = value if merged[key] is None else (merged[key] if value is None else min(merged[key], value))
+            elif key in ("max", "max_length"):
+                merged[key] = value if merged[key] is None else (merged[key] if value is None else max(merged[key], value))
+            else:
+                merged[key] += value
+    return total
+
+
+def finalize_column_stats(total):
+    """
+    Derives the null rates and means from the aggregated statistics.
+    """
+    for values in total.values():
+        values["null_rate"] = values["nulls"] / values["count"] if values["count"] else 0.0
+        if "sum" in values:
+            values["mean"] = values.pop("sum") / values["numeric_count"] if values["numeric_count"] else None
+    return total
+
+
+def _concat_parts(part_files, header, output_path):
+    """
+    Concatenates the headerless part files of a dataset behind a single header line.
+    """
+    with open(output_path, "w", encoding="utf-8", newline="") as out:
+        out.write(",".join(header) + "\n")
+        for part_file in part_files:
+            with open(part_file, encoding="utf-8", newline="") as f:
+                shutil.copyfileobj(f, out)
 
 
 class DataValidation:
-    def __init__(self, app_config = AppConfiguration()):
+    def __init__(self, app_config = None):
         """
         Initializes the DataValidation object.
         Args:
-            app_config (AppConfiguration): The configuration object containing the configuration 
+            app_config (AppConfiguration): The configuration object containing the configuration
             for data validation.
         """
         try:
+            app_config = app_config or get_app_configuration()
             self.data_validation_config = app_config.data_validation_config()
 
         except Exception as e:
@@ -41,66 +169,141 @@ class DataValidation:
             raise AppException(e, sys)
 
 
+    def _read_chunks(self, csvfile, column_map, dropped_columns):
+        """
+        Streams a raw dataset in chunks of string values, with the columns renamed to the schema names.
+        """
+        reader = pd.read_csv(csvfile, sep=";", encoding="iso8859", on_bad_lines="skip", dtype=str,
+                             chunksize=self.data_validation_config.chunksize)
+        for chunk in reader:
+            yield chunk.drop(columns=dropped_columns, errors="ignore").rename(columns=column_map)
+
+
+    def _dataset_columns(self, csvfile, column_map, dropped_columns):
+        header = pd.read_csv(csvfile, sep=";", encoding="iso8859", nrows=0)
+        return list(header.drop(columns=dropped_columns, errors="ignore").rename(columns=column_map).columns)
+
+
+    @instrument("pipeline.data_validation")
     def validate_dataset(self):
         """
         Validates the ingested datasets.
 
-        This method reads the ingested datasets, processes and validates them 
-        according to the given schema. If the validation is successful, it writes 
-        the validation status to a status file and saves the validated datasets to a specific directory.
+        Column names are checked against the schema first. The datasets are then streamed in chunks to a
+        process pool which checks every row against the declared dtypes and value ranges. Rows failing a check
+        are quarantined into a side file, per-column statistics are aggregated and the null rates and the share
+        of quarantined rows are checked against their limits. On success the valid rows are written to the
+        valid data directory.
+
+        Returns:
+            dict: The validation report, also written as JSON next to the status file.
 
-        Returns: None
+        Raises:
+            AppException: If a dataset fails validation or the validation process fails
         """
         try:
-            logging.info("Reading ingested datasets")
-            books = pd.read_csv(self.data_validation_config.books_csvfile, sep=";", encoding="iso8859", on_bad_lines="skip")
-            ratings = pd.read_csv(self.data_validation_config.ratings_csvfile, sep=";", encoding="iso8859", on_bad_lines="skip")
-            
-            logging.info("Processing datasets for validation")
-            books.drop(['Image-URL-S', 'Image-URL-M'], axis=1, inplace=True)
-            books.rename(columns = {"Book-Title" : "Title",
-                                    "Book-Author" : "Author",
-                                    "Year-Of-Publication" : "Year",
-                                    "Image-URL-L" : "image_url"}, inplace=True)
-            
-            ratings.rename(columns = {"User-ID" : "user_id",
-                                      "Book-Rating" : "rating"}, inplace=True)
-
-            books_cols = list(books.columns)
-            ratings_cols = list(ratings.columns)
-            book_schema = self.data_validation_config.book_schema.keys()
-            ratings_schema = self.data_validation_config.ratings_schema.keys()
-
-            book_validation_status = get_validation(books_cols, book_schema)
-            ratings_validation_status = get_validation(ratings_cols, ratings_schema)
-
-            try:
-                if book_validation_status & ratings_validation_status == True:
-                    with open(self.data_validation_config.STATUS_FILE, 'w') as f:
-                       f.write(f"Validation Status: True")
-
-                    logging.info("Datasets successsfully validated")
-                    create_directories([self.data_validation_config.valid_data_dir])
-                    valid_books_dataset = "valid_books_dataset.csv"
-                    valid_ratings_dataset = "valid_ratings_dataset.csv"
-
-                    books.to_csv(Path(self.data_validation_config.valid_data_dir/valid_books_dataset), index=False)
-                    ratings.to_csv(Path(self.data_validation_config.valid_data_dir/valid_ratings_dataset), index=False)
-                    logging.info(f"Validated dataset saved at {self.data_validation_config.valid_data_dir}")
-
-            except Exception as e:
-                if book_validation_status == False:
-                    logging.error(f"Books dataset validation failed: {e}")
-                    raise AppException(e, sys)
-                else:
-                    logging.error(f"Ratings dataset validation failed: {e}")
-                    raise AppException(e, sys)
-            
+            config = self.data_validation_config
+            datasets = {
+                "books": (config.books_csvfile, BOOKS_COLUMN_MAP, BOOKS_DROPPED_COLUMNS,
+                          dict(config.book_schema), {k: dict(v) for k, v in config.book_constraints.items()}),
+                "ratings": (config.ratings_csvfile, RATINGS_COLUMN_MAP, [],
+                            dict(config.ratings_schema), {k: dict(v) for k, v in config.ratings_constraints.items()}),
+            }
+
+            report = {"status": True, "datasets": {}}
+            columns = {}
+            for name, (csvfile, column_map, dropped, schema, _) in datasets.items():
+                columns[name] = self._dataset_columns(csvfile, column_map, dropped)
+                if not get_validation(columns[name], schema):
+                    report["status"] = False
+                    report["datasets"][name] = {"errors": [f"missing columns: {sorted(set(schema) - set(columns[name]))}",
+                                                           f"unexpected columns: {sorted(set(columns[name]) - set(schema))}"]}
+
+            if report["status"]:
+                report = self._validate_rows(datasets, columns)
+
+            with open(config.report_file_path, "w") as f:
+                json.dump(report, f, indent=2)
+            with open(config.STATUS_FILE, 'w') as f:
+                f.write(f"Validation Status: {report['status']}")
+
+            if not report["status"]:
+                errors = {name: result["errors"] for name, result in report["datasets"].items() if result["errors"]}
+                raise ValueError(f"Dataset validation failed: {errors}")
+
+            logging.info("Datasets successsfully validated")
+            return report
+
         except Exception as e:
             logging.error(f"Dataset validation process failed: {e}")
             raise AppException(e, sys)
 
 
+    def _validate_rows(self, datasets, columns):
+        """
+        Runs the chunked row validation of all datasets on a process pool and assembles the report.
+        """
+        config = self.data_validation_config
+        create_directories([config.valid_data_dir, config.quarantine_dir])
+        part_dir = Path(config.quarantine_dir, "parts")
+        if part_dir.exists():
+            shutil.rmtree(part_dir)
+        part_dir.mkdir(parents=True)
+
+        def tasks():
+            for name, (csvfile, column_map, dropped, _, _) in datasets.items():
+                for part, chunk in enumerate(self._read_chunks(csvfile, column_map, dropped)):
+                    yield name, part, chunk
+
+        results = {name: {"rows": 0, "quarantined_rows": 0, "columns": {}, "parts": 0} for name in datasets}
+        initargs = ({name: (schema, constraints) for name, (_, _, _, schema, constraints) in datasets.items()}, str(part_dir))
+
+        logging.info(f"Validating datasets in chunks of {config.chunksize} rows with {config.n_workers} workers")
+        with Pool(processes = config.n_workers, initializer = _init_worker, initargs = initargs) as pool:
+            for name, part, rows, quarantined, stats in pool.imap_unordered(_validate_chunk, tasks()):
+                result = results[name]
+                result["rows"] += rows
+                result["quarantined_rows"] += quarantined
+                result["parts"] = max(result["parts"], part + 1)
+                merge_column_stats(result["columns"], stats)
+
+        report = {"status": True, "datasets": {}}
+        for name, result in results.items():
+            constraints = datasets[name][4]
+            finalize_column_stats(result["columns"])
+            parts = range(result.pop("parts"))
+
+            errors = []
+            for column, stats in result["columns"].items():
+                max_null_rate = constraints.get(column, {}).get("max_null_rate")
+                if max_null_rate is not None and stats["null_rate"] > max_null_rate:
+                    errors.append(f"{column} null rate {stats['null_rate']:.4f} exceeds {max_null_rate}")
+
+            result["quarantine_rate"] = result["quarantined_rows"] / result["rows"] if result["rows"] else 0.0
+            if result["quarantine_rate"] > config.max_invalid_rate:
+                errors.append(f"quarantined rows rate {result['quarantine_rate']:.4f} exceeds {config.max_invalid_rate}")
+            result["errors"] = errors
+            report["status"] &= not errors
+
+            _concat_parts([part_dir / f"{name}-valid-{part:06d}.csv" for part in parts], columns[name],
+                          Path(config.valid_data_dir, f"valid_{name}_dataset.csv"))
+
+            quarantine_parts = [part_dir / f"{name}-quarantine-{part:06d}.csv" for part in parts]
+            quarantine_parts = [path for path in quarantine_parts if path.exists()]
+            if quarantine_parts:
+                result["quarantine_file"] = str(Path(config.quarantine_dir, f"{name}_quarantine.csv"))
+                _concat_parts(quarantine_parts, columns[name] + ["failed_checks"], result["quarantine_file"])
+                logging.warning(f"{result['quarantined_rows']} invalid {name} rows quarantined at {result['quarantine_file']}")
+
+            report["datasets"][name] = result
+
+        shutil.rmtree(part_dir)
+        add_counts(books_rows=results["books"]["rows"], ratings_rows=results["ratings"]["rows"],
+                   quarantined_rows=sum(result["quarantined_rows"] for result in results.values()))
+        logging.info(f"Validated dataset saved at {config.valid_data_dir}")
+        return report
+
+
     def initiate_data_vatidation(self):
         """
         This function starts the data validation process
@@ -113,7 +316,7 @@ class DataValidation:
             self.validate_dataset()
 
             logging.info(f"{'='*20}Data Validation Completed Successfully{'='*20} \n\n")
-        
+
         except Exception as e:
             logging.error(f"Dataset Validation error: {e}")
-            raise AppException(e, sys)
\ No newline at end of file
+            raise AppException(e, sys)
@@ -0,0 +1,159 @@
+# Near-duplicate edition detection for the collaborative-filtering matrix.
+# Editions, reprints and bracketed edition notes of the same work ("Emma (Penguin Classics)", "Emma") carry different
+# titles, so their ratings end up on separate rows. Works are compared on the character trigrams of their title with
+# MinHash signatures; LSH banding only proposes pairs that share a band, and every proposed pair is verified with the
+# exact trigram Jaccard similarity of the titles, the word Jaccard similarity of the authors and equal numbers in the
+# titles (volumes and sequels of a series differ by a number only).
+import re
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from src.core.logger import logging
+from src.core.metrics import add_counts
+from src.components.title_index import normalize_title, trigram_codes
+
+# Bracketed edition notes, removed before comparing titles
+_EDITION_NOTE = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+# Buckets larger than this are skipped, they hold generic titles rather than editions of one work
+MAX_BUCKET_SIZE = 50
+# Items signed at a time, bounding the (permutations x trigrams) gather
+SIGNATURE_BLOCK = 4096
+# Candidates whose MinHash similarity estimate is this far below the title threshold are dropped before verification
+ESTIMATE_SLACK = 0.2
+
+
+def work_title(title):
+    """
+    Normalized title of the work, without bracketed edition notes.
+    """
+    return normalize_title(_EDITION_NOTE.sub(" ", str(title))) or normalize_title(title)
+
+
+def jaccard(a, b):
+    """
+    Jaccard similarity of two sets; 0 when both are empty.
+    """
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+def minhash_signatures(shingles, num_perm, seed = 1):
+    """
+    MinHash signatures of shingle sets, one random permutation of the shingle vocabulary per hash.
+    Args:
+        shingles (list): Non empty int64 shingle code arrays, one per item.
+        num_perm (int): Signature length.
+        seed (int, optional): Random seed of the permutations. Defaults to 1.
+
+    Returns:
+        np.ndarray: int32 signatures of shape (len(shingles), num_perm).
+    """
+    lengths = np.array([len(s) for s in shingles], dtype=np.int64)
+    vocabulary, flat = np.unique(np.concatenate(shingles), return_inverse=True)
+    rng = np.random.default_rng(seed)
+    permutations = np.stack([rng.permutation(len(vocabulary)).astype(np.int32) for _ in range(num_perm)])
+
+    offsets = np.zeros(len(shingles) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    signatures = np.empty((len(shingles), num_perm), dtype=np.int32)
+    for start in range(0, len(shingles), SIGNATURE_BLOCK):
+        end = min(start + SIGNATURE_BLOCK, len(shingles))
+        block = permutations[:, flat[offsets[start]:offsets[end]]]
+        signatures[start:end] = np.minimum.reduceat(block, offsets[start:end] - offsets[start], axis=1).T
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands):
+    """
+    Pairs of items whose signatures agree on at least one band.
+    Returns:
+        np.ndarray: (i, j) pairs with i < j, shape (n_pairs, 2).
+    """
+    n_items, num_perm = signatures.shape
+    rows = num_perm // bands
+    multipliers = np.random.default_rng(0).integers(1, 2**63, rows, dtype=np.uint64) | np.uint64(1)
+    pairs = []
+    for band in range(bands):
+        # one 64 bit hash per band; colliding bands only add candidates, which are verified anyway
+        keys = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) @ multipliers
+        _, buckets, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+        order = np.argsort(buckets, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(sizes)])
+        # all pairs of the buckets of one size at once
+        for size in np.unique(sizes[(sizes >= 2) & (sizes <= MAX_BUCKET_SIZE)]):
+            members = order[starts[np.flatnonzero(sizes == size)][:, None] + np.arange(size)]
+            i, j = np.triu_indices(size, k=1)
+            pairs.append(np.minimum(members[:, i], members[:, j]).ravel() * n_items
+                         + np.maximum(members[:, i], members[:, j]).ravel())
+
+    pairs = np.unique(np.concatenate(pairs)) if pairs else np.empty(0, dtype=np.int64)
+    return np.stack(np.divmod(pairs, n_items), axis=1)
+
+
+def find_duplicate_editions(titles, authors, weights, num_perm = 64, bands = 16,
+                            title_similarity = 0.8, author_similarity = 0.5):
+    """
+    Groups the editions of the same work.
+    Args:
+        titles (list): Title of every item.
+        authors (list): Author of every item.
+        weights (np.ndarray): Rating count of every item; the most rated edition represents its work.
+        num_perm (int, optional): MinHash signature length. Defaults to 64.
+        bands (int, optional): LSH bands, dividing `num_perm`. Defaults to 16.
+        title_similarity (float, optional): Minimum trigram Jaccard similarity of two edition titles. Defaults to 0.8.
+        author_similarity (float, optional): Minimum word Jaccard similarity of their authors. Defaults to 0.5.
+
+    Returns:
+        np.ndarray: Position of the representative edition of every item (itself when not merged).
+    """
+    n_items = len(titles)
+    representatives = np.arange(n_items)
+    works = [work_title(title) for title in titles]
+    items = np.array([i for i, work in enumerate(works) if work], dtype=np.int64)
+    if len(items) < 2:
+        return representatives
+
+    shingles = [trigram_codes(works[i]) for i in items]
+    signatures = minhash_signatures(shingles, num_perm)
+    candidates = lsh_candidate_pairs(signatures, bands)
+    n_candidates = len(candidates)
+
+    # the fraction of equal signature values estimates the title similarity, cheap to check for all candidates
+    estimates = (signatures[candidates[:, 0]] == signatures[candidates[:, 1]]).mean(axis=1)
+    candidates = items[candidates[estimates >= title_similarity - ESTIMATE_SLACK]]
+
+    # verify the candidates exactly
+    trigram_sets, author_sets = {}, {}
+    def trigrams(i):
+        if i not in trigram_sets:
+            trigram_sets[i] = set(trigram_codes(works[i]).tolist())
+        return trigram_sets[i]
+    def author_words(i):
+        if i not in author_sets:
+            author_sets[i] = set(normalize_title(authors[i]).split()) if isinstance(authors[i], str) else set()
+        return author_sets[i]
+
+    numbers = lambda i: [word for word in works[i].split() if word.isdigit()]
+    verified = [(i, j) for i, j in candidates.tolist()
+                if numbers(i) == numbers(j)
+                and jaccard(author_words(i), author_words(j)) >= author_similarity
+                and jaccard(trigrams(i), trigrams(j)) >= title_similarity]
+
+    # works are the connected components of the verified pairs
+    verified = np.array(verified, dtype=np.int64).reshape(-1, 2)
+    graph = coo_matrix((np.ones(len(verified)), (verified[:, 0], verified[:, 1])), shape=(n_items, n_items))
+    _, components = connected_components(graph, directed=False)
+
+    # most rated edition of every work, ties to the first item
+    order = np.lexsort((np.arange(n_items), -np.asarray(weights), components))
+    first = np.ones(n_items, dtype=bool)
+    first[1:] = components[order][1:] != components[order][:-1]
+    best = np.empty(components.max() + 1, dtype=np.int64)
+    best[components[order][first]] = order[first]
+    representatives = best[components]
+
+    merged = int((representatives != np.arange(n_items)).sum())
+    add_counts(edition_candidates=n_candidates, editions_merged=merged)
+    logging.info(f"Edition collapsing: {n_candidates} candidate pairs, {len(candidates)} likely, {len(verified)} verified, "
+                 f"{merged} editions merged")
+    return representatives
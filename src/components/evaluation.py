@@ -0,0 +1,272 @@
+# Offline evaluation of the user recommendation engines.
+# A random fraction of the explicit ratings of every user in `final_ratings` is held out, every engine builds its item
+# neighbour table from the remaining ratings, and the held-out books are compared with the top-k books the engine
+# recommends. Users are scored in blocks with the serving code (`rank_unrated`), and the blocks are spread over worker
+# processes; the metrics are computed on the whole block at once. Each engine is reported with its quality (recall,
+# precision, NDCG, catalogue coverage), its single-user latency and the size of its neighbour table.
+import sys
+import json
+import time
+import pickle
+import numpy as np
+from pathlib import Path
+from multiprocessing import Pool
+from scipy.sparse import csr_matrix
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.components.serving_artifacts import item_neighbour_table, popularity_keys, rank_unrated, NEIGHBOUR_BLOCK
+
+# Users timed one at a time for the latency columns
+LATENCY_SAMPLES = 100
+
+# Per-process state of the evaluation workers, filled once by `_init_worker`
+_worker_state = {}
+
+
+def holdout_split(final_ratings, holdout_fraction = 0.2, min_user_ratings = 5, seed = 42):
+    """
+    Splits the explicit ratings of `final_ratings` into train and test users x books matrices.
+    Args:
+        final_ratings (pd.DataFrame): Ratings merged with books metadata (user_id, title_id, rating).
+        holdout_fraction (float, optional): Fraction of the ratings of every user held out. Defaults to 0.2.
+        min_user_ratings (int, optional): Users with fewer ratings are only used for training. Defaults to 5.
+        seed (int, optional): Random seed of the split. Defaults to 42.
+
+    Returns:
+        tuple: (train, test) float32 csr matrices of shape (users, books); test rows of users that are not
+            evaluated are empty. Ratings of a user for several editions of a title are averaged, as in the pivot table.
+    """
+    ratings = final_ratings[final_ratings["rating"] > 0]
+    users, user_codes = np.unique(ratings["user_id"].to_numpy(), return_inverse=True)
+    items, item_codes = np.unique(ratings["title_id"].to_numpy(), return_inverse=True)
+
+    pairs, pair_codes = np.unique(user_codes.astype(np.int64) * len(items) + item_codes, return_inverse=True)
+    values = (np.bincount(pair_codes, weights=ratings["rating"].to_numpy(dtype=np.float64))
+              / np.bincount(pair_codes)).astype(np.float32)
+    pair_users, pair_items = np.divmod(pairs, len(items))
+
+    # hold out the first ceil(fraction * n) ratings of every user in a random order
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(pairs)), pair_users))
+    counts = np.bincount(pair_users, minlength=len(users))
+    n_holdout = np.where(counts >= min_user_ratings, np.ceil(counts * holdout_fraction), 0).astype(np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    position = np.empty(len(pairs), dtype=np.int64)
+    position[order] = np.arange(len(pairs)) - starts[pair_users[order]]
+    held_out = position < n_holdout[pair_users]
+
+    shape = (len(users), len(items))
+    split = lambda mask: csr_matrix((values[mask], (pair_users[mask], pair_items[mask])), shape=shape)
+    return split(~held_out), split(held_out)
+
+
+def euclidean_neighbour_table(matrix, n_neighbours):
+    """
+    Item neighbour table of the euclidean nearest books, the metric of the trained NearestNeighbors model.
+    Returns:
+        csr_matrix: float32 books x books matrix with weights 1 / (1 + distance), the book itself excluded.
+    """
+    n_items = matrix.shape[0]
+    n_neighbours = min(n_neighbours, n_items - 1)
+    sq_norms = np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float64).ravel()
+
+    indices, data = [], []
+    for start in range(0, n_items if n_neighbours > 0 else 0, NEIGHBOUR_BLOCK):
+        stop = min(start + NEIGHBOUR_BLOCK, n_items)
+        sq_dist = sq_norms[None, :] - 2 * (matrix[start:stop] @ matrix.T).toarray() + sq_norms[start:stop, None]
+        np.maximum(sq_dist, 0, out=sq_dist)
+        sq_dist[np.arange(stop - start), np.arange(start, stop)] = np.inf
+
+        top = np.argpartition(sq_dist, n_neighbours - 1, axis=1)[:, :n_neighbours]
+        indices.append(top)
+        data.append(1 / (1 + np.sqrt(np.take_along_axis(sq_dist, top, axis=1))))
+
+    indptr = np.arange(n_items + 1, dtype=np.int64) * max(n_neighbours, 0)
+    indices = np.concatenate(indices).ravel().astype(np.int32) if indices else np.empty(0, dtype=np.int32)
+    data = np.concatenate(data).ravel().astype(np.float32) if data else np.empty(0, dtype=np.float32)
+    table = csr_matrix((data, indices, indptr), shape=(n_items, n_items))
+    table.sort_indices()
+    return table
+
+
+def build_engine(spec, items):
+    """
+    Builds the item neighbour table of an engine.
+    Args:
+        spec (str): "popularity", "cosine:<neighbours>" or "euclidean:<neighbours>".
+        items (csr_matrix): Books x users training ratings.
+
+    Returns:
+        csr_matrix: The item neighbour table; empty for the popularity engine.
+    """
+    name, _, n_neighbours = spec.partition(":")
+    if name == "popularity":
+        return csr_matrix((items.shape[0], items.shape[0]), dtype=np.float32)
+    if name == "cosine":
+        return item_neighbour_table(items, int(n_neighbours))
+    if name == "euclidean":
+        return euclidean_neighbour_table(items, int(n_neighbours))
+    raise ValueError(f"Unknown evaluation engine: {spec}")
+
+
+def _init_worker(train, test, neighbours, fallback_keys, k):
+    """
+    Receives the split and the engine once per worker process.
+    """
+    _worker_state.update(train=train, test=test, neighbours=neighbours, fallback_keys=fallback_keys, k=k)
+
+
+def _evaluate_chunk(users):
+    """
+    Scores a block of evaluated users and sums their metrics.
+    Args:
+        users (np.ndarray): User rows of the split.
+
+    Returns:
+        dict: Metric sums of the block, the recommended books and the scoring time.
+    """
+    train, test, k = _worker_state["train"], _worker_state["test"], _worker_state["k"]
+    start = time.perf_counter()
+    _, top = rank_unrated(train[users], _worker_state["neighbours"], _worker_state["fallback_keys"], k)
+    elapsed = time.perf_counter() - start
+
+    relevant = test[users].toarray() > 0
+    hits = np.take_along_axis(relevant, top, axis=1)
+    n_relevant = relevant.sum(axis=1)
+    discounts = 1 / np.log2(np.arange(k) + 2)
+    ideal = np.cumsum(discounts)[np.minimum(n_relevant, k) - 1]
+
+    return {"users": len(users),
+            "recall": float((hits.sum(axis=1) / n_relevant).sum()),
+            "precision": float((hits.sum(axis=1) / k).sum()),
+            "ndcg": float(((hits * discounts).sum(axis=1) / ideal).sum()),
+            "recommended": np.unique(top),
+            "scoring_s": elapsed}
+
+
+class RecommenderEvaluator:
+    def __init__(self, app_config = None):
+        """
+        Initializes the RecommenderEvaluator object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the evaluation settings.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.evaluation_config = app_config.evaluation_config()
+
+        except Exception as e:
+            logging.error(f"Recommender Evaluator configuration initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def _single_user_latency(self, train, users, neighbours, fallback_keys, k):
+        """
+        Latency percentiles of scoring one user at a time, as the app does per request; None without users.
+        """
+        if len(users) == 0:
+            return {"p50_ms": None, "p95_ms": None}
+        latencies = []
+        for user in users[:LATENCY_SAMPLES]:
+            start = time.perf_counter()
+            rank_unrated(train[[user]], neighbours, fallback_keys, k)
+            latencies.append(time.perf_counter() - start)
+        latencies_ms = np.asarray(latencies) * 1000
+        return {"p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+                "p95_ms": round(float(np.percentile(latencies_ms, 95)), 4)}
+
+
+    def evaluate(self, engines = None, k = None, n_workers = None):
+        """
+        Evaluates the user recommendation engines on a held-out split of `final_ratings`.
+        Args:
+            engines (list, optional): Engine specs (see `build_engine`). Defaults to the configured engines.
+            k (int, optional): Recommendations per user. Defaults to the configured value.
+            n_workers (int, optional): Number of worker processes. Defaults to the configured value.
+
+        Returns:
+            dict: The split sizes and, per engine, recall@k, precision@k, NDCG@k, catalogue coverage, build time,
+                single-user latency and neighbour table size. Also saved as the configured report file.
+
+        Raises:
+            AppException: If loading the ratings or evaluating an engine fails
+        """
+        try:
+            engines = engines or list(self.evaluation_config.engines)
+            k = k or self.evaluation_config.k
+            n_workers = n_workers or self.evaluation_config.n_workers
+            batch_size = self.evaluation_config.batch_size
+
+            logging.info("Loading final ratings for the offline evaluation")
+            final_ratings = pickle.load(open(self.evaluation_config.final_ratings_obj_path, "rb"))
+            train, test = holdout_split(final_ratings, self.evaluation_config.holdout_fraction,
+                                        self.evaluation_config.min_user_ratings, self.evaluation_config.seed)
+            del final_ratings
+
+            items = train.T.tocsr()
+            fallback_keys = popularity_keys(np.diff(items.indptr))
+            k = min(k, train.shape[1])
+            users = np.flatnonzero(np.diff(test.indptr) > 0)
+            chunks = [users[start:start + batch_size] for start in range(0, len(users), batch_size)]
+            report = {"k": k, "users": int(len(users)), "books": int(train.shape[1]),
+                      "train_ratings": int(train.nnz), "test_ratings": int(test.nnz), "engines": {}}
+
+            for spec in engines:
+                logging.info(f"Evaluating the {spec} engine on {len(users)} users with {n_workers} workers")
+                start = time.perf_counter()
+                neighbours = build_engine(spec, items)
+                build_s = time.perf_counter() - start
+
+                initargs = (train, test, neighbours, fallback_keys, k)
+                start = time.perf_counter()
+                if n_workers > 1:
+                    with Pool(processes = n_workers, initializer = _init_worker, initargs = initargs) as pool:
+                        results = pool.map(_evaluate_chunk, chunks)
+                else:
+                    _init_worker(*initargs)
+                    results = [_evaluate_chunk(chunk) for chunk in chunks]
+                wall_s = time.perf_counter() - start
+
+                n_users = max(sum(result["users"] for result in results), 1)
+                recommended = np.unique(np.concatenate([result["recommended"] for result in results])) if results else []
+                report["engines"][spec] = {
+                    f"recall_at_{k}": round(sum(result["recall"] for result in results) / n_users, 4),
+                    f"precision_at_{k}": round(sum(result["precision"] for result in results) / n_users, 4),
+                    f"ndcg_at_{k}": round(sum(result["ndcg"] for result in results) / n_users, 4),
+                    "coverage": round(len(recommended) / max(train.shape[1], 1), 4),
+                    "build_s": round(build_s, 4),
+                    "batch_ms_per_user": round(sum(result["scoring_s"] for result in results) * 1000 / n_users, 4),
+                    "user_latency": self._single_user_latency(train, users, neighbours, fallback_keys, k),
+                    "table_mb": round((neighbours.data.nbytes + neighbours.indices.nbytes
+                                       + neighbours.indptr.nbytes) / 2**20, 4),
+                    "wall_s": round(wall_s, 4),
+                }
+
+            report_path = Path(self.evaluation_config.report_path)
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent = 2)
+            logging.info(f"Evaluation report saved at {report_path}")
+            return report
+
+        except Exception as e:
+            logging.error(f"Offline evaluation failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+def format_report(report):
+    """
+    Formats an evaluation report as a quality / latency / memory table, one row per engine.
+    """
+    k = report["k"]
+    latency = lambda value: f"{value:>8.3f}" if value is not None else f"{'-':>8}"
+    header = (f"{'engine':<16} {'recall@' + str(k):>10} {'prec@' + str(k):>10} {'ndcg@' + str(k):>10} {'coverage':>9} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'batch ms/user':>14} {'build s':>8} {'table MB':>9}")
+    lines = [f"{report['users']} users, {report['books']} books, {report['test_ratings']} held-out ratings", header,
+             "-" * len(header)]
+    for spec, row in report["engines"].items():
+        lines.append(f"{spec:<16} {row[f'recall_at_{k}']:>10.4f} {row[f'precision_at_{k}']:>10.4f} "
+                     f"{row[f'ndcg_at_{k}']:>10.4f} {row['coverage']:>9.4f} {latency(row['user_latency']['p50_ms'])} "
+                     f"{latency(row['user_latency']['p95_ms'])} {row['batch_ms_per_user']:>14.4f} "
+                     f"{row['build_s']:>8.3f} {row['table_mb']:>9.3f}")
+    return "\n".join(lines)
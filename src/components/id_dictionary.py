@@ -0,0 +1,95 @@
+# Persistent dictionary encoding of the string keys used by the pipeline (ISBNs, users, canonical titles).
+# Every distinct key gets a dense int32 id. Dictionaries are append-only and saved between runs, so a key keeps its
+# id across pipeline runs and joins, group-bys and lookups can work on integers instead of strings.
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.components.serving_artifacts import StringArray
+
+# Missing keys are encoded as -1
+MISSING_ID = -1
+
+
+class IdDictionary:
+    def __init__(self, dictionary_dir, name):
+        """
+        Loads the dictionary `name` from `dictionary_dir`, or starts an empty one.
+        Args:
+            dictionary_dir (Path): Directory holding the dictionaries.
+            name (str): Dictionary name, e.g. "isbn".
+        """
+        try:
+            self.name = name
+            self.data_path = Path(dictionary_dir, f"{name}_keys_data.npy")
+            self.offsets_path = Path(dictionary_dir, f"{name}_keys_offsets.npy")
+
+            keys = []
+            if self.offsets_path.exists():
+                keys = StringArray(np.load(self.data_path, allow_pickle=False),
+                                   np.load(self.offsets_path, allow_pickle=False)).tolist()
+            self.keys = pd.Index(keys, dtype=object)
+            self.loaded_size = len(self.keys)
+
+        except Exception as e:
+            logging.error(f"Failed to load the {name} id dictionary: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def __len__(self):
+        return len(self.keys)
+
+
+    def encode(self, values, add = True):
+        """
+        Maps keys to their ids, hashing every distinct key only once.
+        Args:
+            values (array-like): Keys to encode; non string keys are encoded by their string form.
+            add (bool, optional): If True, unknown keys get the next free ids. Otherwise they are
+                encoded as `MISSING_ID`. Defaults to True.
+
+        Returns:
+            np.ndarray: int32 ids aligned with `values`, `MISSING_ID` for missing keys.
+        """
+        codes, uniques = pd.factorize(pd.Series(values).to_numpy(dtype=object))
+        uniques = pd.Index(uniques, dtype=object).astype(str)
+        if not uniques.is_unique:
+            # keys such as 1 and "1" only collide once converted to strings
+            unique_codes, uniques = pd.factorize(uniques)
+            codes = np.where(codes >= 0, unique_codes[codes], codes)
+            uniques = pd.Index(uniques, dtype=object)
+        ids = self.keys.get_indexer(uniques)
+
+        unknown = ids < 0
+        if add and unknown.any():
+            if len(self.keys) + unknown.sum() > np.iinfo(np.int32).max:
+                raise OverflowError(f"The {self.name} id dictionary exceeds the int32 id space")
+            ids[unknown] = np.arange(len(self.keys), len(self.keys) + unknown.sum())
+            self.keys = self.keys.append(uniques[unknown])
+
+        ids = ids.astype(np.int32)
+        return np.where(codes >= 0, ids[codes], MISSING_ID).astype(np.int32)
+
+
+    def decode(self, ids):
+        """
+        Maps ids back to their keys.
+        """
+        return self.keys.to_numpy()[np.asarray(ids)]
+
+
+    def save(self):
+        """
+        Atomically writes the dictionary, skipping unchanged dictionaries.
+        """
+        if len(self.keys) == self.loaded_size and self.offsets_path.exists():
+            return
+        keys = StringArray.from_strings(self.keys)
+        for path, array in ((self.data_path, keys.data), (self.offsets_path, keys.offsets)):
+            tmp_path = path.with_suffix(".tmp.npy")
+            np.save(tmp_path, array, allow_pickle=False)
+            tmp_path.replace(path)
+        logging.info(f"{self.name} id dictionary saved with {len(self.keys)} keys ({len(self.keys) - self.loaded_size} new)")
+        self.loaded_size = len(self.keys)
@@ -0,0 +1,168 @@
+# BM25 keyword index over the titles and descriptions of the semantic books dataset.
+# Needs no embedding service, so the semantic recommender can answer from it when the embedding call misses its
+# deadline. The index is a sorted vocabulary plus CSR postings (document ids and term frequencies per term) stored as
+# flat arrays, memory-mapped at load time; a query only touches the postings of its own terms.
+import os
+import sys
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import add_counts
+from src.components.serving_artifacts import StringArray
+from src.components.title_index import normalize_title
+
+KEYWORD_DIR = "keyword"
+KEYWORD_MANIFEST = "manifest.json"
+# Title terms count as this many occurrences
+TITLE_WEIGHT = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+STOPWORDS = frozenset("""a about an and are as at be but by for from has have he her his i in into is it its of on or
+    she that the their them they this to was were which who will with you your""".split())
+
+
+def tokenize(text):
+    """
+    Lowercased, accent and punctuation free terms of a text, without stopwords.
+    """
+    if not isinstance(text, str):
+        return []
+    return [term for term in normalize_title(text).split() if term not in STOPWORDS]
+
+
+def build_keyword_index(out_dir, titles, descriptions, isbn13):
+    """
+    Builds and atomically writes the keyword index of a books dataset.
+    Args:
+        out_dir (Path): Vectorstore directory; the index is written to its `keyword` sub directory.
+        titles (list): Title of every book.
+        descriptions (list): Description of every book.
+        isbn13 (np.ndarray): ISBN of every book.
+
+    Returns:
+        dict: The written index manifest.
+    """
+    vocabulary = {}
+    term_ids, doc_ids = [], []
+    doc_lengths = np.zeros(len(isbn13), dtype=np.float32)
+    for doc, (title, description) in enumerate(zip(titles, descriptions)):
+        terms = tokenize(title) * TITLE_WEIGHT + tokenize(description)
+        doc_lengths[doc] = len(terms)
+        term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+        doc_ids.extend([doc] * len(terms))
+
+    # postings sorted by term (in vocabulary order), then document, with the term frequencies
+    terms = np.array(sorted(vocabulary), dtype=object)
+    rank = np.empty(len(vocabulary), dtype=np.int64)
+    rank[[vocabulary[term] for term in terms]] = np.arange(len(terms))
+    pairs = rank[np.asarray(term_ids, dtype=np.int64)] * len(isbn13) + np.asarray(doc_ids, dtype=np.int64)
+    pairs, frequencies = np.unique(pairs, return_counts=True)
+    posting_terms, postings = np.divmod(pairs, len(isbn13))
+
+    term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(posting_terms, minlength=len(terms)), out=term_offsets[1:])
+    vocabulary_array = StringArray.from_strings(terms)
+
+    index_dir = Path(out_dir, KEYWORD_DIR)
+    tmp_dir = index_dir.with_name(f"{KEYWORD_DIR}.tmp-{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    arrays = {"terms_data": vocabulary_array.data, "terms_offsets": vocabulary_array.offsets,
+              "term_offsets": term_offsets, "postings": postings.astype(np.int32),
+              "frequencies": frequencies.astype(np.float32), "doc_lengths": doc_lengths,
+              "isbn13": np.asarray(isbn13, dtype=np.int64)}
+    for name, array in arrays.items():
+        np.save(tmp_dir / f"{name}.npy", array, allow_pickle=False)
+
+    manifest = {"documents": int(len(isbn13)), "terms": int(len(terms)), "postings": int(len(postings)),
+                "average_length": float(doc_lengths.mean()) if len(doc_lengths) else 0.0}
+    with open(tmp_dir / KEYWORD_MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    if index_dir.exists():
+        shutil.rmtree(index_dir)
+    tmp_dir.rename(index_dir)
+    logging.info(f"Keyword index with {manifest['terms']} terms and {manifest['postings']} postings saved at {index_dir}")
+    return manifest
+
+
+class KeywordIndex:
+    def __init__(self, persist_dir):
+        """
+        Memory-maps the keyword index of a vectorstore directory.
+        Args:
+            persist_dir (Path): Vectorstore directory.
+        """
+        try:
+            index_dir = Path(persist_dir, KEYWORD_DIR)
+            with open(index_dir / KEYWORD_MANIFEST) as f:
+                self.manifest = json.load(f)
+
+            load = lambda name: np.load(index_dir / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+            self.terms = StringArray(load("terms_data"), load("terms_offsets"), is_sorted=True)
+            self.term_offsets = load("term_offsets")
+            self.postings = load("postings")
+            self.frequencies = load("frequencies")
+            self.doc_lengths = np.load(index_dir / "doc_lengths.npy", allow_pickle=False)
+            self.isbn13 = np.load(index_dir / "isbn13.npy", allow_pickle=False)
+            self.length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self.manifest["average_length"], 1e-9))
+
+        except Exception as e:
+            logging.error(f"Failed to open the keyword index at {persist_dir}: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @staticmethod
+    def exists(persist_dir):
+        return Path(persist_dir, KEYWORD_DIR, KEYWORD_MANIFEST).exists()
+
+
+    def search(self, query, k, mask = None):
+        """
+        BM25 top-k books of a free text query.
+        Args:
+            query (str): Query text.
+            k (int): Number of hits.
+            mask (np.ndarray, optional): Boolean mask of the books allowed in the results.
+
+        Returns:
+            list: (score, isbn13) hits, best first; books sharing no term with the query are never returned.
+        """
+        n_docs = len(self.isbn13)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            try:
+                term_id = self.terms.index(term)
+            except KeyError:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.postings[start:end]
+            frequencies = self.frequencies[start:end]
+            idf = np.log1p((n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * frequencies * (BM25_K1 + 1) / (frequencies + self.length_norm[docs])
+
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        add_counts(keyword_hits=len(order))
+        return [(float(scores[doc]), int(self.isbn13[doc])) for doc in order]
+
+
+def reciprocal_rank_fusion(rankings, k, constant = 60):
+    """
+    Fuses ranked ISBN lists by reciprocal rank: every list adds 1 / (constant + rank) to its books.
+    Returns:
+        list: The k best ISBNs, ties in first-seen order.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, isbn in enumerate(ranking):
+            scores[isbn] = scores.get(isbn, 0.0) + 1.0 / (constant + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)[:k]
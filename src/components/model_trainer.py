@@ -4,10 +4,11 @@ from scipy.sparse import csr_matrix
 from sklearn.neighbors import NearestNeighbors
 from src.core.logger import logging
 from src.core.exception import AppException
-from src.core.configuration import AppConfiguration
+from src.core.metrics import instrument, add_counts
+from src.core.configuration import get_app_configuration
 
 class ModelTrainer:
-    def __init__(self, app_config = AppConfiguration()):
+    def __init__(self, app_config = None):
         """
         Initializes the ModelTrainer object.
         Args:
@@ -15,6 +16,7 @@ class ModelTrainer:
             for model training.
         """
         try:
+            app_config = app_config or get_app_configuration()
             self.model_trainer_config = app_config.model_trainer_config()
 
         except Exception as e:
@@ -22,6 +24,7 @@ class ModelTrainer:
             raise AppException(e, sys)
 
 
+    @instrument("pipeline.model_training")
     def train(self):
         """
         Trains NearestNeighbors model using the pre-processed book pivot table.
@@ -38,6 +41,7 @@ class ModelTrainer:
             books_pivot_table = pickle.load(open(self.model_trainer_config.books_pivot_table_path, "rb"))
             # convert to csr matrix
             books_sparse = csr_matrix(books_pivot_table)
+            add_counts(rows=books_sparse.shape[0], columns=books_sparse.shape[1], nnz=books_sparse.nnz)
             
             # training model
             model = NearestNeighbors(algorithm = "brute")
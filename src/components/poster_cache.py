@@ -0,0 +1,294 @@
+import os
+import io
+import sys
+import json
+import time
+import pickle
+import hashlib
+import threading
+import requests
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import instrument, add_counts
+from src.constant.constants import DEFAULT_POSTER_URL
+from src.core.configuration import get_app_configuration
+from src.components.serving_artifacts import ServingArtifacts
+
+# Images smaller than this (in pixels per side) are placeholders served by the image host, not real covers
+MIN_IMAGE_SIDE = 10
+PLACEHOLDER_FILE = "placeholder.jpg"
+# Seconds between two checks of the index file for posters fetched by another process
+INDEX_CHECK_INTERVAL = 5.0
+# HTTP statuses of posters that are gone for good; other failures are retried by the next fetch
+DEAD_STATUSES = (404, 410)
+
+# Parsed index files shared by all PosterCache instances of the process, keyed by path
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def create_session(pool_size, retries = 2):
+    """
+    Creates a pooled HTTP session whose connection pool matches the download parallelism.
+    """
+    session = requests.Session()
+    retry = Retry(total = retries, backoff_factor = 0.3, status_forcelist = (500, 502, 503, 504), allowed_methods = ("GET",))
+    adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size, max_retries = retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PosterCache:
+    def __init__(self, app_config = None, session = None):
+        """
+        Initializes the PosterCache object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the poster cache settings.
+            session (requests.Session, optional): HTTP session used for downloads. Defaults to a pooled session.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.poster_cache_config = app_config.poster_cache_config()
+            self.objects_dir = Path(self.poster_cache_config.root_dir, "objects")
+            self.placeholder_path = Path(self.poster_cache_config.root_dir, PLACEHOLDER_FILE)
+            self.session = session
+            self._index = None
+            self._index_mtime = None
+            self._index_checked = 0.0
+
+        except Exception as e:
+            logging.error(f"Poster Cache configuration initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def load_index(self):
+        """
+        Loads the url -> cached object index, reusing the parsed index while the file is unchanged.
+        Returns:
+            dict: The index, empty when no posters were cached yet.
+        """
+        index_path = self.poster_cache_config.index_file_path
+        if not index_path.exists():
+            return {}
+
+        mtime = index_path.stat().st_mtime_ns
+        with _index_lock:
+            cached = _index_cache.get(index_path)
+            if cached is None or cached[0] != mtime:
+                with open(index_path, encoding="utf-8") as f:
+                    cached = (mtime, json.load(f))
+                _index_cache[index_path] = cached
+        return cached[1]
+
+
+    @property
+    def index(self):
+        """
+        The url -> cached object index, reloaded when the index file was rewritten since it was loaded, e.g. by
+        `fetch_posters.py` running next to a long-lived app process. The file is checked at most every
+        `INDEX_CHECK_INTERVAL` seconds.
+        """
+        now = time.monotonic()
+        if self._index is None or now - self._index_checked > INDEX_CHECK_INTERVAL:
+            index_path = self.poster_cache_config.index_file_path
+            mtime = index_path.stat().st_mtime_ns if index_path.exists() else None
+            self._index_checked = now
+            if self._index is None or mtime != self._index_mtime:
+                self._index, self._index_mtime = self.load_index(), mtime
+        return self._index
+
+
+    def save_index(self, index):
+        """
+        Atomically writes the index file and makes `index` the index of this instance.
+        """
+        index_path = self.poster_cache_config.index_file_path
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        tmp_path.replace(index_path)
+        self._index, self._index_mtime = index, index_path.stat().st_mtime_ns
+
+
+    def object_path(self, digest):
+        return Path(self.objects_dir, digest[:2], f"{digest}.jpg")
+
+
+    def catalogue_urls(self):
+        """
+        Collects the poster urls of the served catalogue: the ML recommender books and the semantic books.
+        Returns:
+            list: Unique poster urls.
+        """
+        urls = []
+        if ServingArtifacts.exists(self.poster_cache_config.serving_dir):
+            urls.extend(ServingArtifacts(self.poster_cache_config.serving_dir).poster_urls.tolist())
+
+        if os.path.exists(self.poster_cache_config.semantic_books_obj_path):
+            books_data = pickle.load(open(self.poster_cache_config.semantic_books_obj_path, "rb"))
+            urls.extend(books_data["thumbnail"].dropna().tolist())
+
+        return list(dict.fromkeys(url for url in urls if url and url != DEFAULT_POSTER_URL))
+
+
+    def _resize(self, content):
+        """
+        Decodes an image and shrinks it to the display size.
+        Returns:
+            bytes: The JPEG encoded thumbnail, or None if the image is a host placeholder.
+        """
+        from PIL import Image
+
+        with Image.open(io.BytesIO(content)) as image:
+            if min(image.size) < MIN_IMAGE_SIDE:
+                return None
+            image = image.convert("RGB")
+            image.thumbnail(self.poster_cache_config.display_size)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=85, optimize=True)
+            return buffer.getvalue()
+
+
+    def _fetch_one(self, session, url):
+        """
+        Downloads, resizes and stores one poster.
+        Returns:
+            tuple: (url, index entry) with the status "ok", "dead" for missing (404/410), placeholder or
+            undecodable images, or "error" for transient failures (network errors, timeouts, other statuses).
+        """
+        from PIL import Image, UnidentifiedImageError
+
+        entry = {"fetched_at": datetime.now(timezone.utc).isoformat()}
+        try:
+            response = session.get(url, timeout = self.poster_cache_config.timeout)
+            if response.status_code in DEAD_STATUSES:
+                return url, dict(entry, status="dead", error=f"HTTP {response.status_code}")
+            if response.status_code != 200:
+                return url, dict(entry, status="error", error=f"HTTP {response.status_code}")
+
+            thumbnail = self._resize(response.content)
+            if thumbnail is None:
+                return url, dict(entry, status="dead", error="placeholder image")
+
+            digest = hashlib.sha256(thumbnail).hexdigest()
+            path = self.object_path(digest)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(thumbnail)
+                tmp_path.replace(path)
+
+            return url, dict(entry, status="ok", sha256=digest)
+
+        except (UnidentifiedImageError, Image.DecompressionBombError, ValueError) as e:
+            return url, dict(entry, status="dead", error=str(e))
+
+        except (requests.RequestException, OSError) as e:
+            return url, dict(entry, status="error", error=str(e))
+
+
+    def ensure_placeholder(self):
+        """
+        Creates the local image shown for missing and dead posters.
+        """
+        if self.placeholder_path.exists():
+            return
+        from PIL import Image
+
+        Image.new("RGB", self.poster_cache_config.display_size, (220, 220, 220)).save(self.placeholder_path, format="JPEG")
+
+
+    @instrument("poster_cache.fetch")
+    def fetch(self, urls = None, refresh = False, max_workers = None):
+        """
+        Fetches the posters concurrently into the local content-addressed cache.
+
+        Downloads run on a bounded thread pool sharing one pooled HTTP session. Every poster is resized to
+        the display size and stored under the SHA-256 of its bytes; missing, placeholder or undecodable images
+        are marked as dead in the index. Posters that failed transiently are marked as errors and fetched again
+        by the next call.
+
+        Args:
+            urls (list, optional): Poster urls to fetch. Defaults to the served catalogue.
+            refresh (bool, optional): If True, also refetches cached and dead posters.
+            max_workers (int, optional): Download parallelism. Defaults to the configured value.
+
+        Returns:
+            dict: Number of cached, dead, failed and skipped posters.
+        """
+        urls = self.catalogue_urls() if urls is None else list(dict.fromkeys(urls))
+        index = self.index
+        pending = urls if refresh else [url for url in urls if index.get(url, {}).get("status", "error") == "error"]
+        max_workers = max_workers or self.poster_cache_config.max_workers
+
+        logging.info(f"Fetching {len(pending)} posters with {max_workers} workers ({len(urls) - len(pending)} already cached)")
+        self.ensure_placeholder()
+        session = self.session or create_session(max_workers)
+
+        summary = {"ok": 0, "dead": 0, "error": 0, "skipped": len(urls) - len(pending)}
+        # the loaded index is shared with other instances of the process, so update a private copy
+        index = dict(index)
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            futures = [executor.submit(self._fetch_one, session, url) for url in pending]
+            for future in as_completed(futures):
+                url, entry = future.result()
+                index[url] = entry
+                summary[entry["status"]] += 1
+
+        self.save_index(index)
+        add_counts(**summary)
+        logging.info(f"Poster caching finished: {summary}")
+        return summary
+
+
+    def resolve(self, url, index = None):
+        """
+        Maps a poster url to the image that should be rendered.
+        Args:
+            url (str): Poster url.
+            index (dict, optional): Index to resolve with. Defaults to the current index.
+
+        Returns:
+            str: The local cached file for cached posters, the local placeholder for missing or dead
+            posters, and the original url for posters that were never fetched or failed transiently.
+        """
+        index = self.index if index is None else index
+        entry = index.get(url) if isinstance(url, str) else None
+        if entry is not None and entry["status"] == "ok":
+            path = self.object_path(entry["sha256"])
+            if path.exists():
+                return str(path)
+
+        dead = entry is not None and entry["status"] != "error"
+        if dead or not isinstance(url, str) or url == DEFAULT_POSTER_URL:
+            return str(self.placeholder_path) if self.placeholder_path.exists() else DEFAULT_POSTER_URL
+
+        return url
+
+
+    def resolve_many(self, urls):
+        index = self.index
+        return [self.resolve(url, index) for url in urls]
+
+
+    def initiate_poster_caching(self):
+        """
+        Starts the poster caching process for the served catalogue.
+
+        Raises:
+            AppException: If the poster caching process fails
+        """
+        try:
+            logging.info(f"{'='*20}Poster Caching{'='*20}")
+            self.fetch()
+            logging.info(f"{'='*20}Poster Caching Completed Successfully{'='*20} \n\n")
+
+        except Exception as e:
+            logging.error(f"Poster caching failed: {e}", exc_info=True)
+            raise AppException(e, sys)
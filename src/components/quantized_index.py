@@ -0,0 +1,233 @@
+# Quantized exact vector search engine of the semantic recommender, an in-process alternative to Chroma.
+# The book embeddings are L2 normalized and stored as an int8 (per row scale) or float16 matrix that is memory-mapped,
+# next to a float32 copy that is only read for re-scoring. A query is a blocked matrix-vector product over the
+# quantized matrix and an argpartition shortlist, re-scored exactly in float32: no SQLite, HNSW graph or document
+# objects, and a latency that only depends on the catalogue size.
+import sys
+import json
+import time
+import numpy as np
+from pathlib import Path
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import add_counts
+
+QUANTIZED_DIR = "quantized"
+QUANTIZED_MANIFEST = "manifest.json"
+QUANTIZATIONS = ("int8", "float16")
+# Rows converted to float32 at a time by the quantized matrix-vector product; small blocks stay in the CPU cache
+BLOCK_ROWS = 256
+# Metadata columns kept for the filters, NaN when missing
+NUMERIC_COLUMNS = ("published_year", "num_pages", "average_rating")
+
+
+def normalize_rows(vectors):
+    """
+    L2 normalizes the rows of a matrix, leaving zero rows unchanged.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def quantize(vectors, quantization):
+    """
+    Quantizes normalized rows.
+    Returns:
+        tuple: (quantized matrix, per row float32 scales; None for float16)
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def write_quantized_index(out_dir, vectors, isbn13, categories, numeric, quantization = "int8"):
+    """
+    Writes the quantized engine files of a book embedding matrix.
+    Args:
+        out_dir (Path): Vectorstore directory; the engine is written to its `quantized` sub directory.
+        vectors (np.ndarray): Book embeddings, one row per book.
+        isbn13 (np.ndarray): ISBN of every book.
+        categories (pd.Series): Category of every book.
+        numeric (np.ndarray): published_year, num_pages and average_rating of every book, NaN when missing.
+        quantization (str, optional): "int8" or "float16". Defaults to "int8".
+
+    Returns:
+        dict: The written engine manifest.
+    """
+    out_dir = Path(out_dir, QUANTIZED_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    vectors = normalize_rows(vectors)
+    quantized, scales = quantize(vectors, quantization)
+    category_codes, category_names = categories.factorize()
+
+    np.save(out_dir / "vectors.npy", quantized, allow_pickle=False)
+    np.save(out_dir / "vectors_f32.npy", vectors, allow_pickle=False)
+    np.save(out_dir / "isbn13.npy", np.asarray(isbn13, dtype=np.int64), allow_pickle=False)
+    np.save(out_dir / "categories.npy", category_codes.astype(np.int32), allow_pickle=False)
+    np.save(out_dir / "numeric.npy", np.asarray(numeric, dtype=np.float32), allow_pickle=False)
+    if scales is not None:
+        np.save(out_dir / "scales.npy", scales, allow_pickle=False)
+
+    manifest = {"quantization": quantization, "rows": int(vectors.shape[0]), "dimensions": int(vectors.shape[1]),
+                "categories": [str(name) for name in category_names]}
+    with open(out_dir / QUANTIZED_MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class QuantizedVectorIndex:
+    def __init__(self, persist_dir, rescore_factor = 4):
+        """
+        Memory-maps the quantized engine of a vectorstore built by `SemanticIndexBuilder`.
+        Args:
+            persist_dir (Path): Vectorstore directory.
+            rescore_factor (int, optional): Shortlist size as a multiple of k, re-scored in float32. Defaults to 4.
+        """
+        try:
+            self.index_dir = Path(persist_dir, QUANTIZED_DIR)
+            with open(self.index_dir / QUANTIZED_MANIFEST) as f:
+                self.manifest = json.load(f)
+            self.rescore_factor = rescore_factor
+
+            load = lambda name: np.load(self.index_dir / name, mmap_mode="r", allow_pickle=False)
+            self.vectors = load("vectors.npy")
+            self.vectors_f32 = load("vectors_f32.npy")
+            self.scales = load("scales.npy") if self.manifest["quantization"] == "int8" else None
+            self.isbn13 = np.load(self.index_dir / "isbn13.npy", allow_pickle=False)
+            self.categories = np.load(self.index_dir / "categories.npy", allow_pickle=False)
+            self.numeric = np.load(self.index_dir / "numeric.npy", allow_pickle=False)
+            self.category_codes = {name: code for code, name in enumerate(self.manifest["categories"])}
+
+        except Exception as e:
+            logging.error(f"Failed to open the quantized index at {persist_dir}: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @staticmethod
+    def exists(persist_dir):
+        return Path(persist_dir, QUANTIZED_DIR, QUANTIZED_MANIFEST).exists()
+
+
+    def nbytes(self):
+        """
+        Bytes of the quantized matrix read by every query, and of the float32 matrix it replaces.
+        """
+        quantized = self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+        return {"quantized_bytes": int(quantized), "float32_bytes": int(self.vectors_f32.nbytes)}
+
+
+    def mask(self, filters):
+        """
+        Boolean mask of the books matching the filters, None when unfiltered.
+        """
+        if filters is None:
+            return None
+        mask = np.ones(len(self.isbn13), dtype=bool)
+        if filters.categories:
+            codes = [self.category_codes[name] for name in filters.categories if name in self.category_codes]
+            mask &= np.isin(self.categories, codes)
+        for field, (low, high) in filters.bounds().items():
+            values = self.numeric[:, NUMERIC_COLUMNS.index(field)]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        return mask
+
+
+    def approximate_scores(self, query):
+        """
+        Cosine similarities of all books to a normalized query, from the quantized matrix.
+        """
+        scores = np.empty(len(self.vectors), dtype=np.float32)
+        buffer = np.empty((BLOCK_ROWS, self.vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.vectors), BLOCK_ROWS):
+            block = buffer[:len(self.vectors[start:start + BLOCK_ROWS])]
+            block[...] = self.vectors[start:start + BLOCK_ROWS]
+            scores[start:start + len(block)] = block @ query
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+
+    def search(self, vector, k, filters = None):
+        """
+        Exact nearest books of a query embedding.
+        Args:
+            vector (list): Query embedding.
+            k (int): Number of hits.
+            filters (SearchFilters, optional): Only return books matching these filters.
+
+        Returns:
+            list: The k nearest (distance, isbn13, None) hits, nearest first. The distance is the squared L2
+                distance of the normalized vectors (2 - 2 * cosine similarity), the metric of the Chroma store.
+        """
+        query = normalize_rows(vector).ravel()
+        scores = self.approximate_scores(query)
+        mask = self.mask(filters)
+        if mask is not None:
+            scores[~mask] = -np.inf
+            n_candidates = int(mask.sum())
+        else:
+            n_candidates = len(scores)
+
+        shortlist_size = min(k * self.rescore_factor, n_candidates)
+        if shortlist_size == 0:
+            return []
+        shortlist = np.argpartition(-scores, shortlist_size - 1)[:shortlist_size]
+        shortlist.sort()
+        exact = self.vectors_f32[shortlist] @ query
+
+        order = np.argsort(-exact, kind="stable")[:k]
+        add_counts(rescored=shortlist_size)
+        return [(float(2 - 2 * exact[i]), int(self.isbn13[shortlist[i]]), None) for i in order]
+
+
+def accuracy_report(persist_dir, reference, n_queries = 200, k = 8, rescore_factor = 4, seed = 0):
+    """
+    Compares the quantized engine against a reference index (the Chroma store) on queries that are the
+    embeddings of randomly drawn books.
+    Args:
+        persist_dir (Path): Vectorstore directory holding both engines.
+        reference (PartitionedVectorIndex): Index the quantized results are compared to.
+        n_queries (int, optional): Number of queries. Defaults to 200.
+        k (int, optional): Hits per query. Defaults to 8.
+        rescore_factor (int, optional): Shortlist size of the quantized engine as a multiple of k. Defaults to 4.
+        seed (int, optional): Random seed of the query sample. Defaults to 0.
+
+    Returns:
+        dict: recall@k against the reference, latency percentiles of both engines and the matrix sizes.
+    """
+    index = QuantizedVectorIndex(persist_dir, rescore_factor = rescore_factor)
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index.isbn13), size = min(n_queries, len(index.isbn13)), replace = False)
+
+    recalls, latencies = [], {"quantized": [], "reference": []}
+    for row in rows:
+        vector = np.asarray(index.vectors_f32[row])
+        start = time.perf_counter()
+        hits = index.search(vector, k)
+        latencies["quantized"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        expected = reference.search(vector, k)
+        latencies["reference"].append(time.perf_counter() - start)
+
+        expected_isbns = {isbn for _, isbn, _ in expected}
+        recalls.append(len(expected_isbns & {isbn for _, isbn, _ in hits}) / max(len(expected_isbns), 1))
+
+    report = {"quantization": index.manifest["quantization"], "queries": len(rows), "k": k,
+              "rescore_factor": rescore_factor, f"recall_at_{k}": round(float(np.mean(recalls)), 4),
+              **index.nbytes()}
+    for engine, values in latencies.items():
+        values_ms = np.asarray(values) * 1000
+        report[f"{engine}_p50_ms"] = round(float(np.percentile(values_ms, 50)), 4)
+        report[f"{engine}_p99_ms"] = round(float(np.percentile(values_ms, 99)), 4)
+    return report
@@ -0,0 +1,266 @@
+# Result cache of the semantic recommender.
+# The whole semantic path (query embedding, similarity search, ISBN -> title/thumbnail resolution) is deterministic for
+# a given query and vectorstore state, so finished results are cached under (version, query, k). The version is a
+# fingerprint of the index build (its manifests), of the collections and write sequence recorded in the Chroma database
+# and of the books data file: rebuilding the index changes it and invalidates older entries, while opening or querying
+# the store does not.
+# Entries live in a small in-process LRU in front of a SQLite database that all worker processes of the host share.
+# Cache hits only queue their access time, which is written in batches; the database is pruned to `max_entries` once
+# the inserts counted since the last prune could exceed it.
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.components.vector_index import PARTITION_MANIFEST
+from src.components.keyword_index import KEYWORD_DIR, KEYWORD_MANIFEST
+
+# Seconds between two checks of the vectorstore manifests for a rebuild
+VERSION_CHECK_INTERVAL = 5.0
+# Chroma database of a vectorstore directory
+CHROMA_DB = "chroma.sqlite3"
+# Access times of cache hits queued before they are written to the database
+ACCESS_BATCH = 256
+# Fraction of `max_entries` kept when the database is pruned
+PRUNE_TO = 0.9
+
+
+def normalize_query(query):
+    """
+    Cache key of a query: surrounding and repeated whitespace removed.
+    """
+    return " ".join(str(query).split())
+
+
+def search_key(query, **filters):
+    """
+    Cache key of a filtered query: the normalized query followed by the canonical JSON of the filters set.
+    Unfiltered queries keep their plain normalized key.
+    """
+    filters = {name: value for name, value in filters.items() if value is not None}
+    if not filters:
+        return normalize_query(query)
+    return f"{normalize_query(query)} {json.dumps(filters, sort_keys = True, separators = (',', ':'))}"
+
+
+def chroma_fingerprint(persist_dir):
+    """
+    Reads the collection ids and the last write sequence numbers of every segment from the Chroma database of a
+    vectorstore directory. Rebuilding a store creates new collections and adding or deleting documents advances the
+    sequence numbers, while opening or querying it changes neither (unlike the file mtimes).
+
+    Returns:
+        bytes: The fingerprint, b"-" without a Chroma database.
+    """
+    db_path = Path(persist_dir, CHROMA_DB)
+    if not db_path.is_file():
+        return b"-"
+    try:
+        conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri = True, timeout = 10)
+        try:
+            collections = sorted(conn.execute("SELECT id, name FROM collections").fetchall())
+            sequences = sorted(conn.execute("SELECT segment_id, seq_id FROM max_seq_id").fetchall())
+        finally:
+            conn.close()
+        return json.dumps([collections, sequences], default = str).encode("utf-8")
+
+    except sqlite3.Error as e:
+        logging.warning(f"Failed to read the Chroma database {db_path}, versioning it by size: {e}")
+        return str(db_path.stat().st_size).encode("utf-8")
+
+
+def vectorstore_version(persist_dir, books_path):
+    """
+    Fingerprints a vectorstore build. Only data written when the store is built is read: the partition manifest
+    (holding the unique build id `SemanticIndexBuilder` assigns at build time), the keyword index manifest (rebuilt on
+    its own by `build_keyword_index`), the collections and write sequence of the Chroma database (see
+    `chroma_fingerprint`, which covers single-collection stores built without a manifest) and the books data file.
+
+    Args:
+        persist_dir (Path): Vectorstore directory.
+        books_path (Path): Semantic books data file.
+
+    Returns:
+        str: A short hex digest, identical as long as the index was not rebuilt.
+    """
+    digest = hashlib.sha1()
+    for manifest in (Path(persist_dir, PARTITION_MANIFEST), Path(persist_dir, KEYWORD_DIR, KEYWORD_MANIFEST)):
+        digest.update(manifest.read_bytes() if manifest.is_file() else b"-")
+        digest.update(b";")
+    digest.update(chroma_fingerprint(persist_dir))
+    digest.update(b";")
+    if Path(books_path).is_file():
+        stat = Path(books_path).stat()
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class SemanticResultCache:
+    def __init__(self, app_config = None):
+        """
+        Initializes the SemanticResultCache object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the semantic cache settings.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.cache_config = app_config.semantic_cache_config()
+            self.memory = OrderedDict()
+            self.lock = threading.Lock()
+            self.local = threading.local()
+            self._version = None
+            self._version_checked = 0.0
+            # access times of cache hits not yet written, and inserts since the entries were last counted
+            self._accessed = {}
+            self._inserted = 0
+
+            with self.connection() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS results (version TEXT, query TEXT, k INTEGER, "
+                             "value TEXT, accessed REAL, PRIMARY KEY (version, query, k)) WITHOUT ROWID")
+                self._entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+        except Exception as e:
+            logging.error(f"Semantic Result Cache initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def connection(self):
+        """
+        Returns the SQLite connection of the calling thread, reopened after a fork.
+        """
+        if getattr(self.local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.cache_config.db_file_path, timeout = 10, isolation_level = None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return self.local.conn
+
+
+    @property
+    def version(self):
+        """
+        Current vectorstore version, rechecked at most every `VERSION_CHECK_INTERVAL` seconds.
+        Older entries are dropped when the version changes.
+        """
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > VERSION_CHECK_INTERVAL:
+            version = vectorstore_version(self.cache_config.chroma_persist_dir, self.cache_config.final_books_obj_path)
+            self._version_checked = now
+            if version != self._version:
+                conn = self.connection()
+                conn.execute("DELETE FROM results WHERE version != ?", (version,))
+                with self.lock:
+                    self.memory.clear()
+                    self._entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                    self._inserted = 0
+                if self._version is not None:
+                    logging.info(f"Vectorstore rebuilt, semantic result cache invalidated (version {version})")
+                self._version = version
+        return self._version
+
+
+    def get(self, query, k):
+        """
+        Looks up a cached result.
+        Returns:
+            tuple: (books, posters_url), or None on a cache miss.
+        """
+        if not self.cache_config.enabled:
+            return None
+        key = (self.version, normalize_query(query), int(k))
+
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.memory.move_to_end(key)
+                return value
+
+        conn = self.connection()
+        row = conn.execute("SELECT value FROM results WHERE version = ? AND query = ? AND k = ?", key).fetchone()
+        if row is None:
+            return None
+
+        with self.lock:
+            self._accessed[key] = time.time()
+            flush = len(self._accessed) >= ACCESS_BATCH
+        if flush:
+            self._write_accessed()
+        result = json.loads(row[0])
+        value = (result["books"], result["posters"])
+        self._remember(key, value)
+        return value
+
+
+    def _write_accessed(self):
+        """
+        Writes the queued access times of cache hits in one transaction.
+        """
+        with self.lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            conn = self.connection()
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany("UPDATE results SET accessed = ? WHERE version = ? AND query = ? AND k = ?",
+                                 [(when, *key) for key, when in accessed.items()])
+
+
+    def put(self, query, k, books, posters_url):
+        """
+        Stores a result, evicting the least recently used entries above `max_entries`.
+        """
+        if not self.cache_config.enabled:
+            return
+        key = (self.version, normalize_query(query), int(k))
+        value = (list(books), list(posters_url))
+        self._remember(key, value)
+
+        conn = self.connection()
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                     (*key, json.dumps({"books": value[0], "posters": value[1]}), time.time()))
+        with self.lock:
+            self._inserted += 1
+            prune = self._entries + self._inserted > self.cache_config.max_entries
+        if prune:
+            self.prune()
+
+
+    def prune(self):
+        """
+        Evicts the least recently used entries down to `PRUNE_TO` of `max_entries` and recounts the entries.
+        Runs only when the inserts since the last count could have exceeded `max_entries` (replaced entries and the
+        inserts of other processes are picked up by the recount).
+        """
+        self._write_accessed()
+        conn = self.connection()
+        excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.cache_config.max_entries
+        if excess > 0:
+            excess += int(self.cache_config.max_entries * (1 - PRUNE_TO))
+            conn.execute("DELETE FROM results WHERE (version, query, k) IN "
+                         "(SELECT version, query, k FROM results ORDER BY accessed LIMIT ?)", (excess,))
+        with self.lock:
+            self._entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            self._inserted = 0
+
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.cache_config.memory_entries:
+                self.memory.popitem(last = False)
+
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self._accessed.clear()
+            self._entries = self._inserted = 0
+        self.connection().execute("DELETE FROM results")
@@ -0,0 +1,471 @@
+# Pickle-free serving artifacts for the ML recommender.
+# The item x user rating matrix is stored as raw CSR arrays (.npy) next to the book titles, poster urls and a small
+# JSON manifest. Everything is loaded with `mmap_mode="r"`, so worker processes on one host share a single
+# page-cached copy and no pickle is executed at startup.
+# User recommendations read two more precomputed sparse matrices: the user profiles (the transposed rating matrix) and
+# an item neighbour table holding the top cosine similar books of every book. Scoring a batch of users is one sparse
+# product of their profiles with the neighbour table, with no per-request neighbour search.
+import os
+import sys
+import json
+import uuid
+import shutil
+import bisect
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timezone
+from scipy.sparse import csr_matrix, diags
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.constant.constants import DEFAULT_POSTER_URL
+
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+# Similar books kept per book in the item neighbour table
+ITEM_NEIGHBOURS = 50
+# Books whose similarities are computed at a time when building the neighbour table
+NEIGHBOUR_BLOCK = 1024
+# Users scored at a time, bounding the dense (users x books) score matrix
+USER_BLOCK = 256
+
+
+def load_poster_urls(final_ratings, book_names):
+    """
+    Resolves one poster url per book in a single vectorized lookup.
+    Args:
+        final_ratings (pd.DataFrame): Ratings merged with books metadata.
+        book_names (pd.Index): Book titles in the row order of the trained model.
+
+    Returns:
+        np.ndarray: Poster urls aligned with `book_names`, missing urls replaced by the default poster.
+    """
+    posters = final_ratings.drop_duplicates(subset="Title").set_index("Title")["image_url"]
+    return posters.reindex(book_names).fillna(DEFAULT_POSTER_URL).to_numpy(dtype=object)
+
+
+def item_neighbour_table(matrix, n_neighbours = ITEM_NEIGHBOURS):
+    """
+    Builds the item neighbour table of a rating matrix.
+    Args:
+        matrix (csr_matrix): Books x users rating matrix.
+        n_neighbours (int, optional): Similar books kept per book. Defaults to ITEM_NEIGHBOURS.
+
+    Returns:
+        csr_matrix: float32 books x books matrix holding the positive cosine similarities of the
+            `n_neighbours` most similar books of every row, the book itself excluded.
+    """
+    n_items = matrix.shape[0]
+    n_neighbours = min(n_neighbours, n_items - 1)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float64).ravel())
+    normalized = (diags(1 / np.where(norms > 0, norms, 1)) @ matrix).astype(np.float32).tocsr()
+
+    counts, indices, data = np.zeros(n_items, dtype=np.int64), [], []
+    for start in range(0, n_items if n_neighbours > 0 else 0, NEIGHBOUR_BLOCK):
+        stop = min(start + NEIGHBOUR_BLOCK, n_items)
+        similarities = (normalized[start:stop] @ normalized.T).toarray()
+        similarities[np.arange(stop - start), np.arange(start, stop)] = 0
+
+        top = np.argpartition(-similarities, n_neighbours - 1, axis=1)[:, :n_neighbours]
+        values = np.take_along_axis(similarities, top, axis=1)
+        keep = values > 0
+        counts[start:stop] = keep.sum(axis=1)
+        indices.append(top[keep])
+        data.append(values[keep])
+
+    indptr = np.zeros(n_items + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.concatenate(indices).astype(np.int32) if indices else np.empty(0, dtype=np.int32)
+    data = np.concatenate(data).astype(np.float32) if data else np.empty(0, dtype=np.float32)
+    table = csr_matrix((data, indices, indptr), shape=(n_items, n_items))
+    table.sort_indices()
+    return table
+
+
+def popularity_keys(rating_counts):
+    """
+    Ranking keys of the books by rating count, in [-1, 0) so they sort below every positive score.
+    """
+    n_items = len(rating_counts)
+    keys = np.empty(n_items, dtype=np.float32)
+    keys[np.argsort(rating_counts, kind="stable")] = np.arange(n_items)
+    return keys / max(n_items, 1) - 1
+
+
+def rank_unrated(profiles, neighbours, fallback_keys, k):
+    """
+    Top-k unrated books of a block of user profiles. The ratings of every user are propagated to the similar
+    books of the item neighbour table; books no rated book leads to are ranked by `fallback_keys` after the
+    scored ones.
+    Args:
+        profiles (csr_matrix): Users x books ratings.
+        neighbours (csr_matrix): Item neighbour table.
+        fallback_keys (np.ndarray): Ranking keys of the unscored books, from `popularity_keys`.
+        k (int): Number of books per user, at most the number of books.
+
+    Returns:
+        tuple: (scores, indices) arrays of shape (n_users, k), best first. Fallback ranked books have a score of 0
+            and already rated books (only returned when fewer than k books are unrated) -inf.
+    """
+    scores = np.asarray((profiles @ neighbours).toarray(), dtype=np.float32)
+    keys = np.where(scores > 0, scores, fallback_keys)
+    rated = np.repeat(np.arange(profiles.shape[0]), np.diff(profiles.indptr)), profiles.indices
+    keys[rated] = -np.inf
+    scores[rated] = -np.inf
+
+    top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1, kind="stable"), axis=1)
+    return np.take_along_axis(scores, top, axis=1), top
+
+
+class StringArray:
+    """
+    Read-only array of strings stored as one UTF-8 byte buffer plus an offsets array, so it can be
+    memory-mapped without pickling Python objects.
+    """
+    def __init__(self, data, offsets, is_sorted = False):
+        self.data = data
+        self.offsets = offsets
+        self.is_sorted = is_sorted
+        # string -> first position, built by the first lookup of unsorted strings
+        self._positions = None
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [str(s).encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def take(self, indices):
+        return [self[int(i)] for i in indices]
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+    def index(self, value):
+        """
+        Returns the position of `value`, with a binary search when the strings are sorted and a hashed
+        lookup otherwise.
+        Raises:
+            KeyError: If the value is not present.
+        """
+        if self.is_sorted:
+            i = bisect.bisect_left(self, value)
+            if i < len(self) and self[i] == value:
+                return i
+            raise KeyError(value)
+
+        if self._positions is None:
+            positions = {}
+            for i, string in enumerate(self.tolist()):
+                positions.setdefault(string, i)
+            self._positions = positions
+        i = self._positions.get(value)
+        if i is None:
+            raise KeyError(value)
+        return i
+
+
+def export_serving_artifacts(books_pivot_table, final_ratings, serving_dir, edition_aliases = None,
+                             n_neighbours = ITEM_NEIGHBOURS):
+    """
+    Writes the serving artifacts of the ML recommender.
+
+    The files are written to a temporary directory that then replaces `serving_dir`, so running
+    servers never observe a half written artifact set.
+
+    Args:
+        books_pivot_table (pd.DataFrame): Book titles x user ids rating table.
+        final_ratings (pd.DataFrame): Ratings merged with books metadata, used for poster urls.
+        serving_dir (Path): Destination directory.
+        edition_aliases (pd.Series, optional): Work title by merged edition title, so the titles of
+            collapsed editions still find their work.
+        n_neighbours (int, optional): Similar books kept per book in the item neighbour table of the user
+            recommendations. Defaults to ITEM_NEIGHBOURS.
+
+    Returns:
+        dict: The written manifest.
+    """
+    try:
+        serving_dir = Path(serving_dir)
+        tmp_dir = serving_dir.with_name(f"{serving_dir.name}.tmp-{os.getpid()}")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        matrix = csr_matrix(books_pivot_table.to_numpy(dtype=np.float32))
+        matrix.sort_indices()
+        book_names = books_pivot_table.index
+        titles = StringArray.from_strings(book_names)
+        posters = StringArray.from_strings(load_poster_urls(final_ratings, book_names))
+        # squared norms summed in float64, consistent with the float64 products of `kneighbors`
+        squares = csr_matrix((np.square(matrix.data, dtype=np.float64), matrix.indices, matrix.indptr),
+                             shape=matrix.shape, copy=False)
+        sq_norms = np.asarray(squares.sum(axis=1)).ravel()
+        user_ids = books_pivot_table.columns.to_numpy(dtype=np.int64)
+        profiles = matrix.T.tocsr()
+        profiles.sort_indices()
+        neighbours = item_neighbour_table(matrix, n_neighbours)
+
+        from src.components.title_index import build_title_index_arrays, normalize_title
+
+        arrays = {
+            "matrix_data": matrix.data,
+            "matrix_indices": matrix.indices,
+            "matrix_indptr": matrix.indptr,
+            "sq_norms": sq_norms,
+            "user_ids": user_ids,
+            "profiles_data": profiles.data,
+            "profiles_indices": profiles.indices,
+            "profiles_indptr": profiles.indptr,
+            "neighbours_data": neighbours.data,
+            "neighbours_indices": neighbours.indices,
+            "neighbours_indptr": neighbours.indptr,
+            "titles_data": titles.data,
+            "titles_offsets": titles.offsets,
+            "posters_data": posters.data,
+            "posters_offsets": posters.offsets,
+            **build_title_index_arrays(book_names),
+        }
+        if "title_id" in final_ratings.columns:
+            title_ids = final_ratings.drop_duplicates(subset="Title").set_index("Title")["title_id"]
+            arrays["title_ids"] = title_ids.reindex(book_names).to_numpy(dtype=np.int32)
+        if edition_aliases is not None and len(edition_aliases):
+            # normalized edition title -> catalogue row of its work, sorted for binary search
+            aliases = {}
+            for title, row in zip(edition_aliases.index, book_names.get_indexer(edition_aliases.to_numpy())):
+                key = normalize_title(title)
+                if key and row >= 0:
+                    aliases.setdefault(key, row)
+            aliases = sorted(aliases.items())
+            alias_keys = StringArray.from_strings([key for key, _ in aliases])
+            arrays["alias_keys_data"] = alias_keys.data
+            arrays["alias_keys_offsets"] = alias_keys.offsets
+            arrays["alias_rows"] = np.array([row for _, row in aliases], dtype=np.int32)
+        for name, array in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "build_id": uuid.uuid4().hex,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "shape": list(matrix.shape),
+            "nnz": int(matrix.nnz),
+            "titles_sorted": bool(book_names.is_monotonic_increasing and book_names.is_unique),
+            "users_sorted": bool(np.all(np.diff(user_ids) > 0)),
+            "files": {name: f"{name}.npy" for name in arrays},
+        }
+        with open(tmp_dir / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # swap the new artifact set in; mapped files of the old set stay valid for running readers
+        old_dir = serving_dir.with_name(f"{serving_dir.name}.old-{os.getpid()}")
+        if serving_dir.exists():
+            serving_dir.rename(old_dir)
+        tmp_dir.rename(serving_dir)
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+
+        logging.info(f"Serving artifacts {manifest['build_id']} saved at {serving_dir}")
+        return manifest
+
+    except Exception as e:
+        logging.error(f"Failed to export serving artifacts: {e}", exc_info=True)
+        raise AppException(e, sys)
+
+
+class ServingArtifacts:
+    def __init__(self, serving_dir):
+        """
+        Memory-maps the serving artifacts written by `export_serving_artifacts`.
+        Args:
+            serving_dir (Path): Directory holding the manifest and the .npy arrays.
+        """
+        try:
+            self.serving_dir = Path(serving_dir)
+            with open(self.serving_dir / MANIFEST_FILE) as f:
+                self.manifest = json.load(f)
+
+            if self.manifest["format_version"] != FORMAT_VERSION:
+                raise ValueError(f"Unsupported serving artifacts version: {self.manifest['format_version']}")
+
+            self.arrays = arrays = {name: np.load(self.serving_dir / file, mmap_mode="r", allow_pickle=False)
+                      for name, file in self.manifest["files"].items()}
+
+            self.matrix = csr_matrix((arrays["matrix_data"], arrays["matrix_indices"], arrays["matrix_indptr"]),
+                                     shape=tuple(self.manifest["shape"]), copy=False)
+            self.sq_norms = arrays["sq_norms"]
+            self.user_ids = arrays["user_ids"]
+            self.book_names = StringArray(arrays["titles_data"], arrays["titles_offsets"],
+                                          is_sorted=self.manifest["titles_sorted"])
+            self.poster_urls = StringArray(arrays["posters_data"], arrays["posters_offsets"])
+            self.title_ids = arrays.get("title_ids")
+            self.alias_keys = None
+            if "alias_rows" in arrays:
+                self.alias_keys = StringArray(arrays["alias_keys_data"], arrays["alias_keys_offsets"], is_sorted=True)
+            self.build_id = self.manifest["build_id"]
+            self.rating_counts = np.diff(arrays["matrix_indptr"])
+            self._title_index = None
+            self._user_order = None if self.manifest.get("users_sorted") else np.argsort(self.user_ids, kind="stable")
+            self._profiles = None
+            self._neighbours = None
+            self._popularity_keys = None
+
+        except Exception as e:
+            logging.error(f"Failed to load serving artifacts from {serving_dir}: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @staticmethod
+    def exists(serving_dir):
+        return Path(serving_dir, MANIFEST_FILE).exists()
+
+
+    @property
+    def title_index(self):
+        """
+        Typeahead title index of the catalogue, or None for artifacts built without it.
+        """
+        if self._title_index is None and "trigram_keys" in self.arrays:
+            from src.components.title_index import TitleIndex
+            self._title_index = TitleIndex(self.arrays, self.book_names)
+        return self._title_index
+
+
+    def find_book(self, title):
+        """
+        Returns the catalogue row of a title, matching exactly first, then on the normalized title
+        (case, punctuation and HTML escapes ignored), then on the titles of the editions collapsed into a work.
+        Raises:
+            KeyError: If no book matches.
+        """
+        try:
+            return self.book_names.index(title)
+        except KeyError:
+            row = self.title_index.lookup(title) if self.title_index is not None else None
+            if row is None and self.alias_keys is not None:
+                from src.components.title_index import normalize_title
+                try:
+                    row = int(self.arrays["alias_rows"][self.alias_keys.index(normalize_title(title))])
+                except KeyError:
+                    pass
+            if row is None:
+                raise
+            return row
+
+
+    def kneighbors(self, rows, n_neighbors):
+        """
+        Exact euclidean nearest neighbours of catalogue rows, equivalent to the brute force
+        NearestNeighbors model.
+        Args:
+            rows (array-like): Row ids of the query books.
+            n_neighbors (int): Number of neighbours per query, the query book included.
+
+        Returns:
+            tuple: (distances, indices) arrays of shape (len(rows), n_neighbors), nearest first.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        n_neighbors = min(n_neighbors, self.matrix.shape[0])
+
+        # float64 products: float32 cancellation in |a|^2 - 2ab + |b|^2 would blur the distances of close books
+        dots = (self.matrix @ self.matrix[rows].T.astype(np.float64)).T.toarray()
+        sq_dist = self.sq_norms[None, :] - 2 * dots + self.sq_norms[rows][:, None]
+        np.maximum(sq_dist, 0, out=sq_dist)
+
+        candidates = np.argpartition(sq_dist, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        candidate_dist = np.take_along_axis(sq_dist, candidates, axis=1)
+        order = np.argsort(candidate_dist, axis=1, kind="stable")
+
+        indices = np.take_along_axis(candidates, order, axis=1)
+        distances = np.sqrt(np.take_along_axis(candidate_dist, order, axis=1))
+        return distances, indices
+
+
+    def _stored_matrix(self, name, shape):
+        """
+        Memory-mapped CSR matrix of the `<name>_data/indices/indptr` arrays, None when not exported.
+        """
+        if f"{name}_indptr" not in self.arrays:
+            return None
+        return csr_matrix((self.arrays[f"{name}_data"], self.arrays[f"{name}_indices"], self.arrays[f"{name}_indptr"]),
+                          shape=shape, copy=False)
+
+
+    @property
+    def user_profiles(self):
+        """
+        Users x books rating matrix, computed in memory for artifacts exported without it.
+        """
+        if self._profiles is None:
+            profiles = self._stored_matrix("profiles", self.matrix.shape[::-1])
+            self._profiles = profiles if profiles is not None else self.matrix.T.tocsr()
+        return self._profiles
+
+
+    @property
+    def item_neighbours(self):
+        """
+        Item neighbour table (see `item_neighbour_table`), computed in memory for artifacts exported without it.
+        """
+        if self._neighbours is None:
+            n_items = self.matrix.shape[0]
+            neighbours = self._stored_matrix("neighbours", (n_items, n_items))
+            self._neighbours = neighbours if neighbours is not None else item_neighbour_table(self.matrix)
+        return self._neighbours
+
+
+    def user_rows(self, user_ids):
+        """
+        Returns the rating matrix column (user profile row) of every user id, -1 for users without ratings.
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64).ravel()
+        if len(self.user_ids) == 0:
+            return np.full(len(user_ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.user_ids, user_ids, sorter=self._user_order)
+        positions = np.minimum(positions, len(self.user_ids) - 1)
+        rows = positions if self._user_order is None else self._user_order[positions]
+        return np.where(self.user_ids[rows] == user_ids, rows, -1)
+
+
+    def recommend_users(self, rows, k):
+        """
+        Top-k unrated books of users (see `rank_unrated`), books no rated book leads to ranked by rating count,
+        so unknown users get the most rated books.
+        Args:
+            rows (array-like): User profile rows from `user_rows`, -1 for unknown users.
+            k (int): Number of books per user.
+
+        Returns:
+            tuple: (scores, indices) arrays of shape (len(rows), k), best first. Popularity ranked books have a
+                score of 0 and already rated books (only returned when fewer than k books are unrated) -inf.
+        """
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        n_items = self.matrix.shape[0]
+        k = min(k, n_items)
+        if self._popularity_keys is None:
+            self._popularity_keys = popularity_keys(self.rating_counts)
+
+        scores = np.empty((len(rows), k), dtype=np.float32)
+        indices = np.empty((len(rows), k), dtype=np.int64)
+        for start in range(0, len(rows), USER_BLOCK):
+            block = rows[start:start + USER_BLOCK]
+            # unknown users get empty profile rows
+            known = self.user_profiles[block[block >= 0]]
+            counts = np.zeros(len(block), dtype=np.int64)
+            counts[block >= 0] = np.diff(known.indptr)
+            indptr = np.zeros(len(block) + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            profiles = csr_matrix((known.data, known.indices, indptr), shape=(len(block), n_items))
+
+            block_scores, top = rank_unrated(profiles, self.item_neighbours, self._popularity_keys, k)
+            scores[start:start + len(block)] = block_scores
+            indices[start:start + len(block)] = top
+        return scores, indices
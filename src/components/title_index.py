@@ -0,0 +1,199 @@
+# Typeahead title search index for the ML recommender catalogue.
+# Titles are normalized (case, punctuation, HTML escapes, accents) and indexed by sorted prefix and by character
+# trigram postings. The index is stored as plain NumPy arrays inside the serving artifacts, so it is memory-mapped
+# together with the rating matrix and queried on the server instead of shipping every title to the browser.
+import re
+import html
+import bisect
+import unicodedata
+import numpy as np
+from src.components.serving_artifacts import StringArray
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+# Minimum trigram similarity (Jaccard) for a fuzzy match
+MIN_SIMILARITY = 0.2
+
+
+def normalize_title(title):
+    """
+    Builds the search key of a title: unescaped, accent-free, lowercase words separated by single spaces.
+    Example: "Harry Potter &amp; the Sorcerer's Stone" -> "harry potter the sorcerer s stone"
+    """
+    title = html.unescape(str(title))
+    if not title.isascii():
+        title = "".join(c for c in unicodedata.normalize("NFKD", title) if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", title.lower()).strip()
+
+
+def trigram_codes(normalized):
+    """
+    Returns the sorted unique character trigrams of a normalized title, each packed into one int64.
+    """
+    padded = f"  {normalized} "
+    return np.array(sorted({(ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+                            for i in range(len(padded) - 2)}), dtype=np.int64)
+
+
+def build_title_index_arrays(book_names):
+    """
+    Builds the arrays of the title index.
+    Args:
+        book_names (iterable): Titles in catalogue row order.
+
+    Returns:
+        dict: Arrays to be saved with the serving artifacts.
+    """
+    normalized = [normalize_title(title) for title in book_names]
+    norm_titles = StringArray.from_strings(normalized)
+    prefix_order = np.array(sorted(range(len(normalized)), key=normalized.__getitem__), dtype=np.int32)
+
+    codes = [trigram_codes(title) for title in normalized]
+    counts = np.array([len(c) for c in codes], dtype=np.int32)
+    rows = np.repeat(np.arange(len(codes), dtype=np.int32), counts)
+    all_codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int64)
+
+    keys, inverse = np.unique(all_codes, return_inverse=True)
+    postings = rows[np.argsort(inverse, kind="stable")]
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(inverse, minlength=len(keys)), out=offsets[1:])
+
+    return {
+        "title_norm_data": norm_titles.data,
+        "title_norm_offsets": norm_titles.offsets,
+        "title_prefix_order": prefix_order,
+        "trigram_keys": keys,
+        "trigram_offsets": offsets,
+        "trigram_postings": postings,
+        "trigram_counts": counts,
+    }
+
+
+class _SortedTitles:
+    """
+    Sequence view of the normalized titles in sorted order, for binary searches.
+    """
+    def __init__(self, norm_titles, order):
+        self.norm_titles = norm_titles
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.norm_titles[int(self.order[i])]
+
+
+class TitleIndex:
+    def __init__(self, arrays, book_names):
+        """
+        Wraps the (memory-mapped) title index arrays.
+        Args:
+            arrays (dict): Arrays produced by `build_title_index_arrays`.
+            book_names (StringArray): Original titles in catalogue row order.
+        """
+        self.book_names = book_names
+        self.norm_titles = StringArray(arrays["title_norm_data"], arrays["title_norm_offsets"])
+        self.sorted_titles = _SortedTitles(self.norm_titles, arrays["title_prefix_order"])
+        self.trigram_keys = arrays["trigram_keys"]
+        self.trigram_offsets = arrays["trigram_offsets"]
+        self.trigram_postings = arrays["trigram_postings"]
+        self.trigram_counts = arrays["trigram_counts"]
+        # normalized titles as one byte string for substring searches, copied by the first one
+        self._norm_bytes = None
+
+
+    def lookup(self, title):
+        """
+        Returns the catalogue row whose normalized title equals the normalized `title`, or None.
+        """
+        key = normalize_title(title)
+        i = bisect.bisect_left(self.sorted_titles, key)
+        if i < len(self.sorted_titles) and self.sorted_titles[i] == key:
+            return int(self.sorted_titles.order[i])
+        return None
+
+
+    def _prefix_rows(self, key, limit):
+        rows = []
+        i = bisect.bisect_left(self.sorted_titles, key)
+        while i < len(self.sorted_titles) and len(rows) < limit and self.sorted_titles[i].startswith(key):
+            rows.append(int(self.sorted_titles.order[i]))
+            i += 1
+        return rows
+
+
+    def _fuzzy_rows(self, key, limit):
+        codes = trigram_codes(key)
+        positions = np.searchsorted(self.trigram_keys, codes)
+        found = positions < len(self.trigram_keys)
+        found[found] = self.trigram_keys[positions[found]] == codes[found]
+        positions = positions[found]
+        if len(positions) == 0:
+            return []
+
+        candidates = np.concatenate([self.trigram_postings[self.trigram_offsets[p]:self.trigram_offsets[p + 1]]
+                                     for p in positions])
+        rows, hits = np.unique(candidates, return_counts=True)
+        similarity = hits / (len(codes) + self.trigram_counts[rows] - hits)
+
+        keep = similarity >= MIN_SIMILARITY
+        rows, similarity = rows[keep], similarity[keep]
+        if len(rows) > limit:
+            top = np.argpartition(-similarity, limit - 1)[:limit]
+            rows, similarity = rows[top], similarity[top]
+        return rows[np.argsort(-similarity, kind="stable")].tolist()
+
+
+    def _substring_rows(self, key, limit):
+        """
+        Rows whose normalized title contains `key`, in catalogue order, searched in the concatenated titles.
+        """
+        if self._norm_bytes is None:
+            self._norm_bytes = bytes(self.norm_titles.data)
+        data, offsets = self._norm_bytes, self.norm_titles.offsets
+        needle = key.encode("utf-8")
+
+        rows = []
+        start = data.find(needle)
+        while start >= 0 and len(rows) < limit:
+            row = int(np.searchsorted(offsets, start, side="right")) - 1
+            end = int(offsets[row + 1])
+            if start + len(needle) <= end:
+                rows.append(row)
+                start = data.find(needle, end)
+            else:
+                # the match spans two adjacent titles
+                start = data.find(needle, start + 1)
+        return rows
+
+
+    def search(self, query, limit = 10):
+        """
+        Top-N typeahead lookup: titles starting with the query first, then the closest fuzzy (trigram) matches,
+        then titles containing the query anywhere, until `limit` titles are found.
+        Matching ignores case, punctuation, accents and HTML escapes.
+
+        Args:
+            query (str): Partial title typed by the user.
+            limit (int, optional): Maximum number of titles returned. Defaults to 10.
+
+        Returns:
+            list: Matching original titles, best first.
+        """
+        key = normalize_title(query)
+        if not key:
+            return []
+
+        rows = self._prefix_rows(key, limit)
+        seen = set(rows)
+        for strategy in (self._fuzzy_rows, self._substring_rows):
+            if len(rows) >= limit:
+                break
+            # ask for the rows already taken on top, so duplicates don't shrink the result
+            for row in strategy(key, limit + len(rows)):
+                if row not in seen:
+                    seen.add(row)
+                    rows.append(row)
+
+        return self.book_names.take(rows[:limit])
@@ -0,0 +1,442 @@
+# Partitioned vector index of the semantic recommender.
+# The books are embedded once and split into N Chroma collections, either by a hash of the ISBN (even shards) or by
+# category (every genre lives in one shard). Queries run on the partitions in parallel and the per partition top-k
+# hits are merged. Metadata filters are pushed down into the partition searches, and partitions that cannot hold a
+# matching book (wrong categories, value ranges outside the filter) are not searched at all.
+import os
+import sys
+import json
+import uuid
+import heapq
+import pickle
+import shutil
+import threading
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import instrument, add_counts
+from src.core.configuration import get_app_configuration
+from src.components.quantized_index import write_quantized_index
+from src.components.keyword_index import build_keyword_index
+
+PARTITION_MANIFEST = "partitions.json"
+PARTITION_STRATEGIES = ("hash", "category")
+UNKNOWN_CATEGORY = "Unknown"
+# Numeric book columns stored as index metadata, with their types
+NUMERIC_METADATA = {"published_year": int, "num_pages": int, "average_rating": float}
+# Growth factor of the partition result count while a filtered search returns less than k hits
+OVERFETCH_FACTOR = 4
+
+# Chroma clients of the process, keyed by (pid, persist directory, build id)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_collection(persist_dir, build_id, name):
+    """
+    Returns a collection of the index, opening one Chroma client per process and index build.
+    """
+    import chromadb
+
+    key = (os.getpid(), str(persist_dir), build_id)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if any(k[:2] == key[:2] for k in _clients):
+                # the index was rebuilt in place, drop the clients bound to the replaced files
+                from chromadb.api.client import SharedSystemClient
+                SharedSystemClient.clear_system_cache()
+                _clients.clear()
+            client = _clients[key] = chromadb.PersistentClient(path = str(persist_dir))
+    return client.get_collection(name)
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """
+    Metadata filters of a semantic search; None means unconstrained. Ranges are inclusive.
+    """
+    categories: tuple = None
+    min_year: int = None
+    max_year: int = None
+    min_pages: int = None
+    max_pages: int = None
+    min_rating: float = None
+
+    @classmethod
+    def coerce(cls, filters):
+        """
+        Builds the filters from a SearchFilters, a dict of its fields or None.
+        Returns:
+            SearchFilters: The filters, or None when nothing is constrained.
+        """
+        if filters is None:
+            return None
+        if isinstance(filters, dict):
+            filters = cls(**filters)
+        if filters.categories is not None:
+            categories = [filters.categories] if isinstance(filters.categories, str) else filters.categories
+            filters = cls(**{**asdict(filters), "categories": tuple(sorted(set(categories))) or None})
+        return filters if any(value is not None for value in asdict(filters).values()) else None
+
+
+    def to_dict(self):
+        """
+        Set filters only, used in cache keys.
+        """
+        return {name: list(value) if name == "categories" else value
+                for name, value in asdict(self).items() if value is not None}
+
+
+    def bounds(self):
+        """
+        Returns:
+            dict: (low, high) bounds by numeric metadata field, None ends unconstrained.
+        """
+        bounds = {"published_year": (self.min_year, self.max_year),
+                  "num_pages": (self.min_pages, self.max_pages),
+                  "average_rating": (self.min_rating, None)}
+        return {field: bound for field, bound in bounds.items() if bound != (None, None)}
+
+
+    def where(self):
+        """
+        Chroma metadata filter applying these filters inside the vector search.
+        """
+        conditions = []
+        if self.categories:
+            conditions.append({"categories": {"$in": list(self.categories)}})
+        for field, (low, high) in self.bounds().items():
+            if low is not None:
+                conditions.append({field: {"$gte": low}})
+            if high is not None:
+                conditions.append({field: {"$lte": high}})
+
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+    def frame_mask(self, books):
+        """
+        Boolean mask of the rows of a books DataFrame matching the filters.
+        """
+        mask = np.ones(len(books), dtype=bool)
+        if self.categories:
+            mask &= books["categories"].isin(self.categories).to_numpy()
+        for field, (low, high) in self.bounds().items():
+            values = books[field].to_numpy(dtype=np.float64)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        return mask
+
+
+    def may_match(self, partition):
+        """
+        Whether a partition can hold matching books, judged from its manifest entry.
+        """
+        if self.categories and not set(self.categories) & set(partition["categories"]):
+            return False
+        for field, (low, high) in self.bounds().items():
+            value_range = partition.get("ranges", {}).get(field)
+            if value_range is None:
+                # no book of the partition has the field, so none can match its bounds
+                return False
+            if (low is not None and value_range[1] < low) or (high is not None and value_range[0] > high):
+                return False
+        return True
+
+
+def query_partition(persist_dir, build_id, name, vector, k, count, where = None):
+    """
+    Searches one partition. Module level, so it can run on thread and process pools alike.
+
+    A filtered search asks for k hits first, and widens the search by `OVERFETCH_FACTOR` while fewer than k
+    books passed the filter, until k hits are found or the whole partition was considered.
+
+    Args:
+        count (int): Number of books in the partition.
+
+    Returns:
+        list: (distance, isbn13, document) hits, nearest first.
+    """
+    collection = _get_collection(persist_dir, build_id, name)
+    n_results = min(k, count)
+    while True:
+        result = collection.query(query_embeddings = [vector], n_results = n_results, where = where,
+                                  include = ["documents", "metadatas", "distances"])
+        hits = [(distance, metadata["isbn13"], document) for distance, metadata, document
+                in zip(result["distances"][0], result["metadatas"][0], result["documents"][0])]
+        if where is None or len(hits) >= k or n_results >= count:
+            return hits[:k]
+        add_counts(overfetches=1)
+        n_results = min(n_results * OVERFETCH_FACTOR, count)
+
+
+def book_metadata(isbn13, category, values):
+    """
+    Chroma metadata of a book; missing numeric values are left out, so range filters never match them.
+    """
+    metadata = {"isbn13": int(isbn13), "categories": category}
+    for (field, cast), value in zip(NUMERIC_METADATA.items(), values):
+        if value == value:
+            metadata[field] = cast(value)
+    return metadata
+
+
+def metadata_ranges(books, rows):
+    """
+    (min, max) of every numeric metadata field over the given rows, for partition pruning.
+    """
+    ranges = {}
+    for field, cast in NUMERIC_METADATA.items():
+        if field in books:
+            values = books[field].iloc[rows].dropna()
+            if len(values):
+                ranges[field] = [cast(values.min()), cast(values.max())]
+    return ranges
+
+
+def partition_books(categories, isbn13, n_partitions, strategy):
+    """
+    Assigns every book to a partition.
+    Args:
+        categories (pd.Series): Category of every book.
+        isbn13 (np.ndarray): ISBN of every book.
+        n_partitions (int): Requested number of partitions.
+        strategy (str): "hash" for even shards, "category" to keep every category in a single shard.
+
+    Returns:
+        tuple: (partition of every book, list of the categories held by every partition)
+    """
+    if strategy not in PARTITION_STRATEGIES:
+        raise ValueError(f"Unknown partition strategy: {strategy}")
+
+    if strategy == "hash":
+        assignment = np.asarray(isbn13, dtype=np.int64) % n_partitions
+        partition_categories = [sorted(set(categories[assignment == p])) for p in range(n_partitions)]
+        return assignment, partition_categories
+
+    # largest categories first, each into the currently smallest partition
+    counts = categories.value_counts()
+    n_partitions = min(n_partitions, len(counts))
+    loads = np.zeros(n_partitions, dtype=np.int64)
+    mapping = {}
+    for category, count in counts.items():
+        partition = int(np.argmin(loads))
+        loads[partition] += count
+        mapping[category] = partition
+
+    assignment = categories.map(mapping).to_numpy(dtype=np.int64)
+    partition_categories = [sorted(c for c, p in mapping.items() if p == partition) for partition in range(n_partitions)]
+    return assignment, partition_categories
+
+
+class SemanticIndexBuilder:
+    def __init__(self, app_config = None, embedding = None):
+        """
+        Initializes the SemanticIndexBuilder object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the semantic recommender settings.
+            embedding (Embeddings, optional): Embedding model. Defaults to the Google Generative AI embeddings,
+                created by the first `build`.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.recommend_config = app_config.semantic_recommender_config()
+            self.embedding = embedding
+
+        except Exception as e:
+            logging.error(f"Semantic Index Builder initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def embed_books(self, texts):
+        """
+        Embeds the book descriptions in batches.
+        Returns:
+            np.ndarray: float32 matrix with one row per text.
+        """
+        if self.embedding is None:
+            from src.recommender.semantic_recommender import default_embedding
+            self.embedding = default_embedding()
+        batch_size = self.recommend_config.embed_batch_size
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(self.embedding.embed_documents(texts[start:start + batch_size]))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+    @instrument("semantic_index.build")
+    def build(self, n_partitions = None, strategy = None, quantization = None):
+        """
+        Embeds the semantic books dataset and writes the partitioned index.
+
+        The Chroma partitions, the quantized exact engine and the BM25 keyword index are written to a temporary
+        directory that then replaces the vectorstore directory, so running recommenders never observe a half
+        written index.
+
+        Args:
+            n_partitions (int, optional): Number of partitions. Defaults to the configured value.
+            strategy (str, optional): "hash" or "category". Defaults to the configured value.
+            quantization (str, optional): "int8" or "float16" quantized engine. Defaults to the configured value.
+
+        Returns:
+            dict: The written partition manifest.
+
+        Raises:
+            AppException: If embedding the books or writing the index fails
+        """
+        try:
+            import chromadb
+            from chromadb.api.client import SharedSystemClient
+
+            n_partitions = n_partitions or self.recommend_config.n_partitions
+            strategy = strategy or self.recommend_config.partition_strategy
+            quantization = quantization or self.recommend_config.quantization
+
+            books = pickle.load(open(self.recommend_config.final_books_obj_path, "rb"))
+            texts = books["tagged_description"].tolist()
+            logging.info(f"Embedding {len(texts)} book descriptions")
+            vectors = self.embed_books(texts)
+
+            categories = books["categories"].fillna(UNKNOWN_CATEGORY).astype(str)
+            isbn13 = books["isbn13"].to_numpy(dtype=np.int64)
+            assignment, partition_categories = partition_books(categories, isbn13, n_partitions, strategy)
+            numeric = books.reindex(columns = list(NUMERIC_METADATA)).to_numpy(dtype=np.float64)
+
+            persist_dir = Path(self.recommend_config.chroma_persist_dir)
+            tmp_dir = persist_dir.with_name(f"{persist_dir.name}.tmp-{os.getpid()}")
+            if tmp_dir.exists():
+                shutil.rmtree(tmp_dir)
+            tmp_dir.mkdir(parents=True)
+
+            client = chromadb.PersistentClient(path = str(tmp_dir))
+            max_batch = client.get_max_batch_size()
+            partitions = []
+            for partition, held_categories in enumerate(partition_categories):
+                rows = np.flatnonzero(assignment == partition)
+                name = f"books_part_{partition:03d}"
+                collection = client.create_collection(name)
+                for start in range(0, len(rows), max_batch):
+                    batch = rows[start:start + max_batch]
+                    collection.add(ids = [str(isbn13[row]) for row in batch],
+                                   embeddings = vectors[batch],
+                                   documents = [texts[row] for row in batch],
+                                   metadatas = [book_metadata(isbn13[row], categories.iloc[row], numeric[row])
+                                                for row in batch])
+                partitions.append({"collection": name, "count": int(len(rows)), "categories": held_categories,
+                                   "ranges": metadata_ranges(books, rows)})
+
+            write_quantized_index(tmp_dir, vectors, isbn13, categories, numeric, quantization)
+            build_keyword_index(tmp_dir, books["title"].tolist(), books["description"].tolist(), isbn13)
+
+            manifest = {
+                "build_id": uuid.uuid4().hex,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "strategy": strategy,
+                "n_partitions": len(partitions),
+                "dimensions": int(vectors.shape[1]),
+                "quantization": quantization,
+                "partitions": partitions,
+            }
+            with open(tmp_dir / PARTITION_MANIFEST, "w") as f:
+                json.dump(manifest, f, indent=2)
+            del client
+            SharedSystemClient.clear_system_cache()
+
+            # swap the new index in
+            old_dir = persist_dir.with_name(f"{persist_dir.name}.old-{os.getpid()}")
+            if persist_dir.exists():
+                persist_dir.rename(old_dir)
+            tmp_dir.rename(persist_dir)
+            if old_dir.exists():
+                shutil.rmtree(old_dir)
+
+            add_counts(books=len(texts), partitions=len(partitions))
+            logging.info(f"Semantic index {manifest['build_id']} with {len(partitions)} {strategy} partitions saved at {persist_dir}")
+            return manifest
+
+        except Exception as e:
+            logging.error(f"Semantic index build failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def build_keyword_index(self):
+        """
+        Rebuilds only the keyword index of the vectorstore, without any embedding call.
+        Returns:
+            dict: The written keyword index manifest.
+        """
+        try:
+            books = pickle.load(open(self.recommend_config.final_books_obj_path, "rb"))
+            return build_keyword_index(self.recommend_config.chroma_persist_dir, books["title"].tolist(),
+                                       books["description"].tolist(), books["isbn13"].to_numpy(dtype=np.int64))
+
+        except Exception as e:
+            logging.error(f"Keyword index build failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+class PartitionedVectorIndex:
+    def __init__(self, persist_dir, max_workers = 4, executor = None):
+        """
+        Opens a partitioned index written by `SemanticIndexBuilder`.
+        Args:
+            persist_dir (Path): Index directory.
+            max_workers (int, optional): Partitions searched in parallel. Defaults to 4.
+            executor (Executor, optional): Thread or process pool for the partition searches. Defaults to
+                a thread pool of `max_workers` threads.
+        """
+        try:
+            self.persist_dir = Path(persist_dir)
+            with open(self.persist_dir / PARTITION_MANIFEST) as f:
+                self.manifest = json.load(f)
+            self.build_id = self.manifest["build_id"]
+            self.partitions = self.manifest["partitions"]
+            self.executor = executor or ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = "vector-partition")
+
+        except Exception as e:
+            logging.error(f"Failed to open the partitioned index at {persist_dir}: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @staticmethod
+    def exists(persist_dir):
+        return Path(persist_dir, PARTITION_MANIFEST).exists()
+
+
+    def partitions_for(self, filters = None):
+        """
+        Returns the partitions that can hold books matching the filters (all partitions when None).
+        """
+        if filters is None:
+            return self.partitions
+        return [partition for partition in self.partitions if filters.may_match(partition)]
+
+
+    def search(self, vector, k, filters = None):
+        """
+        Searches the relevant partitions in parallel and merges their hits.
+        Args:
+            vector (list): Query embedding.
+            k (int): Number of hits.
+            filters (SearchFilters, optional): Only return books matching these filters. k hits are returned
+                whenever at least k books match.
+
+        Returns:
+            list: The k nearest (distance, isbn13, document) hits, nearest first.
+        """
+        where = filters.where() if filters is not None else None
+        vector = np.asarray(vector, dtype=np.float32).tolist()
+        futures = [self.executor.submit(query_partition, self.persist_dir, self.build_id, partition["collection"],
+                                        vector, k, partition["count"], where)
+                   for partition in self.partitions_for(filters) if partition["count"]]
+        add_counts(partitions=len(futures))
+        return heapq.nsmallest(k, (hit for future in futures for hit in future.result()), key=lambda hit: hit[0])
@@ -16,4 +16,6 @@ CONFIG_FILE_PATH = Path(ROOT_DIR, CONFIG_FOLDER, CONFIG_FILE_NAME)
 
 # Schema file path
 SCHEMA_FILE_NAME = "schema.yaml"
-SCHEMA_FILE_PATH = Path(ROOT_DIR, CONFIG_FOLDER, SCHEMA_FILE_NAME)
\ No newline at end of file
+SCHEMA_FILE_PATH = Path(ROOT_DIR, CONFIG_FOLDER, SCHEMA_FILE_NAME)
+# Fallback poster image used when a book has no image url
+DEFAULT_POSTER_URL = "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcTgVr8P6ExMHCBQEiGITlb89tDlY878ROSfQH-JVVdCTJNHCk9EjKESYuy6-R2x9Qg3ptw&usqp=CAU"
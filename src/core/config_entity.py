@@ -18,13 +18,31 @@ class DataValidationConfig:
     book_schema: dict
     ratings_schema: dict
     STATUS_FILE: Path
+    book_constraints: dict
+    ratings_constraints: dict
+    quarantine_dir: Path
+    report_file_path: Path
+    chunksize: int
+    n_workers: int
+    max_invalid_rate: float
 
 @dataclass(frozen=True)
 class DataTransformationConfig:
     serialized_obj_dir: Path
     common_obj_dir: Path
+    serving_dir: Path
+    dictionary_dir: Path
     books_data_path: Path
     ratings_data_path: Path
+    books_pivot_table_obj_path: Path
+    final_ratings_obj_path: Path
+    book_names_obj_path: Path
+    collapse_editions: bool
+    minhash_permutations: int
+    lsh_bands: int
+    title_similarity: float
+    author_similarity: float
+    item_neighbours: int
 
 @dataclass(frozen=True)
 class ModelTrainerConfig:
@@ -39,8 +57,124 @@ class MLRecommendationConfig:
     books_pivot_table_obj_path: Path
     final_ratings_obj_path: Path
     trained_model_path: Path
+    serving_dir: Path
 
 @dataclass(frozen=True)
 class SemanticRecommendationConfig:
     final_books_obj_path: Path
-    chroma_persist_dir: Path
\ No newline at end of file
+    chroma_persist_dir: Path
+    n_partitions: int
+    partition_strategy: str
+    query_workers: int
+    embed_batch_size: int
+    engine: str
+    quantization: str
+    rescore_factor: int
+    embedding_timeout: float
+    keyword_mode: str
+    fusion_constant: int
+
+@dataclass(frozen=True)
+class BatchRecommendationConfig:
+    serving_dir: Path
+    trained_model_path: Path
+    books_pivot_table_obj_path: Path
+    book_names_obj_path: Path
+    final_ratings_obj_path: Path
+    output_dir: Path
+    output_file: str
+    output_format: str
+    top_k: int
+    batch_size: int
+    n_workers: int
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    root_dir: Path
+    baseline_path: Path
+    n_users: int
+    n_titles: int
+    density: float
+    n_semantic_books: int
+    n_requests: int
+    tolerance: float
+
+@dataclass(frozen=True)
+class WarmupConfig:
+    enabled: bool
+    ml: bool
+    semantic: bool
+    touch_pages: bool
+    ml_requests: int
+    semantic_queries: list
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    isolate_stages: bool
+    report_path: Path
+    memory_limit_mb: int
+    time_limit_s: float
+    stage_limits: dict
+
+@dataclass(frozen=True)
+class LoadTestConfig:
+    report_path: Path
+    concurrency: list
+    qps: float
+    duration: float
+    mix: dict
+    n_queries: int
+    embedding_latency_ms: float
+    embedding_jitter_ms: float
+    embedding_error_rate: float
+    embedding_dimensions: int
+    request_timeout: float
+    seed: int
+
+@dataclass(frozen=True)
+class EvaluationConfig:
+    final_ratings_obj_path: Path
+    report_path: Path
+    engines: list
+    k: int
+    holdout_fraction: float
+    min_user_ratings: int
+    batch_size: int
+    n_workers: int
+    seed: int
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    enabled: bool
+    events_file_path: Path
+    prometheus_file_path: Path
+    flush_interval: float
+    trace_memory: bool
+    http_port: int
+
+@dataclass(frozen=True)
+class PosterCacheConfig:
+    root_dir: Path
+    index_file_path: Path
+    serving_dir: Path
+    semantic_books_obj_path: Path
+    max_workers: int
+    timeout: float
+    display_size: tuple
+    fetch_in_pipeline: bool
+
+@dataclass(frozen=True)
+class SemanticCacheConfig:
+    enabled: bool
+    db_file_path: Path
+    chroma_persist_dir: Path
+    final_books_obj_path: Path
+    max_entries: int
+    memory_entries: int
+
+@dataclass(frozen=True)
+class AsyncRecommenderConfig:
+    ml_workers: int
+    semantic_workers: int
+    ml_timeout: float
+    semantic_timeout: float
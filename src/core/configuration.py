@@ -2,12 +2,25 @@
 # This module handles the loading and management of configuration settings for data ingestion, validation, transformation, and model training.
 import sys
 from pathlib import Path
+from functools import lru_cache
 from src.core.logger import logging
 from src.core.exception import AppException
 from src.utils import read_yaml, create_directories
 from src.constant.constants import *
 from src.core.config_entity import (DataIngestionConfig, DataValidationConfig, DataTransformationConfig, 
-                                      ModelTrainerConfig, MLRecommendationConfig, SemanticRecommendationConfig)
+                                      ModelTrainerConfig, MLRecommendationConfig, SemanticRecommendationConfig,
+                                      BatchRecommendationConfig, BenchmarkConfig, EvaluationConfig, MetricsConfig,
+                                      PosterCacheConfig, SemanticCacheConfig,
+                                      AsyncRecommenderConfig, WarmupConfig, LoadTestConfig, PipelineConfig)
+
+@lru_cache(maxsize=None)
+def load_configuration_files(config_filepath : Path, config_schemapath : Path):
+    """
+    Parses the configuration and schema YAML files once per process and memoizes the result.
+    Returns: tuple of (config, schema) ConfigBox objects
+    """
+    return read_yaml(Path(config_filepath)), read_yaml(Path(config_schemapath))
+
 
 class AppConfiguration:
     def __init__(self, 
@@ -20,8 +33,7 @@ class AppConfiguration:
         config_filepath (str): Path to the configuration file.
         """
         try:
-            self.config = read_yaml(config_filepath)
-            self.schema = read_yaml(config_schemapath)
+            self.config, self.schema = load_configuration_files(config_filepath, config_schemapath)
 
         except Exception as e:
             logging.error(f"Failed to load configuration: {e}", exc_info=True)
@@ -88,7 +100,14 @@ class AppConfiguration:
                 ratings_csvfile = ratings_csvfile_path,
                 book_schema = book_schema,
                 ratings_schema = ratings_schema,
-                STATUS_FILE = STATUS_FILE_PATH
+                STATUS_FILE = STATUS_FILE_PATH,
+                book_constraints = self.schema.BOOKS_CONSTRAINTS,
+                ratings_constraints = self.schema.RATINGS_CONSTRAINTS,
+                quarantine_dir = Path(validation_root_dir, validation_config.quarantine_dir),
+                report_file_path = Path(validation_root_dir, validation_config.report_file),
+                chunksize = validation_config.chunksize,
+                n_workers = validation_config.n_workers,
+                max_invalid_rate = validation_config.max_invalid_rate
             )
 
             logging.info("Data Validation process Configuration creation successfull")
@@ -107,9 +126,11 @@ class AppConfiguration:
         try:
             transformation_config = self.config.data_transformation
             validation_config = self.config.data_validation
+            trainer_config = self.config.model_trainer
 
             create_directories([transformation_config.serialized_obj_dir])
             create_directories([transformation_config.common_obj_dir])
+            create_directories([transformation_config.dictionary_dir])
             
             books_data = transformation_config.valid_books_dataset
             ratings_data = transformation_config.valid_ratings_dataset
@@ -122,8 +143,19 @@ class AppConfiguration:
             transformation_configiguration = DataTransformationConfig(
                 serialized_obj_dir = serialized_obj_dir,
                 common_obj_dir = common_obj_dir,
+                serving_dir = Path(transformation_config.serving_dir),
+                dictionary_dir = Path(transformation_config.dictionary_dir),
                 books_data_path = books_data_path,
                 ratings_data_path = ratings_data_path,
+                books_pivot_table_obj_path = Path(serialized_obj_dir, trainer_config.books_pivot_table),
+                final_ratings_obj_path = Path(serialized_obj_dir, transformation_config.final_ratings),
+                book_names_obj_path = Path(common_obj_dir, transformation_config.book_names),
+                collapse_editions = transformation_config.collapse_editions,
+                minhash_permutations = transformation_config.minhash_permutations,
+                lsh_bands = transformation_config.lsh_bands,
+                title_similarity = transformation_config.title_similarity,
+                author_similarity = transformation_config.author_similarity,
+                item_neighbours = transformation_config.item_neighbours,
             )
 
             logging.info("Data Transformation Configuration creation successfull")
@@ -172,21 +204,24 @@ class AppConfiguration:
         """
         try:
             recommender_config = self.config.ml_recommender
+            transformation_config = self.config.data_transformation
+            trainer_config = self.config.model_trainer
             serialized_obj_dir = recommender_config.serialized_obj_dir
             common_obj_dir = recommender_config.common_obj_dir
             
-            book_names_obj_path = Path(common_obj_dir, "book_names.pkl")
-            books_pivot_table_obj_path = Path(serialized_obj_dir, "books_pivot_table.pkl")
-            final_ratings_obj_path = Path(serialized_obj_dir, "final_ratings.pkl")
+            book_names_obj_path = Path(common_obj_dir, transformation_config.book_names)
+            books_pivot_table_obj_path = Path(serialized_obj_dir, trainer_config.books_pivot_table)
+            final_ratings_obj_path = Path(serialized_obj_dir, transformation_config.final_ratings)
 
-            trained_model_path = Path(recommender_config.trained_model_dir, "model.pkl")
+            trained_model_path = Path(recommender_config.trained_model_dir, trainer_config.trained_model)
           
             ml_recommendation_configuration = MLRecommendationConfig(
                 serialized_obj_dir = serialized_obj_dir,
                 book_names_obj_path = book_names_obj_path,
                 books_pivot_table_obj_path = books_pivot_table_obj_path,
                 final_ratings_obj_path = final_ratings_obj_path,
-                trained_model_path = trained_model_path
+                trained_model_path = trained_model_path,
+                serving_dir = Path(recommender_config.serving_dir)
             )
 
             logging.info(f"ML-Recommender Configuration creation successfull")
@@ -210,7 +245,17 @@ class AppConfiguration:
 
             sm_recommendation_configuration =  SemanticRecommendationConfig(
                 final_books_obj_path = books_obj_path,
-                chroma_persist_dir = vectorstore_dir
+                chroma_persist_dir = vectorstore_dir,
+                n_partitions = recommender_config.n_partitions,
+                partition_strategy = recommender_config.partition_strategy,
+                query_workers = recommender_config.query_workers,
+                embed_batch_size = recommender_config.embed_batch_size,
+                engine = recommender_config.engine,
+                quantization = recommender_config.quantization,
+                rescore_factor = recommender_config.rescore_factor,
+                embedding_timeout = recommender_config.embedding_timeout,
+                keyword_mode = recommender_config.keyword_mode,
+                fusion_constant = recommender_config.fusion_constant
             )
 
             logging.info(f"Semantic Recommender Configuration creation successfull")
@@ -219,4 +264,294 @@ class AppConfiguration:
         except Exception as e:
             logging.error(f"Error while creating Semantic Recommender Configuration: {e}", exc_info=True)
             raise AppException(e, sys)
-        
\ No newline at end of file
+        
+
+    def batch_recommendation_config(self) -> BatchRecommendationConfig:
+        """
+        Creates the configuration for the offline Batch Recommender 
+        Returns: BatchRecommendationConfig object
+        """
+        try:
+            batch_config = self.config.batch_recommender
+            recommender_config = self.config.ml_recommender
+            transformation_config = self.config.data_transformation
+            trainer_config = self.config.model_trainer
+
+            create_directories([batch_config.root_dir])
+
+            batch_recommendation_configuration = BatchRecommendationConfig(
+                serving_dir = Path(recommender_config.serving_dir),
+                trained_model_path = Path(recommender_config.trained_model_dir, trainer_config.trained_model),
+                books_pivot_table_obj_path = Path(recommender_config.serialized_obj_dir, trainer_config.books_pivot_table),
+                book_names_obj_path = Path(recommender_config.common_obj_dir, transformation_config.book_names),
+                final_ratings_obj_path = Path(recommender_config.serialized_obj_dir, transformation_config.final_ratings),
+                output_dir = Path(batch_config.root_dir),
+                output_file = batch_config.output_file,
+                output_format = batch_config.output_format,
+                top_k = batch_config.top_k,
+                batch_size = batch_config.batch_size,
+                n_workers = batch_config.n_workers
+            )
+
+            logging.info("Batch Recommender Configuration creation successfull")
+            return batch_recommendation_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Batch Recommender Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def warmup_config(self) -> WarmupConfig:
+        """
+        Creates the configuration for the Warm-up of the serving processes 
+        Returns: WarmupConfig object
+        """
+        try:
+            warmup_config = self.config.warmup
+
+            warmup_configuration = WarmupConfig(
+                enabled = warmup_config.enabled,
+                ml = warmup_config.ml,
+                semantic = warmup_config.semantic,
+                touch_pages = warmup_config.touch_pages,
+                ml_requests = warmup_config.ml_requests,
+                semantic_queries = list(warmup_config.semantic_queries)
+            )
+
+            logging.info("Warmup Configuration creation successfull")
+            return warmup_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Warmup Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def pipeline_config(self) -> PipelineConfig:
+        """
+        Creates the configuration for the bounded-memory execution of the ML Pipeline stages 
+        Returns: PipelineConfig object
+        """
+        try:
+            pipeline_config = self.config.pipeline
+            create_directories([pipeline_config.root_dir])
+
+            pipeline_configuration = PipelineConfig(
+                isolate_stages = pipeline_config.isolate_stages,
+                report_path = Path(pipeline_config.root_dir, pipeline_config.report_file).resolve(),
+                memory_limit_mb = pipeline_config.memory_limit_mb,
+                time_limit_s = pipeline_config.time_limit_s,
+                stage_limits = {stage: dict(limits) for stage, limits in pipeline_config.stage_limits.items()}
+            )
+
+            logging.info("Pipeline Configuration creation successfull")
+            return pipeline_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Pipeline Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def load_test_config(self) -> LoadTestConfig:
+        """
+        Creates the configuration for the Load Generator 
+        Returns: LoadTestConfig object
+        """
+        try:
+            load_config = self.config.load_test
+            create_directories([load_config.root_dir])
+
+            load_test_configuration = LoadTestConfig(
+                report_path = Path(load_config.root_dir, load_config.report_file).resolve(),
+                concurrency = list(load_config.concurrency),
+                qps = load_config.qps,
+                duration = load_config.duration,
+                mix = dict(load_config.mix),
+                n_queries = load_config.n_queries,
+                embedding_latency_ms = load_config.embedding_latency_ms,
+                embedding_jitter_ms = load_config.embedding_jitter_ms,
+                embedding_error_rate = load_config.embedding_error_rate,
+                embedding_dimensions = load_config.embedding_dimensions,
+                request_timeout = load_config.request_timeout,
+                seed = load_config.seed
+            )
+
+            logging.info("Load Test Configuration creation successfull")
+            return load_test_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Load Test Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def evaluation_config(self) -> EvaluationConfig:
+        """
+        Creates the configuration for the offline Evaluation of the recommendation engines 
+        Returns: EvaluationConfig object
+        """
+        try:
+            evaluation_config = self.config.evaluation
+            recommender_config = self.config.ml_recommender
+            transformation_config = self.config.data_transformation
+
+            create_directories([evaluation_config.root_dir])
+
+            evaluation_configuration = EvaluationConfig(
+                final_ratings_obj_path = Path(recommender_config.serialized_obj_dir, transformation_config.final_ratings),
+                report_path = Path(evaluation_config.root_dir, evaluation_config.report_file),
+                engines = list(evaluation_config.engines),
+                k = evaluation_config.k,
+                holdout_fraction = evaluation_config.holdout_fraction,
+                min_user_ratings = evaluation_config.min_user_ratings,
+                batch_size = evaluation_config.batch_size,
+                n_workers = evaluation_config.n_workers,
+                seed = evaluation_config.seed
+            )
+
+            logging.info("Evaluation Configuration creation successfull")
+            return evaluation_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Evaluation Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def benchmark_config(self) -> BenchmarkConfig:
+        """
+        Creates the configuration for the Benchmark suite 
+        Returns: BenchmarkConfig object
+        """
+        try:
+            benchmark_config = self.config.benchmark
+            create_directories([benchmark_config.root_dir])
+
+            benchmark_configuration = BenchmarkConfig(
+                root_dir = Path(benchmark_config.root_dir).resolve(),
+                baseline_path = Path(benchmark_config.baseline_file).resolve(),
+                n_users = benchmark_config.n_users,
+                n_titles = benchmark_config.n_titles,
+                density = benchmark_config.density,
+                n_semantic_books = benchmark_config.n_semantic_books,
+                n_requests = benchmark_config.n_requests,
+                tolerance = benchmark_config.tolerance
+            )
+
+            logging.info("Benchmark Configuration creation successfull")
+            return benchmark_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Benchmark Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def metrics_config(self) -> MetricsConfig:
+        """
+        Creates the configuration for the Metrics instrumentation 
+        Returns: MetricsConfig object
+        """
+        try:
+            metrics_config = self.config.metrics
+            create_directories([metrics_config.root_dir])
+
+            metrics_configuration = MetricsConfig(
+                enabled = metrics_config.enabled,
+                events_file_path = Path(metrics_config.root_dir, metrics_config.events_file).resolve(),
+                prometheus_file_path = Path(metrics_config.root_dir, metrics_config.prometheus_file).resolve(),
+                flush_interval = metrics_config.flush_interval,
+                trace_memory = metrics_config.trace_memory,
+                http_port = metrics_config.http_port
+            )
+
+            logging.info("Metrics Configuration creation successfull")
+            return metrics_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Metrics Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def poster_cache_config(self) -> PosterCacheConfig:
+        """
+        Creates the configuration for the Poster Cache 
+        Returns: PosterCacheConfig object
+        """
+        try:
+            cache_config = self.config.poster_cache
+            semantic_config = self.config.semantic_recommender
+            create_directories([cache_config.root_dir])
+
+            poster_cache_configuration = PosterCacheConfig(
+                root_dir = Path(cache_config.root_dir),
+                index_file_path = Path(cache_config.root_dir, cache_config.index_file),
+                serving_dir = Path(self.config.ml_recommender.serving_dir),
+                semantic_books_obj_path = Path(semantic_config.root_dir, semantic_config.semantic_books_dataset),
+                max_workers = cache_config.max_workers,
+                timeout = cache_config.timeout,
+                display_size = (cache_config.display_width, cache_config.display_height),
+                fetch_in_pipeline = cache_config.fetch_in_pipeline
+            )
+
+            logging.info("Poster Cache Configuration creation successfull")
+            return poster_cache_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Poster Cache Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def semantic_cache_config(self) -> SemanticCacheConfig:
+        """
+        Creates the configuration for the Semantic Recommender result cache 
+        Returns: SemanticCacheConfig object
+        """
+        try:
+            cache_config = self.config.semantic_cache
+            semantic_config = self.config.semantic_recommender
+            create_directories([cache_config.root_dir])
+
+            semantic_cache_configuration = SemanticCacheConfig(
+                enabled = cache_config.enabled,
+                db_file_path = Path(cache_config.root_dir, cache_config.db_file).resolve(),
+                chroma_persist_dir = Path(semantic_config.root_dir, semantic_config.vectorstore).resolve(),
+                final_books_obj_path = Path(semantic_config.root_dir, semantic_config.semantic_books_dataset).resolve(),
+                max_entries = cache_config.max_entries,
+                memory_entries = cache_config.memory_entries
+            )
+
+            logging.info("Semantic Cache Configuration creation successfull")
+            return semantic_cache_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Semantic Cache Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def async_recommender_config(self) -> AsyncRecommenderConfig:
+        """
+        Creates the configuration for the asyncio Recommender facade 
+        Returns: AsyncRecommenderConfig object
+        """
+        try:
+            async_config = self.config.async_recommender
+
+            async_recommender_configuration = AsyncRecommenderConfig(
+                ml_workers = async_config.ml_workers,
+                semantic_workers = async_config.semantic_workers,
+                ml_timeout = async_config.ml_timeout,
+                semantic_timeout = async_config.semantic_timeout
+            )
+
+            logging.info("Async Recommender Configuration creation successfull")
+            return async_recommender_configuration
+
+        except Exception as e:
+            logging.error(f"Error while creating Async Recommender Configuration: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+@lru_cache(maxsize=None)
+def get_app_configuration() -> AppConfiguration:
+    """
+    Returns the process wide AppConfiguration built from the default configuration files.
+    Components use it when no configuration object is passed explicitly.
+    """
+    return AppConfiguration()
@@ -1,25 +1,221 @@
 # This script sets up the logging configuration for the project.
-# Creates a log file with a timestamp in the name and sets up logging to both a file and the console.
+# Log records are handed to a queue on the calling thread and written by a background listener to a
+# size-rotated log file and the console, so logging I/O stays off the request path.
+# Size-based rotation renames files and is not safe across processes, so every process (the app, pool workers,
+# pipeline stage subprocesses, command line jobs) writes and rotates its own file, named after its pid. On startup
+# a process deletes the files of exited processes beyond the `keep_exited` most recent ones, so the log directory
+# stays bounded however many processes ran.
+# Settings (rotation, JSON formatting, per-module levels) are read from the `logging` section of config.yaml.
 import os
+import re
 import sys
+import copy
+import json
+import queue
+import atexit
 import logging
-from datetime import datetime
+import logging.handlers
+from datetime import datetime, timezone
+import yaml
+from src.constant.constants import CONFIG_FILE_PATH
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path = os.path.join(os.getcwd(), "logs", LOG_FILE)
+TEXT_FORMAT = "[ %(asctime)s ]: %(levelname)s - %(lineno)d %(module)s - %(message)s"
 
-# Create a logs directory if it doesn't exist
-os.makedirs(logs_path, exist_ok = True)
+DEFAULT_LOG_CONFIG = {
+    "log_dir": "logs",
+    "log_file": "app.log",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "keep_exited": 10,
+    "level": "INFO",
+    "json_format": True,
+    "console": True,
+    "module_levels": {},
+}
 
-LOG_FILE_PATH = os.path.join(logs_path,LOG_FILE)
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as single line JSON objects.
+    """
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "lineno": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Drops records below the level configured for the module that emitted them.
+    """
+    def __init__(self, module_levels):
+        super().__init__()
+        self.module_levels = {module: logging.getLevelName(str(level).upper()) for module, level in module_levels.items()}
+
+    def filter(self, record):
+        level = self.module_levels.get(record.module)
+        return level is None or record.levelno >= level
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that only renders the message and traceback text on the calling thread, leaving the
+    final formatting to the handlers of the listener.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def load_log_config(config_filepath = CONFIG_FILE_PATH):
+    """
+    Reads the `logging` section of the configuration file, falling back to the defaults.
+    The file is read directly because the configuration helpers themselves depend on this logger.
+
+    Returns:
+        dict: The logging settings.
+    """
+    log_config = dict(DEFAULT_LOG_CONFIG)
+    try:
+        with open(config_filepath) as yaml_file:
+            log_config.update((yaml.safe_load(yaml_file) or {}).get("logging") or {})
+    except (OSError, yaml.YAMLError):
+        pass
+    return log_config
+
+
+def log_file_path(log_config, pid = None):
+    """
+    Log file of a process: the configured file name with the pid before its extension, e.g. logs/app.1234.log.
+    """
+    stem, extension = os.path.splitext(log_config["log_file"])
+    return os.path.join(LOG_DIR, f"{stem}.{pid or os.getpid()}{extension}")
+
+
+def _pid_alive(pid):
+    if os.name != "posix":
+        # without a safe liveness check, the OS refuses to delete the files a running process holds open
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def prune_log_files(log_config):
+    """
+    Deletes the log files (with their rotated backups) of exited processes, keeping those of the `keep_exited`
+    processes that wrote last.
+    """
+    stem, extension = os.path.splitext(log_config["log_file"])
+    pattern = re.compile(rf"{re.escape(stem)}\.(\d+){re.escape(extension)}(\.\d+)?")
+    exited = {}
+    try:
+        for entry in os.scandir(LOG_DIR):
+            match = pattern.fullmatch(entry.name)
+            if match and int(match.group(1)) != os.getpid() and not _pid_alive(int(match.group(1))):
+                files = exited.setdefault(int(match.group(1)), [])
+                files.append((entry.stat().st_mtime, entry.path))
+    except OSError:
+        return
+
+    by_last_write = sorted(exited.values(), key=lambda files: max(files)[0], reverse=True)
+    for files in by_last_write[int(log_config["keep_exited"]):]:
+        for _, path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def create_handlers(log_config):
+    """
+    Creates the output handlers written to by the queue listener.
+    """
+    os.makedirs(LOG_DIR, exist_ok = True)
+
+    file_handler = logging.handlers.RotatingFileHandler(log_file_path(log_config),
+                                                        maxBytes = int(log_config["max_bytes"]),
+                                                        backupCount = int(log_config["backup_count"]),
+                                                        encoding = "utf-8")
+    file_handler.setFormatter(JsonFormatter() if log_config["json_format"] else logging.Formatter(TEXT_FORMAT))
+    handlers = [file_handler]
+
+    # the console keeps the human readable format
+    if log_config["console"]:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    return handlers
+
+
+def start_listener(handler, handlers):
+    """
+    Attaches a fresh queue to `handler` and starts a background listener draining it into `handlers`.
+    """
+    log_queue = queue.SimpleQueue()
+    handler.queue = log_queue
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level = True)
+    listener.start()
+    return listener
+
+
+LOG_CONFIG = load_log_config()
+LOG_DIR = os.path.join(os.getcwd(), LOG_CONFIG["log_dir"])
+
+_output_handlers = create_handlers(LOG_CONFIG)
+prune_log_files(LOG_CONFIG)
+queue_handler = AsyncQueueHandler(queue.SimpleQueue())
+queue_handler.addFilter(ModuleLevelFilter(LOG_CONFIG["module_levels"]))
+listener = start_listener(queue_handler, _output_handlers)
+_listener_running = True
+
+
+def _restart_listener_in_child():
+    # the listener thread does not survive a fork, so worker processes get their own, writing to their own file
+    global listener, _output_handlers, _listener_running
+    _output_handlers = create_handlers(LOG_CONFIG)
+    listener = start_listener(queue_handler, _output_handlers)
+    _listener_running = True
+
+
+def stop_listener():
+    """
+    Flushes the pending records and stops the background listener.
+    """
+    global _listener_running
+    if _listener_running:
+        _listener_running = False
+        listener.stop()
+
+
+os.register_at_fork(after_in_child = _restart_listener_in_child)
+atexit.register(stop_listener)
 
 # logging configuration
 logging.basicConfig(
-    format = "[ %(asctime)s ]: %(levelname)s - %(lineno)d %(module)s - %(message)s",
-    level = logging.INFO,
-    
-    handlers=[
-        logging.FileHandler(LOG_FILE_PATH),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
\ No newline at end of file
+    level = LOG_CONFIG["level"],
+    handlers = [queue_handler]
+)
@@ -0,0 +1,328 @@
+# This module provides lightweight instrumentation for the pipeline stages and the recommenders.
+# Every tracked operation records wall time, CPU time, the RSS growth of the process, optionally the peak of the traced
+# Python allocations, and row/nnz counts, which are exported as structured JSON events and as Prometheus-style text
+# metrics (a file rewritten every flush_interval seconds and an optional HTTP endpoint).
+import json
+import mmap
+import time
+import atexit
+import threading
+import functools
+import tracemalloc
+import contextvars
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging.handlers
+from src.core.logger import logging, LOG_CONFIG, AsyncQueueHandler, start_listener
+
+# Latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+METRIC_PREFIX = "bookrec"
+
+# Event of the innermost operation tracked in the current thread / task
+_current_event = contextvars.ContextVar("current_event", default=None)
+
+
+def current_rss_bytes():
+    """
+    Returns the current resident set size of the process in bytes, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MetricsRegistry:
+    def __init__(self, metrics_config = None):
+        """
+        Initializes the MetricsRegistry object.
+        Args:
+            metrics_config (MetricsConfig, optional): Metrics settings. Without it events are only
+            aggregated in memory.
+        """
+        self.config = metrics_config
+        self.enabled = metrics_config.enabled if metrics_config is not None else True
+        self.trace_memory = metrics_config.trace_memory if metrics_config is not None else False
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._stop_flushing = threading.Event()
+
+        self.events_logger = logging.getLogger("metrics.events")
+        self.events_logger.propagate = False
+        if metrics_config is not None and metrics_config.enabled and not self.events_logger.handlers:
+            # events are written by a background listener, like the application logs
+            file_handler = logging.handlers.RotatingFileHandler(metrics_config.events_file_path,
+                                                                maxBytes = LOG_CONFIG["max_bytes"],
+                                                                backupCount = LOG_CONFIG["backup_count"],
+                                                                encoding = "utf-8")
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            handler = AsyncQueueHandler(None)
+            self._listener = start_listener(handler, [file_handler])
+            atexit.register(self._listener.stop)
+            self.events_logger.addHandler(handler)
+            self.events_logger.setLevel(logging.INFO)
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        if metrics_config is not None and metrics_config.enabled:
+            # the Prometheus file is rewritten in the background, never on the path of a tracked request
+            threading.Thread(target=self._flush_periodically, name="metrics-flush", daemon=True).start()
+            atexit.register(self._stop_flushing.set)
+
+
+    def _flush_periodically(self):
+        while not self._stop_flushing.wait(self.config.flush_interval):
+            self.flush()
+
+
+    def record(self, event):
+        """
+        Aggregates a finished operation event and exports it as a JSON line.
+        Args:
+            event (dict): The event produced by `track`.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            stats = self._operations.setdefault(event["operation"], {
+                "count": 0, "errors": 0, "wall_seconds_sum": 0.0, "cpu_seconds_sum": 0.0,
+                "buckets": [0] * len(LATENCY_BUCKETS), "max_rss_growth_bytes": 0, "peak_alloc_bytes": 0,
+                "counts": {}
+            })
+            stats["count"] += 1
+            stats["errors"] += int(event["status"] != "ok")
+            stats["wall_seconds_sum"] += event["wall_s"]
+            stats["cpu_seconds_sum"] += event["cpu_s"]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if event["wall_s"] <= bound:
+                    stats["buckets"][i] += 1
+            stats["max_rss_growth_bytes"] = max(stats["max_rss_growth_bytes"], event.get("rss_delta_bytes") or 0)
+            stats["peak_alloc_bytes"] = max(stats["peak_alloc_bytes"], event.get("peak_alloc_bytes", 0))
+            stats["counts"].update(event["counts"])
+
+        self.events_logger.info(json.dumps(event, default=str))
+
+
+    def render_prometheus(self):
+        """
+        Renders the aggregated metrics in the Prometheus text exposition format.
+        Returns:
+            str: The metrics text.
+        """
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_operation_seconds Wall time of tracked operations.",
+            f"# TYPE {p}_operation_seconds histogram",
+        ]
+        with self._lock:
+            operations = {name: dict(stats, counts=dict(stats["counts"])) for name, stats in self._operations.items()}
+
+        for name, stats in operations.items():
+            for bound, value in zip(LATENCY_BUCKETS, stats["buckets"]):
+                lines.append(f'{p}_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {value}')
+            lines.append(f'{p}_operation_seconds_bucket{{operation="{name}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{p}_operation_seconds_sum{{operation="{name}"}} {stats["wall_seconds_sum"]:.6f}')
+            lines.append(f'{p}_operation_seconds_count{{operation="{name}"}} {stats["count"]}')
+
+        sections = [
+            ("operation_cpu_seconds_total", "counter", "CPU time of tracked operations.", "cpu_seconds_sum"),
+            ("operation_errors_total", "counter", "Failed tracked operations.", "errors"),
+            ("operation_max_rss_growth_bytes", "gauge", "Largest growth of the process RSS over one run of the operation.",
+             "max_rss_growth_bytes"),
+            ("operation_peak_alloc_bytes", "gauge", "Peak traced Python allocations during the operation.", "peak_alloc_bytes"),
+        ]
+        for metric, kind, help_text, key in sections:
+            lines.append(f"# HELP {p}_{metric} {help_text}")
+            lines.append(f"# TYPE {p}_{metric} {kind}")
+            for name, stats in operations.items():
+                value = stats[key]
+                lines.append(f'{p}_{metric}{{operation="{name}"}} {value:.6f}' if isinstance(value, float)
+                             else f'{p}_{metric}{{operation="{name}"}} {value}')
+
+        lines.append(f"# HELP {p}_operation_items Row/nnz counts reported by the last run of the operation.")
+        lines.append(f"# TYPE {p}_operation_items gauge")
+        for name, stats in operations.items():
+            for item, value in stats["counts"].items():
+                lines.append(f'{p}_operation_items{{operation="{name}",item="{item}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+    def flush(self):
+        """
+        Writes the Prometheus text metrics to the configured file.
+        """
+        if self.config is None or not self.enabled:
+            return
+        try:
+            tmp_path = self.config.prometheus_file_path.with_suffix(".tmp")
+            tmp_path.write_text(self.render_prometheus())
+            tmp_path.replace(self.config.prometheus_file_path)
+
+        except Exception as e:
+            logging.warning(f"Failed to write Prometheus metrics file: {e}")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+_server = None
+
+
+def get_registry():
+    """
+    Returns the process wide metrics registry, creating it from the application configuration on first use.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                try:
+                    from src.core.configuration import get_app_configuration
+                    registry = MetricsRegistry(get_app_configuration().metrics_config())
+
+                except Exception as e:
+                    logging.warning(f"Metrics configuration unavailable, keeping metrics in memory only: {e}")
+                    registry = MetricsRegistry()
+
+                atexit.register(registry.flush)
+                _registry = registry
+    return _registry
+
+
+def add_counts(**counts):
+    """
+    Attaches row/nnz style counts to the operation currently being tracked.
+    Example: add_counts(rows=len(df), nnz=matrix.nnz)
+    """
+    event = _current_event.get()
+    if event is not None:
+        event["counts"].update({key: int(value) for key, value in counts.items()})
+
+
+@contextmanager
+def track(operation):
+    """
+    Context manager recording wall time, CPU time, RSS growth, traced allocation peak and counts of an operation.
+    Args:
+        operation (str): Name of the operation, e.g. "pipeline.data_transformation".
+    """
+    registry = get_registry()
+    if not registry.enabled:
+        yield None
+        return
+
+    parent = _current_event.get()
+    event = {"operation": operation, "status": "ok", "counts": {}}
+    token = _current_event.set(event)
+
+    tracing = registry.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    wall_start, cpu_start, rss_start = time.perf_counter(), time.thread_time(), current_rss_bytes()
+    try:
+        yield event
+
+    except BaseException:
+        event["status"] = "error"
+        raise
+
+    finally:
+        event["wall_s"] = round(time.perf_counter() - wall_start, 6)
+        event["cpu_s"] = round(time.thread_time() - cpu_start, 6)
+        # change of the whole process RSS, which includes the allocations of concurrent operations
+        rss_end = current_rss_bytes()
+        event["rss_delta_bytes"] = rss_end - rss_start if rss_start is not None and rss_end is not None else None
+        if tracing:
+            event["peak_alloc_bytes"] = max(tracemalloc.get_traced_memory()[1], event.get("peak_alloc_bytes", 0))
+            # the peak of a nested operation also bounds the peak of its parent
+            if parent is not None:
+                parent["peak_alloc_bytes"] = max(parent.get("peak_alloc_bytes", 0), event["peak_alloc_bytes"])
+        event["timestamp"] = datetime.now(timezone.utc).isoformat()
+
+        _current_event.reset(token)
+        registry.record(event)
+
+
+def instrument(operation):
+    """
+    Decorator tracking every call of the decorated function as `operation`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path in ("/ready", "/health"):
+            self._send_probe(path)
+            return
+        # with metrics disabled the endpoint only serves the probes
+        if path != "/metrics" or not get_registry().enabled:
+            self.send_error(404)
+            return
+        body = get_registry().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_probe(self, path):
+        """
+        /health answers 200 while the process is alive; /ready answers 200 once the warm-up finished and 503
+        before, with the readiness state as JSON.
+        """
+        from src.core.readiness import readiness
+        ready, state = readiness()
+        body = json.dumps(state if path == "/ready" else {"status": "alive"}).encode("utf-8")
+        self.send_response(200 if ready or path == "/health" else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port = None):
+    """
+    Serves the Prometheus text metrics at http://0.0.0.0:<port>/metrics from a daemon thread, next to the
+    /ready readiness and /health liveness probes. The probes are served even with metrics disabled.
+    Calling it again is a no-op. A port of 0 disables the endpoint, probes included.
+
+    Args:
+        port (int, optional): Port to listen on. Defaults to the configured `http_port`.
+    """
+    global _server
+    if _server is not None:
+        return _server
+
+    registry = get_registry()
+    if port is None and registry.config is not None:
+        port = registry.config.http_port
+    if not port:
+        logging.warning("Metrics endpoint disabled, the /ready and /health probes are not served")
+        return None
+
+    try:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        served = "metrics and probes" if registry.enabled else "probes only, metrics disabled"
+        logging.info(f"Metrics endpoint started at port {port} ({served})")
+
+    except OSError as e:
+        logging.warning(f"Failed to start metrics endpoint at port {port}: {e}")
+
+    return _server
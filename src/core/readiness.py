@@ -0,0 +1,40 @@
+# Readiness state of a serving process.
+# A process starts as "starting" and only becomes "ready" once its warm-up routine has loaded the artifacts and served
+# its synthetic requests; the state of every warmed-up component is kept for the readiness response. The load balancer
+# polls it at /ready of the metrics endpoint and only routes traffic to ready processes.
+import time
+import threading
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+_lock = threading.Lock()
+_state = {"status": STARTING, "started_at": time.time(), "components": {}}
+
+
+def set_component(name, status, **detail):
+    """
+    Records the warm-up state of a component, e.g. set_component("ml", "ok", wall_s = 1.2).
+    """
+    with _lock:
+        _state["components"][name] = {"status": status, **detail}
+
+
+def set_status(status):
+    """
+    Sets the readiness status of the process: STARTING, READY or FAILED.
+    """
+    with _lock:
+        _state["status"] = status
+        _state["updated_at"] = time.time()
+
+
+def readiness():
+    """
+    Returns:
+        tuple: (ready, state) where state is a JSON serializable copy of the process state.
+    """
+    with _lock:
+        state = {**_state, "components": {name: dict(detail) for name, detail in _state["components"].items()}}
+    return state["status"] == READY, state
@@ -0,0 +1,95 @@
+# Single-flight request coalescing.
+# Concurrent calls with the same key share one in-flight computation: the first caller runs it, every caller that
+# arrives before it finishes waits for the same result (or exception). Threaded and asyncio callers share the same
+# in-flight calls, asyncio callers wait without blocking the event loop.
+import asyncio
+import threading
+from concurrent.futures import Future
+from src.core.metrics import add_counts
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls. Nothing is cached: once a call finishes its key is released and
+    the next call computes again. Results are shared between the coalesced callers and must be treated
+    as read-only.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        # running leader tasks, referenced until they finish
+        self.tasks = set()
+        self.stats = {"executed": 0, "coalesced": 0}
+
+
+    def _join(self, key):
+        """
+        Returns the in-flight future of `key` and whether the caller has to run the computation.
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = self.calls[key] = Future()
+            self.stats["executed"] += 1
+            return future, True
+
+
+    def _run(self, key, future, fn, args, kwargs):
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)`, or waits for the identical call already in flight.
+        Args:
+            key (hashable): Normalized identity of the call.
+            fn (callable): The computation.
+
+        Returns:
+            The result of the shared computation. Its exception is raised to every coalesced caller.
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn, args, kwargs)
+        else:
+            add_counts(coalesced=1)
+        return future.result()
+
+
+    def _settle(self, key, future, task):
+        self.tasks.discard(task)
+        if task.cancelled():
+            future.set_exception(asyncio.CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+        with self.lock:
+            del self.calls[key]
+
+
+    async def do_async(self, key, fn, *args, executor = None, **kwargs):
+        """
+        Asyncio variant of `do`. A coroutine function runs as a task on the running loop; a blocking function
+        runs on `executor` (the loop's default executor when None). Waiting callers are suspended instead of
+        blocking the event loop.
+        """
+        future, leader = self._join(key)
+        if leader and asyncio.iscoroutinefunction(fn):
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self.tasks.add(task)
+            task.add_done_callback(lambda task: self._settle(key, future, task))
+        elif leader:
+            asyncio.get_running_loop().run_in_executor(executor, self._run, key, future, fn, args, kwargs)
+        else:
+            add_counts(coalesced=1)
+        # shielded, so a cancelled waiter doesn't cancel the computation shared with the other callers
+        return await asyncio.shield(asyncio.wrap_future(future))
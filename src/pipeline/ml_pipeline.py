@@ -1,12 +1,18 @@
 # This file implements the main ML Pipeline that orchestrates the various stages of the machine learning process.
 # Includes data ingestion, validation, transformation, and model training.
+# With isolate_stages configured, every stage runs in its own subprocess within its memory and time budgets
+# (see src/pipeline/stage_runner.py); on platforms without resource limits the stages run in-process.
 import sys
 from src.core.logger import logging
 from src.core.exception import AppException
+from src.core.metrics import instrument
+from src.core.configuration import get_app_configuration
 from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
+from src.components.poster_cache import PosterCache
+from src.pipeline.stage_runner import StageRunner, isolation_supported
 
 class MLPipeline:
     def __init__(self):
@@ -17,15 +23,24 @@ class MLPipeline:
         self.data_validation = DataValidation()
         self.data_transformation = DataTransformation()
         self.model_trainer = ModelTrainer()
+        self.poster_cache = PosterCache()
+        self.pipeline_config = get_app_configuration().pipeline_config()
     
+    @instrument("pipeline.main")
     def main(self):
         """
         Initiates the Machine Learning Pipeline which involves stages like Data Ingestion, Data Validation,
         Data Transformation and Model Training.
 
         Raises:
-            AppException: If any stage of the pipeline fails
+            AppException: If any stage of the pipeline fails or exceeds its memory or time budget
         """
+        if self.pipeline_config.isolate_stages:
+            if isolation_supported():
+                return self.run_isolated()
+            logging.warning("Stage isolation needs resource limits and os.wait4 (Unix only), running the stages "
+                            "in-process")
+
         try:
             logging.info("\n\n STAGE:1 Data Ingestion Stage Initiated")
             self.data_ingestion.initiate_data_ingestion()
@@ -38,10 +53,39 @@ class MLPipeline:
 
             logging.info("STAGE:3 Model Training Stage Initiated")
             self.model_trainer.initiate_training()
+
+            if self.poster_cache.poster_cache_config.fetch_in_pipeline:
+                logging.info("STAGE:5 Poster Caching Stage Initiated")
+                self.poster_cache.initiate_poster_caching()
         
         except Exception as e:
             logging.error(f"ML Pipeline Terminated: {e}", exc_info=True)
             raise AppException(e, sys)
+
+
+    def run_isolated(self):
+        """
+        Runs every stage in its own subprocess within its configured memory and time budgets and stops at the
+        first stage that fails or exceeds a budget. The peak RSS and wall time of every stage are written to the
+        stage report.
+
+        Returns:
+            list: Stage report entries.
+        """
+        try:
+            runner = StageRunner()
+            stages = ["data_ingestion", "data_validation", "data_transformation", "model_training"]
+            if self.poster_cache.poster_cache_config.fetch_in_pipeline:
+                stages.append("poster_caching")
+
+            for number, stage in enumerate(stages, start=1):
+                logging.info(f"STAGE:{number} {stage.replace('_', ' ').title()} Stage Initiated")
+                runner.run(stage)
+            return runner.report
+
+        except Exception as e:
+            logging.error(f"ML Pipeline Terminated: {e}", exc_info=True)
+            raise AppException(e, sys)
         
 if __name__=='__main__':
     try:
@@ -0,0 +1,191 @@
+# Bounded-memory execution of the ML pipeline stages.
+# Every stage runs in its own Python subprocess (`python -m src.pipeline.stage_runner <stage>`), so everything a stage
+# allocates is returned to the OS when it exits and the next stage starts from a clean heap instead of inheriting the
+# intermediates of the previous ones. The child first caps its data segment (RLIMIT_DATA) at the memory budget of the
+# stage, so a runaway allocation raises MemoryError at once instead of driving the machine into swap or the OOM killer;
+# the parent kills a child exceeding its time budget. The peak RSS of every stage is read from the kernel resource usage
+# of the finished child (wait4), which accounts for the child alone, and written to the stage report.
+# Native code (the pandas parser, BLAS, Arrow) does not always surface a failed allocation as a MemoryError, so a stage
+# also counts as out of memory when it failed with an allocation error message, or when it was killed by a signal (the
+# OOM killer, an aborting allocator) after its resident set came close to the budget. The data segment includes
+# reserved but untouched pages, so the RSS of a stage hitting the limit stays below it. Any other failure is reported
+# as failed, whatever the memory use of the stage.
+# Resource limits and wait4 are Unix only; elsewhere the pipeline runs its stages in-process.
+import os
+import sys
+import json
+import time
+import subprocess
+from pathlib import Path
+from importlib import import_module
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+if __name__ == "__main__" and resource is not None and int(sys.argv[2]):
+    # a stage child caps its memory before it imports anything of the project
+    resource.setrlimit(resource.RLIMIT_DATA, (int(sys.argv[2]) << 20, int(sys.argv[2]) << 20))
+
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+
+# Stage name -> (module, component class, method), in pipeline order
+STAGES = {
+    "data_ingestion": ("src.components.data_ingestion", "DataIngestion", "initiate_data_ingestion"),
+    "data_validation": ("src.components.data_validation", "DataValidation", "initiate_data_vatidation"),
+    "data_transformation": ("src.components.data_transformation", "DataTransformation", "initiate_data_transformation"),
+    "model_training": ("src.components.model_trainer", "ModelTrainer", "initiate_training"),
+    "poster_caching": ("src.components.poster_cache", "PosterCache", "initiate_poster_caching"),
+}
+
+# Exit code of a stage child that ran out of its memory budget
+MEMORY_EXIT_CODE = 3
+# Seconds between two checks of a running stage child
+POLL_INTERVAL = 0.1
+# A stage killed by a signal after its peak RSS reached this fraction of its memory budget ran out of memory
+MEMORY_PRESSURE_RATIO = 0.6
+# Error messages of allocation failures raised by native code instead of a MemoryError
+ALLOCATION_ERRORS = ("out of memory", "unable to allocate", "cannot allocate memory", "bad_alloc",
+                     "bad allocation", "failed to allocate")
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def isolation_supported():
+    """
+    Whether stages can run in subprocesses with enforced memory budgets: needs RLIMIT_DATA and os.wait4 (Unix).
+    """
+    return resource is not None and hasattr(resource, "RLIMIT_DATA") and hasattr(os, "wait4")
+
+
+def run_stage(stage):
+    """
+    Runs one pipeline stage in the current process.
+    Args:
+        stage (str): Stage name, a key of STAGES.
+    """
+    module, component, method = STAGES[stage]
+    getattr(getattr(import_module(module), component)(), method)()
+
+
+def is_allocation_failure(error):
+    """
+    Whether an exception, or any exception it was raised from, is a failed memory allocation.
+    """
+    while error is not None:
+        if isinstance(error, MemoryError) or any(message in str(error).lower() for message in ALLOCATION_ERRORS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class StageRunner:
+    def __init__(self, app_config = None):
+        """
+        Initializes the StageRunner object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the pipeline settings.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.pipeline_config = app_config.pipeline_config()
+            self.report = []
+
+        except Exception as e:
+            logging.error(f"Stage Runner configuration initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def limits(self, stage):
+        """
+        Returns:
+            tuple: (memory limit in MB, time limit in seconds) of a stage, 0 for no limit.
+        """
+        config = self.pipeline_config
+        overrides = config.stage_limits.get(stage, {})
+        return (overrides.get("memory_limit_mb", config.memory_limit_mb),
+                overrides.get("time_limit_s", config.time_limit_s))
+
+
+    def run(self, stage):
+        """
+        Runs a stage in a subprocess within its memory and time budgets and appends its resource usage to the
+        stage report.
+        Args:
+            stage (str): Stage name, a key of STAGES.
+
+        Returns:
+            dict: Stage report entry with the status, wall time, peak RSS and budgets of the stage.
+
+        Raises:
+            RuntimeError: If the stage fails or exceeds one of its budgets; the report is written first.
+        """
+        memory_limit_mb, time_limit_s = self.limits(stage)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(_PROJECT_ROOT),
+                                                                         os.environ.get("PYTHONPATH")])))
+
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-m", "src.pipeline.stage_runner", stage, str(memory_limit_mb)],
+                                   env=env)
+        deadline = start + time_limit_s if time_limit_s else None
+        timed_out = False
+        while True:
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                timed_out = True
+                process.kill()
+                pid, status, usage = os.wait4(process.pid, 0)
+                break
+            time.sleep(POLL_INTERVAL)
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss_mb = usage.ru_maxrss / 1024
+        if timed_out:
+            outcome = "time_limit_exceeded"
+        elif process.returncode == 0:
+            outcome = "ok"
+        elif process.returncode == MEMORY_EXIT_CODE:
+            outcome = "memory_limit_exceeded"
+        elif process.returncode < 0 and memory_limit_mb and peak_rss_mb >= MEMORY_PRESSURE_RATIO * memory_limit_mb:
+            # killed by a signal close to its budget, e.g. by the OOM killer or an allocator abort
+            outcome = "memory_limit_exceeded"
+        else:
+            outcome = "failed"
+        entry = {"stage": stage, "status": outcome, "exit_code": process.returncode,
+                 "wall_s": round(time.perf_counter() - start, 3), "peak_rss_mb": round(peak_rss_mb, 1),
+                 "memory_limit_mb": memory_limit_mb, "time_limit_s": time_limit_s}
+        self.report.append(entry)
+        self.write_report()
+
+        logging.info(f"Stage {stage} finished: {entry}")
+        if outcome != "ok":
+            raise RuntimeError(f"Pipeline stage {stage} {outcome.replace('_', ' ')}: {entry}")
+        return entry
+
+
+    def write_report(self):
+        """
+        Writes the stage report gathered so far to the configured report file.
+        """
+        tmp_path = self.pipeline_config.report_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"stages": self.report}, indent=2))
+        tmp_path.replace(self.pipeline_config.report_path)
+
+
+if __name__ == "__main__":
+    # entry point of a stage child: python -m src.pipeline.stage_runner <stage> <memory limit in MB, 0 for none>
+    try:
+        run_stage(sys.argv[1])
+
+    except Exception as e:
+        if is_allocation_failure(e):
+            logging.error(f"Pipeline stage {sys.argv[1]} exceeded its memory budget: {e}")
+            sys.exit(MEMORY_EXIT_CODE)
+        logging.error(f"Pipeline stage {sys.argv[1]} failed: {e}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,206 @@
+# Asyncio facade over the ML and semantic recommenders.
+# Blocking work runs on one bounded thread pool per recommender, independent requests fan out concurrently and every
+# call has a latency budget: calls that miss it return an incomplete result instead of an error, while the shared
+# computation keeps running and still fills the caches for the next caller.
+# A recommender missing at construction is loaded once, by a task shared by all callers that need it before it is
+# ready; the time a caller waits for the load counts against its latency budget.
+import sys
+import time
+import asyncio
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+
+
+@dataclass
+class RecommendationResult:
+    source: str
+    books: list = field(default_factory=list)
+    posters: list = field(default_factory=list)
+    complete: bool = True
+    error: str = None
+    elapsed_ms: float = 0.0
+
+
+class AsyncRecommender:
+    def __init__(self, app_config = None, ml_recommender = None, semantic_recommender = None):
+        """
+        Initializes the AsyncRecommender object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the async recommender settings.
+            ml_recommender (MLRecommender, optional): Recommender to use. Defaults to one created by `start`.
+            semantic_recommender (SemanticRecommender, optional): Recommender to use. Defaults to one created by `start`.
+        """
+        try:
+            self.app_config = app_config or get_app_configuration()
+            self.async_config = self.app_config.async_recommender_config()
+            self.ml_recommender = ml_recommender
+            self.semantic_recommender = semantic_recommender
+            # recommender name -> task loading it, shared by every caller waiting for it
+            self._loads = {}
+
+            self.ml_executor = ThreadPoolExecutor(max_workers = self.async_config.ml_workers,
+                                                  thread_name_prefix = "ml-recommender")
+            self.semantic_executor = ThreadPoolExecutor(max_workers = self.async_config.semantic_workers,
+                                                        thread_name_prefix = "semantic-recommender")
+
+        except Exception as e:
+            logging.error(f"Async Recommender initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    async def start(self, ml = True, semantic = True):
+        """
+        Loads the missing recommenders concurrently on their executors.
+        """
+        names = [name for name, wanted in (("ml", ml), ("semantic", semantic)) if wanted]
+        await asyncio.gather(*(self._recommender(name) for name in names))
+        return self
+
+
+    async def _load(self, name):
+        loop = asyncio.get_running_loop()
+        if name == "ml":
+            from src.recommender.ml_recommender import MLRecommender
+            self.ml_recommender = await loop.run_in_executor(self.ml_executor, MLRecommender, self.app_config)
+        else:
+            from src.recommender.semantic_recommender import SemanticRecommender
+            self.semantic_recommender = await loop.run_in_executor(self.semantic_executor, SemanticRecommender,
+                                                                   self.app_config)
+
+
+    async def _recommender(self, name):
+        """
+        Returns the "ml" or "semantic" recommender, awaiting the load shared by all concurrent callers when it is
+        missing. A failed load is retried by the next caller.
+        """
+        recommender = getattr(self, f"{name}_recommender")
+        if recommender is not None:
+            return recommender
+
+        loop = asyncio.get_running_loop()
+        task = self._loads.get(name)
+        if task is None or task.get_loop() is not loop or (task.done() and (task.cancelled() or task.exception())):
+            task = self._loads[name] = loop.create_task(self._load(name))
+            task.add_done_callback(lambda task: task.cancelled() or task.exception() is None or
+                                   logging.error(f"Loading the {name} recommender failed: {task.exception()}"))
+        # a caller running out of its budget stops waiting without cancelling the load
+        await asyncio.shield(task)
+        return getattr(self, f"{name}_recommender")
+
+
+    async def _with_budget(self, source, coroutine, timeout):
+        """
+        Awaits a recommendation within its latency budget.
+        Returns:
+            RecommendationResult: Incomplete, with the error, when the call fails or misses the budget.
+        """
+        start = time.perf_counter()
+        try:
+            books, posters = await asyncio.wait_for(coroutine, timeout)
+            return RecommendationResult(source, list(books), list(posters),
+                                        elapsed_ms = (time.perf_counter() - start) * 1000)
+
+        except asyncio.TimeoutError:
+            logging.warning(f"{source} recommendation exceeded its {timeout}s latency budget")
+            return RecommendationResult(source, complete = False, error = "timeout",
+                                        elapsed_ms = (time.perf_counter() - start) * 1000)
+
+        except Exception as e:
+            logging.error(f"{source} recommendation failed: {e}")
+            return RecommendationResult(source, complete = False, error = str(e),
+                                        elapsed_ms = (time.perf_counter() - start) * 1000)
+
+
+    async def recommend(self, book_name, timeout = None):
+        """
+        Books similar to `book_name` from the ML recommender, within `timeout` seconds
+        (the configured `ml_timeout` when None).
+        """
+        async def call():
+            recommender = await self._recommender("ml")
+            return await recommender.recommend_async(book_name, executor = self.ml_executor)
+        return await self._with_budget("ml", call(), timeout or self.async_config.ml_timeout)
+
+
+    async def recommend_for_user(self, user_id, k = 5, timeout = None):
+        """
+        Unrated books for the user `user_id` from the ML recommender, within `timeout` seconds
+        (the configured `ml_timeout` when None).
+        """
+        async def call():
+            recommender = await self._recommender("ml")
+            return await asyncio.get_running_loop().run_in_executor(self.ml_executor, recommender.recommend_for_user,
+                                                                    user_id, k)
+        return await self._with_budget("ml", call(), timeout or self.async_config.ml_timeout)
+
+
+    async def recommend_for_books(self, book_names, k = 5, timeout = None):
+        """
+        Books liked by the readers of the seed `book_names` from the ML recommender, within `timeout` seconds
+        (the configured `ml_timeout` when None).
+        """
+        async def call():
+            recommender = await self._recommender("ml")
+            return await asyncio.get_running_loop().run_in_executor(self.ml_executor, recommender.recommend_for_books,
+                                                                    list(book_names), k)
+        return await self._with_budget("ml", call(), timeout or self.async_config.ml_timeout)
+
+
+    async def semantic_recommend(self, query, k = 8, timeout = None, filters = None):
+        """
+        Books matching the description `query` from the semantic recommender, optionally restricted by the
+        metadata `filters`, within `timeout` seconds (the configured `semantic_timeout` when None).
+        """
+        async def call():
+            recommender = await self._recommender("semantic")
+            return await recommender.semmantic_recommend_async(query, k, filters, executor = self.semantic_executor)
+        return await self._with_budget("semantic", call(), timeout or self.async_config.semantic_timeout)
+
+
+    async def recommend_many(self, book_names, timeout = None):
+        """
+        Fans out ML recommendations for several books under one shared latency budget.
+        Returns:
+            list: One RecommendationResult per book; books that missed the budget are incomplete.
+        """
+        return await asyncio.gather(*(self.recommend(book_name, timeout) for book_name in book_names))
+
+
+    async def semantic_recommend_many(self, queries, k = 8, timeout = None):
+        """
+        Fans out semantic recommendations for several queries under one shared latency budget.
+        Returns:
+            list: One RecommendationResult per query; queries that missed the budget are incomplete.
+        """
+        return await asyncio.gather(*(self.semantic_recommend(query, k, timeout) for query in queries))
+
+
+    async def recommend_all(self, book_name = None, query = None, k = 8, timeout = None):
+        """
+        Queries both recommenders concurrently and returns whatever finished within the budget.
+        Args:
+            book_name (str, optional): Book for the ML recommender.
+            query (str, optional): Description for the semantic recommender.
+            k (int, optional): Number of semantic recommendations. Defaults to 8.
+            timeout (float, optional): Budget shared by both calls. Defaults to the per recommender budgets.
+
+        Returns:
+            dict: RecommendationResult keyed by source ("ml", "semantic").
+        """
+        calls = {}
+        if book_name is not None:
+            calls["ml"] = self.recommend(book_name, timeout)
+        if query is not None:
+            calls["semantic"] = self.semantic_recommend(query, k, timeout)
+        return dict(zip(calls, await asyncio.gather(*calls.values())))
+
+
+    def close(self):
+        """
+        Shuts the executors down without waiting for the running calls.
+        """
+        self.ml_executor.shutdown(wait = False, cancel_futures = True)
+        self.semantic_executor.shutdown(wait = False, cancel_futures = True)
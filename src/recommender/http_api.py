@@ -0,0 +1,113 @@
+# Minimal JSON HTTP front end of the recommenders, for load tests and clients other than the Streamlit app.
+# Every request is served on its own thread of a ThreadingHTTPServer by the process-wide recommender instances, so
+# concurrent requests share the single-flight coalescing, the result cache and the warm artifacts of the process.
+import sys
+import json
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.readiness import readiness
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path in ("/ready", "/health"):
+                ready, state = readiness()
+                self._send(200 if ready or url.path == "/health" else 503,
+                           state if url.path == "/ready" else {"status": "alive"})
+            elif url.path == "/recommend":
+                book_name, recommender = params["book"], self.server.ml_recommender()
+                if not recommender.has_book(book_name):
+                    self._send(404, {"error": f"Unknown book: {book_name}"})
+                    return
+                books, posters = recommender.recommend(book_name)
+                self._send(200, {"books": list(books), "posters": list(posters)})
+            elif url.path == "/recommend/books":
+                book_names, k = parse_qs(url.query)["book"], int(params.get("k", 5))
+                recommender = self.server.ml_recommender()
+                if not any(recommender.has_book(book_name) for book_name in book_names):
+                    self._send(404, {"error": f"Unknown books: {book_names}"})
+                    return
+                books, posters = recommender.recommend_for_books(book_names, k)
+                self._send(200, {"books": list(books), "posters": list(posters)})
+            elif url.path == "/recommend/user":
+                books, posters = self.server.ml_recommender().recommend_for_user(int(params["user_id"]),
+                                                                                 int(params.get("k", 5)))
+                self._send(200, {"books": list(books), "posters": list(posters)})
+            elif url.path == "/semantic":
+                books, posters = self.server.semantic_recommender().semmantic_recommend(params["query"],
+                                                                                        int(params.get("k", 8)))
+                self._send(200, {"books": list(books), "posters": list(posters)})
+            else:
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+
+        # missing or malformed parameters; the recommenders wrap their own errors in AppException
+        except (KeyError, ValueError) as e:
+            self._send(400, {"error": f"Bad request: {e}"})
+
+        except Exception as e:
+            logging.error(f"HTTP API request {url.path} failed: {e}")
+            self._send(500, {"error": str(e)})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RecommendationHTTPServer:
+    def __init__(self, host = "127.0.0.1", port = 0, ml_recommender = None, semantic_recommender = None):
+        """
+        Initializes the RecommendationHTTPServer object.
+        Args:
+            host (str, optional): Interface to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on, 0 for a free port. Defaults to 0.
+            ml_recommender (MLRecommender, optional): Recommender to serve instead of the shared one.
+            semantic_recommender (SemanticRecommender, optional): Recommender to serve instead of the shared one.
+        """
+        try:
+            from src.recommender.warmup import get_ml_recommender, get_semantic_recommender
+
+            self.httpd = ThreadingHTTPServer((host, port), _ApiHandler)
+            self.httpd.daemon_threads = True
+            # recommenders are loaded by the first request that needs them
+            self.httpd.ml_recommender = (lambda: ml_recommender) if ml_recommender is not None else get_ml_recommender
+            self.httpd.semantic_recommender = ((lambda: semantic_recommender) if semantic_recommender is not None
+                                               else get_semantic_recommender)
+            self.thread = None
+
+        except Exception as e:
+            logging.error(f"HTTP API server initialization failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    def start(self):
+        """
+        Serves the API from a daemon thread.
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="http-api", daemon=True)
+        self.thread.start()
+        logging.info(f"Recommendation HTTP API started at {self.url}")
+        return self
+
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
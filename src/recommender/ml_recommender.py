@@ -0,0 +1,405 @@
+# ML (collaborative filtering) recommender serving the trained Nearest Neighbors model.
+import os
+import sys
+import pickle
+import shutil
+from pathlib import Path
+
+import numpy as np
+from src.core.configuration import get_app_configuration
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import instrument, add_counts
+from src.core.single_flight import SingleFlight
+from src.constant.constants import DEFAULT_POSTER_URL
+from src.components.serving_artifacts import ServingArtifacts
+from src.components.poster_cache import PosterCache
+
+# In-flight recommendations shared by all MLRecommender instances of the process
+_recommend_flight = SingleFlight()
+# Score aggregations of the multi-seed recommendations
+AGGREGATIONS = ("weighted", "rank")
+# Rank offset of the reciprocal rank aggregation
+RANK_CONSTANT = 60
+
+
+def aggregate_neighbours(distances, indices, n_items, exclude, k, aggregation = "weighted"):
+    """
+    Merges the neighbour lists of several seed books into one ranking.
+    Args:
+        distances (np.ndarray): (seeds, neighbours) distances, nearest first.
+        indices (np.ndarray): (seeds, neighbours) catalogue rows.
+        n_items (int): Catalogue size.
+        exclude (np.ndarray): Rows never returned, the seeds.
+        k (int): Number of rows returned.
+        aggregation (str, optional): "weighted" sums 1 / (1 + distance) over the seeds, "rank" sums
+            1 / (RANK_CONSTANT + rank). Defaults to "weighted".
+
+    Returns:
+        np.ndarray: Up to k rows, best first; only rows that are a neighbour of some seed.
+    """
+    if aggregation == "weighted":
+        weights = 1 / (1 + distances)
+    elif aggregation == "rank":
+        weights = np.broadcast_to(1 / (RANK_CONSTANT + np.arange(1, indices.shape[1] + 1)), indices.shape)
+    else:
+        raise ValueError(f"Unknown aggregation: {aggregation}, expected one of {AGGREGATIONS}")
+
+    scores = np.bincount(indices.ravel(), weights = np.ravel(weights), minlength = n_items)
+    scores[exclude] = 0
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class MLRecommender:
+    def __init__(self, app_config = None):        
+        """
+        Initializes the MLRecommendation object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the ml-recommendation settings.
+
+        Memory-maps the pickle-free serving artifacts when they exist. Otherwise falls back to loading the
+        trained model, final ratings, and books pivot table pickles if the trained model path exists.
+        """
+        try:
+            app_config = app_config or get_app_configuration()
+            self.ml_recommend_config = app_config.ml_recommendation_config()
+            self.poster_cache = PosterCache(app_config)
+            self.artifacts = None
+
+            if ServingArtifacts.exists(self.ml_recommend_config.serving_dir):
+                self.artifacts = ServingArtifacts(self.ml_recommend_config.serving_dir)
+                self.obj_loaded = True
+
+            # check if ml model and serialized objects is available then load
+            elif os.path.exists(self.ml_recommend_config.trained_model_path) & os.path.exists(self.ml_recommend_config.serialized_obj_dir):
+                self.model = pickle.load(open(self.ml_recommend_config.trained_model_path, "rb"))
+                self.final_ratings = pickle.load(open(self.ml_recommend_config.final_ratings_obj_path, "rb"))
+                self.books_pivot_table = pickle.load(open(self.ml_recommend_config.books_pivot_table_obj_path, "rb"))
+
+                self.obj_loaded = True
+
+            else:
+                self.obj_loaded = False
+
+        except Exception as e:
+            logging.error(f"Failed to initialize Recommendation Congiguration: {e}", exc_info=True)
+            raise AppException(e, sys)
+            
+
+    def train_engine(self):
+        """
+        This method is used to train the recommendation model.
+        It initializes the ML pipeline and trains the model.
+        """
+        dirs = ["artifacts/data_ingestion", "artifacts/data_validation", "artifacts/data_transformation",
+                    "artifacts/serialized_objects", "artifacts/common_objects", "artifacts/ML_model", "artifacts/serving"]
+        for dir in dirs:
+            if os.path.exists(Path(dir)):
+                shutil.rmtree(dir)
+
+        try:
+            logging.info("Training Recommender System Started")
+            # the training stack (requests, scipy, scikit-learn) is only imported when retraining
+            from src.pipeline.ml_pipeline import MLPipeline
+            pipeline = MLPipeline()
+            pipeline.main()
+            logging.info("Recommender System successfully trained.")
+
+        except Exception as e:
+            logging.error(f"Failed to train recommender system: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @instrument("ml_recommender.get_poster")
+    def get_poster(self, suggestion):
+        """
+        Fetches the poster URLs for a list of suggested books.
+        Args:
+            suggestion (list): A list of suggested book IDs.
+        Returns:
+            list: A list of URLs pointing to the poster images of the suggested books.
+        """
+        book_names = []
+        ids_index = []
+        poster_url = []
+        try:
+            logging.info("Fetching poster images for recommended books.")
+            if self.artifacts is not None:
+                return self.artifacts.poster_urls.take(suggestion[0])
+
+            for book_id in suggestion:
+                book_names.append(self.books_pivot_table.index[book_id])
+            
+            import pandas as pd
+            # first final_ratings row of every recommended title, in one hashed lookup
+            first_rows = np.flatnonzero(~self.final_ratings["Title"].duplicated().to_numpy())
+            title_index = pd.Index(self.final_ratings["Title"].to_numpy()[first_rows])
+            ids_index = first_rows[title_index.get_indexer(book_names[0])].tolist()
+
+            for id in ids_index:
+                url = self.final_ratings.iloc[id]["image_url"]
+                if type(url) is float:
+                    logging.warning(f"No poster url found for book ID {id}, using default image")
+                    url = DEFAULT_POSTER_URL
+                    
+                poster_url.append(url)
+            
+            logging.info("Poster images fetched successfully.")
+            return poster_url
+
+        except Exception as e:
+            logging.error(f"Failed to fetch poster image: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def has_book(self, book_name):
+        """
+        Whether a title can be recommended for: in the catalogue exactly, by its normalized title or as one of the
+        editions collapsed into a work.
+        """
+        if self.artifacts is not None:
+            try:
+                self.artifacts.find_book(book_name)
+                return True
+            except KeyError:
+                return False
+        books_pivot_table = getattr(self, "books_pivot_table", None)
+        return books_pivot_table is not None and book_name in books_pivot_table.index
+
+
+    @instrument("ml_recommender.search_titles")
+    def search_titles(self, query, limit = 10):
+        """
+        Typeahead lookup of catalogue titles for the book selection box.
+        Args:
+            query (str): Partial title typed by the user.
+            limit (int, optional): Maximum number of titles returned. Defaults to 10.
+        Returns:
+            list: Matching titles, best first. Empty when no title index is available.
+        """
+        try:
+            if self.artifacts is None or self.artifacts.title_index is None:
+                return []
+            return self.artifacts.title_index.search(query, limit = limit)
+
+        except Exception as e:
+            logging.error(f"Failed to search book titles: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def _flight_key(self, book_name):
+        """
+        Resolves the title of a recommendation request once.
+        Returns:
+            tuple: (key, book_id) where key is the identity of the request, the catalogue row when the serving
+                artifacts resolve the title, otherwise the title exactly as requested (which is what `_recommend`
+                receives); book_id is the resolved catalogue row, None when the title is not resolved.
+        """
+        if self.artifacts is not None:
+            try:
+                book_id = self.artifacts.find_book(book_name)
+                return (self.artifacts.build_id, book_id), book_id
+            except KeyError:
+                pass
+        return (None, book_name), None
+
+
+    @instrument("ml_recommender.recommend")
+    def recommend(self, book_name):
+        """
+        Recommends a list of books similar to the given book name.
+        Concurrent requests for the same book share a single neighbour search.
+
+        Args:
+            book_name (str): The name of the book for which recommendations are needed.
+        Returns:
+            tuple: A tuple containing:
+                - books_list (list): A list of recommended book titles.
+                - poster_url (list): A list of URLs pointing to the poster images of the recommended books.
+        """
+        key, book_id = self._flight_key(book_name)
+        return _recommend_flight.do(key, self._recommend, book_name, book_id)
+
+
+    async def recommend_async(self, book_name, executor = None):
+        """
+        Asyncio variant of `recommend`, coalesced with the threaded callers. The neighbour search runs on
+        `executor` (the loop's default executor when None).
+        """
+        key, book_id = self._flight_key(book_name)
+        return await _recommend_flight.do_async(key, self._recommend, book_name, book_id, executor = executor)
+
+
+    def _recommend(self, book_name, book_id = None):
+        """
+        Computes the recommendations of `recommend`.
+        Args:
+            book_name (str): The requested title.
+            book_id (int, optional): Catalogue row of the title in the serving artifacts, when already resolved.
+        """
+        logging.info(f"Getting recommendations for the book: {book_name}")
+        books_list = []
+        try:
+            if self.artifacts is not None:
+                if book_id is None:
+                    book_id = self.artifacts.find_book(book_name)
+                _ , suggestion = self.artifacts.kneighbors([book_id], n_neighbors = 6)
+                poster_url = self.get_poster(suggestion)
+
+                logging.info(f"Recommendations for {book_name} fetched successfully.")
+                return self.artifacts.book_names.take(suggestion[0]), poster_url
+
+            book_id = self.books_pivot_table.index.get_loc(book_name)
+            _ , suggestion = self.model.kneighbors(self.books_pivot_table.iloc[book_id,:].values.reshape(1,-1),
+                                                    n_neighbors = 6)
+            
+            poster_url = self.get_poster(suggestion)
+
+            for i in range(len(suggestion)):
+                books = self.books_pivot_table.index[suggestion[i]]
+                for j in books:
+                    books_list.append(j)
+
+            logging.info(f"Recommendations for {book_name} fetched successfully.")
+            return books_list, poster_url
+
+        except Exception as e:
+            logging.error(f"Failed to get recommendations from the model: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @instrument("ml_recommender.recommend_for_books")
+    def recommend_for_books(self, book_names, k = 5, aggregation = "weighted"):
+        """
+        Recommends books for a set of seed books ("readers who liked these"), e.g. a reading list or a cart.
+        The neighbours of all seeds come from one batched neighbour query and are merged with `aggregate_neighbours`.
+
+        Args:
+            book_names (list): Titles of the seed books; titles that are not in the catalogue are ignored.
+            k (int, optional): Number of recommended books. Defaults to 5.
+            aggregation (str, optional): "weighted" (distance weighted sum) or "rank" (reciprocal rank sum).
+                Defaults to "weighted".
+        Returns:
+            tuple: (books_list, poster_url) of up to k books, best first, without the seeds.
+        Raises:
+            AppException: If none of the seed books is in the catalogue.
+        """
+        try:
+            if self.artifacts is not None:
+                find_book, n_items = self.artifacts.find_book, self.artifacts.matrix.shape[0]
+            else:
+                find_book, n_items = self.books_pivot_table.index.get_loc, self.books_pivot_table.shape[0]
+
+            rows = []
+            for book_name in book_names:
+                try:
+                    rows.append(find_book(book_name))
+                except KeyError:
+                    logging.warning(f"Seed book not found in the catalogue: {book_name}")
+            if not rows:
+                raise KeyError(f"None of the seed books is in the catalogue: {list(book_names)}")
+            rows = np.unique(rows)
+
+            # enough neighbours per seed to fill k books after dropping the seeds
+            n_neighbors = min(k + len(rows), n_items)
+            if self.artifacts is not None:
+                distances, indices = self.artifacts.kneighbors(rows, n_neighbors = n_neighbors)
+            else:
+                distances, indices = self.model.kneighbors(self.books_pivot_table.iloc[rows, :].values,
+                                                           n_neighbors = n_neighbors)
+            add_counts(seeds=len(rows), candidates=indices.size)
+
+            suggestion = aggregate_neighbours(distances, indices, n_items, rows, k, aggregation)[None, :]
+            if self.artifacts is not None:
+                books_list = self.artifacts.book_names.take(suggestion[0])
+            else:
+                books_list = self.books_pivot_table.index[suggestion[0]].tolist()
+            return books_list, (self.get_poster(suggestion) if suggestion.size else [])
+
+        except Exception as e:
+            logging.error(f"Failed to get recommendations for the seed books: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    @instrument("ml_recommender.recommend_for_user")
+    def recommend_for_user(self, user_id, k = 5):
+        """
+        Recommends books the given user has not rated yet, from the books similar to the ones they rated.
+        Args:
+            user_id (int): The user id of the ratings dataset.
+            k (int, optional): Number of recommended books. Defaults to 5.
+        Returns:
+            tuple: (books_list, poster_url), best first. Users without ratings get the most rated books.
+        """
+        return self.recommend_for_users([user_id], k)[0]
+
+
+    @instrument("ml_recommender.recommend_for_users")
+    def recommend_for_users(self, user_ids, k = 5):
+        """
+        Batch variant of `recommend_for_user`: all users are scored together with sparse matrix products.
+        Args:
+            user_ids (list): The user ids of the ratings dataset.
+            k (int, optional): Number of recommended books per user. Defaults to 5.
+        Returns:
+            list: One (books_list, poster_url) tuple per user id.
+        Raises:
+            AppException: If the serving artifacts are not available or scoring fails.
+        """
+        try:
+            if self.artifacts is None:
+                raise ValueError("User recommendations need the serving artifacts, retrain the recommender to export them")
+
+            rows = self.artifacts.user_rows(user_ids)
+            scores, indices = self.artifacts.recommend_users(rows, k)
+            add_counts(users=len(rows), cold_start_users=int((rows < 0).sum()))
+
+            results = []
+            for row_scores, row_indices in zip(scores, indices):
+                row_indices = row_indices[np.isfinite(row_scores)]
+                results.append((self.artifacts.book_names.take(row_indices), self.artifacts.poster_urls.take(row_indices)))
+            return results
+
+        except Exception as e:
+            logging.error(f"Failed to get user recommendations: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def ml_recommendation_engine(self,selected_book):
+        """
+        Displays the recommended books and their poster images based on a selected book.
+        This method uses the `recommend` method to get recommendations and then displays them in a Streamlit app.
+
+        Args:
+            selected_book (str): The name of the book for which recommendations are needed.
+        """
+        try:
+            import streamlit as st
+            logging.info("ML-Recommender Engine Started.")
+            recommended_books, poster_url = self.recommend(selected_book)
+            # render cached local thumbnails instead of fetching from the image hosts
+            poster_url = self.poster_cache.resolve_many(poster_url)
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.image(poster_url[1])
+                st.text(recommended_books[1])
+            with col2:
+                st.image(poster_url[2])
+                st.text(recommended_books[2])
+            with col3:
+                st.image(poster_url[3])
+                st.text(recommended_books[3])
+            with col4:
+                st.image(poster_url[4])
+                st.text(recommended_books[4])
+            with col5:
+                st.image(poster_url[5])
+                st.text(recommended_books[5])
+            logging.info("Recommender Engine successfully provided recommendations.")
+
+        except Exception as e:
+            logging.error(f"ML Recommendation engine failure: {e}", exc_info=True)
+            raise AppException(e, sys)
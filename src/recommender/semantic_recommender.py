@@ -0,0 +1,339 @@
+# Semantic recommender performing vector similarity search over the book descriptions.
+import os
+import sys
+import pickle
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from src.core.configuration import get_app_configuration
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.metrics import instrument, add_counts
+from src.core.single_flight import SingleFlight
+from src.constant.constants import DEFAULT_POSTER_URL
+from src.components.poster_cache import PosterCache
+from src.components.result_cache import SemanticResultCache, search_key
+from src.components.vector_index import PartitionedVectorIndex, SearchFilters
+from src.components.quantized_index import QuantizedVectorIndex
+from src.components.keyword_index import KeywordIndex, reciprocal_rank_fusion
+
+from langchain_chroma import Chroma
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from pydantic import SecretStr
+
+# In-flight semantic searches shared by all SemanticRecommender instances of the process
+_search_flight = SingleFlight()
+
+
+def default_embedding():
+    """
+    Google Generative AI embedding model used to build and query the vectorstore.
+    """
+    api_key = os.getenv("GOOGLE_API_KEY")
+    return GoogleGenerativeAIEmbeddings(model = "models/text-embedding-004",
+                                        google_api_key = SecretStr(api_key) if api_key is not None else None)
+
+
+class SemanticRecommender:
+    def __init__(self, app_config = None, embedding = None):        
+        """
+        Initializes the SemanticRecommender object.
+        Loads the pre-computed Chroma vector store and the final books data object. 
+        Also loads the Google Generative AI embeddings model.
+
+        Args:
+            app_config (AppConfiguration): The configuration object containing the configuration for semantic recommendation.
+            embedding (Embeddings, optional): Embedding model to use instead of the Google Generative AI embeddings,
+                e.g. a local stand-in for benchmarks.
+        """
+        try:
+            self.embedding = embedding if embedding is not None else default_embedding()
+
+            app_config = app_config or get_app_configuration()
+            recommend_config = app_config.semantic_recommender_config()
+            self.poster_cache = PosterCache(app_config)
+            self.result_cache = SemanticResultCache(app_config)
+
+            self.books_data = pickle.load(open(recommend_config.final_books_obj_path, "rb"))
+            # isbn13 -> first row of the book, for hashed integer lookups of the search hits
+            first_rows = ~self.books_data["isbn13"].duplicated().to_numpy()
+            self.isbn_index = pd.Index(self.books_data["isbn13"].to_numpy()[first_rows])
+            self.isbn_rows = np.flatnonzero(first_rows)
+            self.chroma_persist_dir = recommend_config.chroma_persist_dir
+            self.query_workers = recommend_config.query_workers
+            self.engine = recommend_config.engine
+            self.rescore_factor = recommend_config.rescore_factor
+            self.embedding_timeout = recommend_config.embedding_timeout
+            self.keyword_mode = recommend_config.keyword_mode
+            self.fusion_constant = recommend_config.fusion_constant
+            self._embed_executor = ThreadPoolExecutor(max_workers = recommend_config.query_workers,
+                                                      thread_name_prefix = "semantic-embedding")
+            self._vectorstore = None
+            self._keyword_index = None
+            self._vectorstore_lock = threading.Lock()
+
+        except Exception as e:
+            logging.error(f"Semantic Recommender class initialization failed: {e}", exc_info=True)
+            raise AppException(e, sys)
+        
+    
+    @instrument("semantic_recommender.semmantic_recommend")
+    def semmantic_recommend(self, query, k = 8, filters = None):
+        """
+        Performs a semantic search for relevant books based on description provided.
+        Results are served from the result cache when the same query was answered by the current vectorstore,
+        and concurrent identical queries share a single embedding call and vector search.
+        When the vectorstore has a keyword index and the embedding call fails or misses `embedding_timeout`,
+        the BM25 keyword results are returned instead (not cached); with `keyword_mode: fuse` the keyword results
+        are also fused into every semantic result.
+
+        Args:
+            query (str): The search query describing the type of books to find.
+            k (int, optional): Number of books to return. Defaults to 8.
+            filters (SearchFilters | dict, optional): Only recommend books matching these metadata filters
+                (categories, publication years, page counts, minimum rating). The filters are applied inside the
+                vector search of a partitioned vectorstore, which still returns k books when k books match.
+
+        Returns:
+            tuple: A tuple containing:
+                - books (list): A list of book titles that match the query.
+                - posters_url (list): A list of URLs for the poster images of the matching books.
+        """
+        filters = SearchFilters.coerce(filters)
+        return _search_flight.do((self._cache_key(query, filters), k), self._semmantic_recommend, query, k, filters)
+
+
+    async def semmantic_recommend_async(self, query, k = 8, filters = None, executor = None):
+        """
+        Asyncio variant of `semmantic_recommend`, coalesced with the threaded callers.
+        The query embedding and the opening of the vectorstore run concurrently, then the vector search runs;
+        every blocking step runs on `executor` (the loop's default executor when None).
+        """
+        filters = SearchFilters.coerce(filters)
+        return await _search_flight.do_async((self._cache_key(query, filters), k),
+                                             self._semmantic_recommend_async, query, k, filters, executor)
+
+
+    @staticmethod
+    def _cache_key(query, filters):
+        return search_key(query, **(filters.to_dict() if filters is not None else {}))
+
+
+    @property
+    def vectorstore(self):
+        """
+        Search index of the persisted vectorstore, reopened when the vectorstore is rebuilt: the
+        `QuantizedVectorIndex` when the configured engine is "quantized", a `PartitionedVectorIndex` when the
+        vectorstore was built partitioned, otherwise the single collection Chroma store.
+        """
+        version = self.result_cache.version
+        with self._vectorstore_lock:
+            if self._vectorstore is None or self._vectorstore[0] != version:
+                quantized = QuantizedVectorIndex.exists(self.chroma_persist_dir)
+                if self.engine == "quantized" and not quantized:
+                    logging.warning("No quantized engine in the vectorstore, rebuild it with build_semantic_index.py; using Chroma")
+                if self.engine == "quantized" and quantized:
+                    vectorstore = QuantizedVectorIndex(self.chroma_persist_dir, rescore_factor = self.rescore_factor)
+                elif PartitionedVectorIndex.exists(self.chroma_persist_dir):
+                    vectorstore = PartitionedVectorIndex(self.chroma_persist_dir, max_workers = self.query_workers)
+                else:
+                    vectorstore = Chroma(persist_directory = str(self.chroma_persist_dir),
+                                         embedding_function = self.embedding)
+                self._vectorstore = (version, vectorstore)
+            return self._vectorstore[1]
+
+
+    @property
+    def keyword_index(self):
+        """
+        BM25 keyword index of the persisted vectorstore, None when the vectorstore has none.
+        """
+        version = self.result_cache.version
+        with self._vectorstore_lock:
+            if self._keyword_index is None or self._keyword_index[0] != version:
+                index = KeywordIndex(self.chroma_persist_dir) if KeywordIndex.exists(self.chroma_persist_dir) else None
+                self._keyword_index = (version, index)
+            return self._keyword_index[1]
+
+
+    def _keyword_search(self, keyword_index, query, k, filters = None):
+        """
+        Returns:
+            list: ISBNs of the k best BM25 matches of the query that pass the filters.
+        """
+        mask = None
+        if filters is not None:
+            positions = self.isbn_index.get_indexer(keyword_index.isbn13)
+            mask = (positions >= 0) & filters.frame_mask(self.books_data)[self.isbn_rows[positions]]
+        return [isbn for _, isbn in keyword_index.search(query, k, mask)]
+
+
+    def _keyword_fallback(self, isbns, error):
+        """
+        Resolves the keyword results served when the embedding call failed or missed its deadline.
+        """
+        logging.warning(f"Query embedding unavailable ({type(error).__name__}: {error}), serving keyword results")
+        add_counts(keyword_fallbacks=1, hits=len(isbns))
+        return self._resolve_hits(isbns)
+
+
+    @staticmethod
+    def _search(vectorstore, vector, k, filters = None):
+        """
+        Searches the vectorstore with a query embedding.
+        Returns:
+            list: ISBNs of the k nearest books, nearest first.
+        """
+        if isinstance(vectorstore, (PartitionedVectorIndex, QuantizedVectorIndex)):
+            return [isbn for _, isbn, _ in vectorstore.search(vector, k, filters)]
+
+        if filters is not None:
+            raise ValueError("Metadata filters require a partitioned vectorstore, rebuild it with build_semantic_index.py")
+        results = vectorstore.similarity_search_by_vector(vector, k = k)
+        return [int(doc.page_content.split()[0].replace(':', '').replace('"', '').strip()) for doc in results]
+
+
+    def _resolve_hits(self, isbns):
+        """
+        Maps the ISBNs of the search hits to book titles and thumbnail urls with one hashed lookup.
+        """
+        posters_url = []
+        positions = self.isbn_index.get_indexer(isbns)
+        if (positions < 0).any():
+            raise KeyError(f"Books not found in the books data: {np.asarray(isbns)[positions < 0].tolist()}")
+        rows = self.isbn_rows[positions]
+
+        books = self.books_data["title"].to_numpy()[rows].tolist()
+        for index, thumbnail_url in zip(rows, self.books_data["thumbnail"].to_numpy()[rows]):
+            if type(thumbnail_url) is float:
+                    logging.warning(f"No poster url found for book ID {index}, using default image")
+                    thumbnail_url = DEFAULT_POSTER_URL
+
+            posters_url.append(thumbnail_url)
+
+        return books, posters_url
+
+
+    def _semmantic_recommend(self, query, k, filters):
+        """
+        Computes the recommendations of `semmantic_recommend`.
+        """
+        logging.info(f"Searching for books based on semantics of the description provided.")
+        try:
+            key = self._cache_key(query, filters)
+            cached = self.result_cache.get(key, k)
+            if cached is not None:
+                add_counts(cache_hits=1)
+                logging.info("Recommended books served from the result cache.")
+                return list(cached[0]), list(cached[1])
+
+            add_counts(cache_misses=1)
+            keyword_index = self.keyword_index
+            keyword_isbns = None
+            if keyword_index is None:
+                vector = self.embedding.embed_query(query)
+            else:
+                embedding = self._embed_executor.submit(self.embedding.embed_query, query)
+                keyword_isbns = self._keyword_search(keyword_index, query, k, filters) if self.keyword_mode == "fuse" else None
+                try:
+                    vector = embedding.result(timeout = self.embedding_timeout)
+                except Exception as e:
+                    if keyword_isbns is None:
+                        keyword_isbns = self._keyword_search(keyword_index, query, k, filters)
+                    return self._keyword_fallback(keyword_isbns, e)
+
+            isbns = self._search(self.vectorstore, vector, k, filters)
+            if keyword_isbns is not None:
+                isbns = reciprocal_rank_fusion([isbns, keyword_isbns], k, self.fusion_constant)
+            add_counts(hits=len(isbns))
+            books, posters_url = self._resolve_hits(isbns)
+
+            self.result_cache.put(key, k, books, posters_url)
+            logging.info(f"Recommended books and poster image urls fetched successfully.")
+            return books, posters_url
+
+        except Exception as e:
+            logging.error(f"Embedding model failed to recommend books and or couldn't get poster image urls: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    async def _semmantic_recommend_async(self, query, k, filters, executor):
+        """
+        Computes the recommendations of `semmantic_recommend_async`.
+        """
+        vectorstore = keyword_search = None
+        try:
+            loop = asyncio.get_running_loop()
+            key = self._cache_key(query, filters)
+            cached = await loop.run_in_executor(executor, self.result_cache.get, key, k)
+            if cached is not None:
+                return list(cached[0]), list(cached[1])
+
+            # fan out: the remote query embedding, the vectorstore opening and the keyword search are independent
+            keyword_index = await loop.run_in_executor(executor, getattr, self, "keyword_index")
+            vectorstore = loop.run_in_executor(executor, getattr, self, "vectorstore")
+            embedding = loop.run_in_executor(executor, self.embedding.embed_query, query)
+            if keyword_index is not None and self.keyword_mode == "fuse":
+                keyword_search = loop.run_in_executor(executor, self._keyword_search, keyword_index, query, k, filters)
+
+            try:
+                vector = await asyncio.wait_for(embedding, self.embedding_timeout if keyword_index is not None else None)
+            except Exception as e:
+                if keyword_index is None:
+                    raise
+                keyword_isbns = await (keyword_search or loop.run_in_executor(executor, self._keyword_search,
+                                                                              keyword_index, query, k, filters))
+                return self._keyword_fallback(keyword_isbns, e)
+
+            isbns = await loop.run_in_executor(executor, self._search, await vectorstore, vector, k, filters)
+            if keyword_search is not None:
+                isbns = reciprocal_rank_fusion([isbns, await keyword_search], k, self.fusion_constant)
+            books, posters_url = self._resolve_hits(isbns)
+
+            await loop.run_in_executor(executor, self.result_cache.put, key, k, books, posters_url)
+            return books, posters_url
+
+        except Exception as e:
+            logging.error(f"Embedding model failed to recommend books and or couldn't get poster image urls: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+        finally:
+            # the fallback and error paths leave fanned out work unused: a pending call gives its executor slot
+            # back, the error of a finished one is retrieved so it isn't reported as never retrieved
+            for future in (vectorstore, keyword_search):
+                if future is not None and not future.cancel() and not future.cancelled():
+                    future.exception()
+
+
+    def semantic_recommendation_engine(self, book_desc, filters = None):
+        """
+        Displays the recommended books and their poster images based on a given book description.
+        This method uses the `semantic_recommend` method to get recommendations and then displays them in a Streamlit app.
+
+        Args:
+            book_desc (str): The description of the book for which recommendations are needed.
+            filters (SearchFilters | dict, optional): Metadata filters of the recommended books.
+        """
+        try:
+            import streamlit as st
+            logging.info("Semantic Recommender Engine Started.")
+            recommended_books, poster_urls = self.semmantic_recommend(book_desc, filters = filters)
+            # render cached local thumbnails instead of fetching from the image hosts
+            poster_urls = self.poster_cache.resolve_many(poster_urls)
+            
+            for i in range(0, len(poster_urls), 4):
+                cols = st.columns(4)
+                for j in range(4):
+                    if i+j < len(poster_urls):
+                        with cols[j]:
+                            st.image(poster_urls[i+j])
+                            st.markdown(f"**{recommended_books[i+j]}**")
+            
+            logging.info("Recommender Engine successfully provided recommendations.")
+
+        except Exception as e:
+            logging.error(f"Semantic Recommendation engine failure: {e}", exc_info=True)
+            raise AppException(e, sys)
@@ -0,0 +1,228 @@
+# Warm-up of a serving process before it receives traffic.
+# Loads the recommenders once per process, faults the memory-mapped artifacts into the page cache, runs a few
+# synthetic recommendations (which also resolves the lazy imports, opens the vectorstore and fills the result and
+# poster caches) and then marks the process ready. The app serves from the same process-wide recommender instances,
+# so no user request pays for loading the artifacts again.
+import os
+import sys
+import mmap
+import time
+import threading
+import numpy as np
+from pathlib import Path
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.core.configuration import get_app_configuration
+from src.core.metrics import instrument
+from src.core import readiness
+
+# Bytes read at a time when warming the page cache with a file
+READ_CHUNK = 1 << 20
+
+_recommenders = {}
+_recommender_locks = {"ml": threading.Lock(), "semantic": threading.Lock()}
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+# Stands in for the warm-up thread of a process with warm-up disabled
+WARMUP_DISABLED = object()
+
+
+def touch_pages(array):
+    """
+    Reads one byte of every memory page of an array, faulting a memory-mapped file into the page cache.
+    Returns:
+        int: Bytes of the array.
+    """
+    flat = np.asarray(array).reshape(-1).view(np.uint8)
+    int(flat[::mmap.PAGESIZE].sum())
+    return flat.nbytes
+
+
+def touch_files(directory):
+    """
+    Reads every file below a directory once, so the next open is served from the page cache.
+    Returns:
+        int: Bytes read.
+    """
+    total = 0
+    for path in sorted(p for p in Path(directory).rglob("*") if p.is_file()):
+        with open(path, "rb") as f:
+            while chunk := f.read(READ_CHUNK):
+                total += len(chunk)
+    return total
+
+
+def get_ml_recommender(app_config = None):
+    """
+    Returns the MLRecommender shared by the whole process, loading it on first use.
+    """
+    with _recommender_locks["ml"]:
+        if "ml" not in _recommenders:
+            from src.recommender.ml_recommender import MLRecommender
+            _recommenders["ml"] = MLRecommender(app_config)
+        return _recommenders["ml"]
+
+
+def get_semantic_recommender(app_config = None):
+    """
+    Returns the SemanticRecommender shared by the whole process, loading it on first use.
+    """
+    with _recommender_locks["semantic"]:
+        if "semantic" not in _recommenders:
+            from src.recommender.semantic_recommender import SemanticRecommender
+            _recommenders["semantic"] = SemanticRecommender(app_config)
+        return _recommenders["semantic"]
+
+
+def reset_recommenders():
+    """
+    Drops the shared recommenders, e.g. after retraining; the next call of the getters reloads them.
+    """
+    for name, lock in _recommender_locks.items():
+        with lock:
+            _recommenders.pop(name, None)
+
+
+class ServingWarmup:
+    def __init__(self, app_config = None, ml_recommender = None, semantic_recommender = None):
+        """
+        Initializes the ServingWarmup object.
+        Args:
+            app_config (AppConfiguration): The configuration object containing the warm-up settings.
+            ml_recommender (MLRecommender, optional): Recommender to warm up instead of the shared one.
+            semantic_recommender (SemanticRecommender, optional): Recommender to warm up instead of the shared one.
+        """
+        try:
+            self.app_config = app_config or get_app_configuration()
+            self.warmup_config = self.app_config.warmup_config()
+            self.ml_recommender = ml_recommender
+            self.semantic_recommender = semantic_recommender
+
+        except Exception as e:
+            logging.error(f"Serving Warmup configuration initialization error: {e}", exc_info=True)
+            raise AppException(e, sys)
+
+
+    def warm_ml(self):
+        """
+        Loads the ML recommender, touches its serving artifacts and runs synthetic book and user recommendations.
+        Returns:
+            dict: Warm-up details; status "skipped" when no trained recommender is available.
+        """
+        recommender = self.ml_recommender or get_ml_recommender(self.app_config)
+        if not recommender.obj_loaded:
+            return {"status": "skipped", "reason": "no trained recommender"}
+
+        n_requests = self.warmup_config.ml_requests
+        detail = {"status": "ok", "requests": 0, "touched_bytes": 0}
+        artifacts = recommender.artifacts
+        if artifacts is not None:
+            if self.warmup_config.touch_pages:
+                detail["touched_bytes"] = sum(touch_pages(array) for array in artifacts.arrays.values())
+            # build the lazily opened indexes now rather than on the first request
+            artifacts.title_index, artifacts.item_neighbours, artifacts.user_profiles
+            n_books = len(artifacts.book_names)
+            titles = artifacts.book_names.take(np.linspace(0, n_books - 1, min(n_requests, n_books)).astype(int))
+            # an empty catalogue or ratings dataset leaves nothing to sample
+            if len(artifacts.user_ids) and n_requests:
+                users = artifacts.user_ids[np.linspace(0, len(artifacts.user_ids) - 1, n_requests).astype(int)].tolist()
+                recommender.recommend_for_users(users)
+                detail["requests"] += 1
+            if len(titles):
+                recommender.search_titles(titles[0][:3])
+                detail["requests"] += 1
+        else:
+            book_names = recommender.books_pivot_table.index
+            titles = book_names[np.linspace(0, len(book_names) - 1, min(n_requests, len(book_names))).astype(int)]
+
+        for title in titles:
+            _, poster_url = recommender.recommend(title)
+            recommender.poster_cache.resolve_many(poster_url)
+            detail["requests"] += 1
+        return detail
+
+
+    def warm_semantic(self):
+        """
+        Loads the semantic recommender, opens and touches its vectorstore and runs the configured synthetic queries.
+        Queries failing on the remote embedding service are counted but do not fail the warm-up.
+        Returns:
+            dict: Warm-up details; status "skipped" when no vectorstore was built.
+        """
+        semantic_config = self.app_config.semantic_recommender_config()
+        if not os.path.exists(semantic_config.chroma_persist_dir):
+            return {"status": "skipped", "reason": "no vectorstore"}
+
+        recommender = self.semantic_recommender or get_semantic_recommender(self.app_config)
+        detail = {"status": "ok", "requests": 0, "failed_requests": 0, "touched_bytes": 0}
+        if self.warmup_config.touch_pages:
+            detail["touched_bytes"] = touch_files(semantic_config.chroma_persist_dir)
+        recommender.vectorstore, recommender.keyword_index
+
+        for query in self.warmup_config.semantic_queries:
+            try:
+                recommender.semmantic_recommend(query)
+                detail["requests"] += 1
+            except Exception as e:
+                logging.warning(f"Warm-up query '{query}' failed: {e}")
+                detail["failed_requests"] += 1
+        return detail
+
+
+    @instrument("warmup.run")
+    def run(self):
+        """
+        Warms up the configured recommenders and updates the readiness state of the process: ready when no
+        component failed.
+        Returns:
+            tuple: (ready, state) as returned by `readiness.readiness`.
+        """
+        readiness.set_status(readiness.STARTING)
+        components = {"ml": (self.warmup_config.ml, self.warm_ml),
+                      "semantic": (self.warmup_config.semantic, self.warm_semantic)}
+        failed = False
+        for name, (enabled, warm) in components.items():
+            if not enabled:
+                continue
+            start = time.perf_counter()
+            try:
+                detail = warm()
+                readiness.set_component(name, wall_s = round(time.perf_counter() - start, 4), **detail)
+                logging.info(f"Warm-up of the {name} recommender finished: {detail}")
+
+            except Exception as e:
+                failed = True
+                readiness.set_component(name, readiness.FAILED, error = str(e),
+                                        wall_s = round(time.perf_counter() - start, 4))
+                logging.error(f"Warm-up of the {name} recommender failed: {e}", exc_info=True)
+
+        readiness.set_status(readiness.FAILED if failed else readiness.READY)
+        return readiness.readiness()
+
+
+def _run_warmup(app_config):
+    try:
+        ServingWarmup(app_config).run()
+    except Exception as e:
+        logging.error(f"Serving warm-up terminated: {e}", exc_info=True)
+        readiness.set_status(readiness.FAILED)
+
+
+def start_warmup(app_config = None):
+    """
+    Runs the warm-up once per process in a background thread, so the process keeps answering its health checks
+    while warming up. Calling it again is a no-op. With warm-up disabled the process is ready immediately.
+    Returns:
+        threading.Thread: The warm-up thread, or WARMUP_DISABLED when warm-up is disabled.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return _warmup_thread
+        if not (app_config or get_app_configuration()).warmup_config().enabled:
+            readiness.set_status(readiness.READY)
+            _warmup_thread = WARMUP_DISABLED
+            return _warmup_thread
+        _warmup_thread = threading.Thread(target=_run_warmup, args=(app_config,), name="serving-warmup", daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
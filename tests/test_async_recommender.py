@@ -0,0 +1,62 @@
+# Async facade tests: concurrent first callers share one load of a missing recommender, and the load counts against
+# their latency budget without being cancelled by a caller that runs out of it.
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.config_entity import AsyncRecommenderConfig
+from src.recommender import ml_recommender
+from src.recommender.async_recommender import AsyncRecommender
+
+
+class StubRecommender:
+    """
+    MLRecommender stand-in counting its constructions; loading it takes `load_s` seconds.
+    """
+    load_s = 0.1
+    constructed = 0
+    lock = threading.Lock()
+
+    def __init__(self, app_config = None):
+        with StubRecommender.lock:
+            StubRecommender.constructed += 1
+        time.sleep(self.load_s)
+
+    async def recommend_async(self, book_name, executor = None):
+        return [book_name], ["url"]
+
+
+@pytest.fixture
+def facade(monkeypatch):
+    monkeypatch.setattr(ml_recommender, "MLRecommender", StubRecommender)
+    monkeypatch.setattr(StubRecommender, "constructed", 0)
+    config = AsyncRecommenderConfig(ml_workers = 4, semantic_workers = 4, ml_timeout = 5.0, semantic_timeout = 5.0)
+    facade = AsyncRecommender(SimpleNamespace(async_recommender_config = lambda: config))
+    yield facade
+    facade.close()
+
+
+def test_concurrent_first_calls_share_one_load(facade):
+    results = asyncio.run(facade.recommend_many(["a", "b", "c", "d"]))
+
+    assert StubRecommender.constructed == 1
+    assert [result.books for result in results] == [["a"], ["b"], ["c"], ["d"]]
+    assert all(result.complete for result in results)
+
+
+def test_load_counts_against_the_budget(facade, monkeypatch):
+    monkeypatch.setattr(StubRecommender, "load_s", 0.5)
+
+    async def main():
+        first = await facade.recommend("a", timeout = 0.05)
+        # the load keeps running for the next caller
+        second = await facade.recommend("b", timeout = 2.0)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert not first.complete and first.error == "timeout" and first.elapsed_ms < 400
+    assert second.complete and second.books == ["b"]
+    assert StubRecommender.constructed == 1
@@ -0,0 +1,47 @@
+# Title normalization tests: the per-distinct-title cleanup gives the same titles as the former row-wise pandas
+# cleanup, and spelling variants of a title are merged into its most frequent spelling.
+import html
+
+import numpy as np
+import pandas as pd
+
+from src.components.data_transformation import normalize_titles
+
+RAW_TITLES = ["Harry Potter &amp; the Sorcerer's Stone", 'The \\"Quoted\\" Book', "It\\'s Mine", 'Say "Hello"',
+              "Back\\slash", "Caf&eacute; Society", "Plain Title", np.nan]
+
+
+def old_cleanup(titles):
+    """
+    The row-wise title cleanup the transformation used before `normalize_titles`.
+    """
+    titles = titles.apply(lambda title: html.unescape(title) if isinstance(title, str) else title)
+    titles = titles.str.replace(r"\\'", "'", regex=True)
+    titles = titles.str.replace(r'\\"', '', regex=True)
+    titles = titles.str.replace(r'"', "", regex=True)
+    return titles.str.replace(r"\\", "", regex=True)
+
+
+def test_matches_old_cleanup():
+    titles = pd.Series(RAW_TITLES * 3, index = np.arange(100, 100 + 3 * len(RAW_TITLES)))
+
+    canonical, keys = normalize_titles(titles)
+
+    pd.testing.assert_series_equal(canonical, old_cleanup(titles), check_dtype = False)
+    assert keys.index.equals(titles.index)
+    assert keys.isna().tolist() == titles.isna().tolist()
+    assert keys[100] == "harry potter the sorcerer s stone"
+
+
+def test_repeated_whitespace_is_collapsed():
+    canonical, _ = normalize_titles(pd.Series(["Dune  Messiah ", "  Dune"]))
+    assert canonical.tolist() == ["Dune Messiah", "Dune"]
+
+
+def test_variants_merge_into_most_frequent_spelling():
+    titles = pd.Series(["The Hobbit", "the hobbit", "The Hobbit", "THE HOBBIT!", "Dune", "dune"])
+
+    canonical, keys = normalize_titles(titles)
+
+    assert canonical.tolist() == ["The Hobbit"] * 4 + ["Dune"] * 2
+    assert keys.tolist() == ["the hobbit"] * 4 + ["dune"] * 2
@@ -0,0 +1,96 @@
+# Chunked data validation tests: rows failing their dtype or range checks are quarantined with the failed checks,
+# valid rows of every chunk reach the valid dataset, and the quarantine and null rate limits fail the validation.
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+import yaml
+
+from src.components.data_validation import DataValidation
+from src.core.config_entity import DataValidationConfig
+from src.core.exception import AppException
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
+BOOKS_HEADER = ["ISBN", "Book-Title", "Book-Author", "Year-Of-Publication", "Publisher", "Image-URL-S", "Image-URL-M",
+                "Image-URL-L"]
+
+
+def book(isbn, year = "1999"):
+    return [isbn, f"Title {isbn}", "Author", year, "Publisher", "s.jpg", "m.jpg", f"http://covers/{isbn}.jpg"]
+
+
+def write_csv(path, header, rows):
+    pd.DataFrame(rows, columns = header).to_csv(path, sep = ";", index = False, encoding = "iso8859")
+
+
+@pytest.fixture
+def validation(tmp_path):
+    """
+    Writes the raw datasets and returns a DataValidation over them, validated in chunks of 3 rows.
+    """
+    schema = yaml.safe_load(open(CONFIG_DIR / "schema.yaml"))
+
+    def create(books, ratings, max_invalid_rate = 0.05):
+        write_csv(tmp_path / "books.csv", BOOKS_HEADER, books)
+        write_csv(tmp_path / "ratings.csv", ["User-ID", "ISBN", "Book-Rating"], ratings)
+        config = DataValidationConfig(
+            valid_data_dir = tmp_path / "valid", books_csvfile = tmp_path / "books.csv",
+            ratings_csvfile = tmp_path / "ratings.csv", book_schema = schema["BOOKS_COLUMNS"],
+            ratings_schema = schema["RATINGS_COLUMNS"], STATUS_FILE = tmp_path / "status.txt",
+            book_constraints = schema["BOOKS_CONSTRAINTS"], ratings_constraints = schema["RATINGS_CONSTRAINTS"],
+            quarantine_dir = tmp_path / "quarantine", report_file_path = tmp_path / "report.json",
+            chunksize = 3, n_workers = 2, max_invalid_rate = max_invalid_rate)
+        return DataValidation(SimpleNamespace(data_validation_config = lambda: config)), config
+    return create
+
+
+VALID_RATINGS = [[1, f"isbn{i}", i % 11] for i in range(10)]
+
+
+def test_invalid_rows_are_quarantined(validation):
+    books = [book(f"isbn{i}") for i in range(10)] + [book("bad-dtype", "unknown"), book("bad-range", "-5")]
+    ratings = VALID_RATINGS + [[2, "isbn1", 11], [0, "isbn2", 5]]
+    validator, config = validation(books, ratings, max_invalid_rate = 0.5)
+
+    report = validator.validate_dataset()
+
+    assert report["status"]
+    books_report, ratings_report = report["datasets"]["books"], report["datasets"]["ratings"]
+    assert (books_report["rows"], books_report["quarantined_rows"]) == (12, 2)
+    assert (ratings_report["rows"], ratings_report["quarantined_rows"]) == (12, 2)
+    assert books_report["columns"]["Year"]["invalid_dtype"] == 1
+    assert books_report["columns"]["Year"]["out_of_range"] == 1
+    # column statistics describe the valid rows only
+    assert ratings_report["columns"]["rating"]["max"] == 9
+
+    quarantine = pd.read_csv(books_report["quarantine_file"], dtype = str).set_index("ISBN")["failed_checks"]
+    assert quarantine.to_dict() == {"bad-dtype": "Year:dtype;", "bad-range": "Year:range;"}
+    quarantine = pd.read_csv(ratings_report["quarantine_file"], dtype = str)
+    assert sorted(quarantine["failed_checks"]) == ["rating:range;", "user_id:range;"]
+
+    # the valid rows of all chunks are kept, in any chunk order
+    valid_books = pd.read_csv(config.valid_data_dir / "valid_books_dataset.csv", dtype = str)
+    assert list(valid_books.columns) == ["ISBN", "Title", "Author", "Year", "Publisher", "image_url"]
+    assert sorted(valid_books["ISBN"]) == sorted(f"isbn{i}" for i in range(10))
+    assert json.loads(config.report_file_path.read_text())["status"]
+
+
+def test_quarantine_rate_limit_fails_validation(validation):
+    books = [book(f"isbn{i}") for i in range(10)] + [book("bad-range", "-5")]
+    validator, config = validation(books, VALID_RATINGS, max_invalid_rate = 0.05)
+
+    with pytest.raises(AppException, match = "quarantined rows rate 0.0909 exceeds 0.05"):
+        validator.validate_dataset()
+    assert config.STATUS_FILE.read_text() == "Validation Status: False"
+
+
+def test_null_rate_limit_fails_validation(validation):
+    ratings = VALID_RATINGS + [[3, None, 5]]
+    validator, config = validation([book(f"isbn{i}") for i in range(10)], ratings)
+
+    with pytest.raises(AppException, match = "ISBN null rate 0.0909 exceeds 0.0"):
+        validator.validate_dataset()
+    report = json.loads(config.report_file_path.read_text())
+    assert report["datasets"]["books"]["errors"] == []
@@ -0,0 +1,63 @@
+# Edition collapsing tests: editions of one work (edition notes, punctuation and accent variants) are merged into
+# the most rated edition, while series volumes, namesakes by other authors and unrelated titles stay apart.
+import numpy as np
+
+from src.components.edition_dedup import find_duplicate_editions, minhash_signatures, work_title
+from src.components.title_index import trigram_codes
+
+BOOKS = [
+    ("Emma", "Jane Austen", 10),                                        # 0
+    ("Emma (Penguin Classics)", "Jane Austen", 30),                     # 1 edition of 0
+    ("EMMA [Large Print]", "Austen, Jane", 5),                          # 2 edition of 0
+    ("Emma", "Meredith Whitford", 40),                                  # 3 namesake
+    ("Harry Potter and the Chamber of Secrets (Book 2)", "J. K. Rowling", 50),
+    ("Harry Potter and the Chamber of Secrets", "J.K. Rowling", 20),    # 5 edition of 4
+    ("Harry Potter and the Prisoner of Azkaban", "J. K. Rowling", 45),  # 6 other volume
+    ("Dune Messiah 2", "Frank Herbert", 8),                             # 7
+    ("Dune Messiah 3", "Frank Herbert", 9),                             # 8 differs by number only
+    ("Les Misérables", "Victor Hugo", 3),                               # 9
+    ("Les Miserables", "Victor Hugo", 7),                               # 10 accent variant of 9
+    ("The Da Vinci Code", "Dan Brown", 60),                             # 11
+    ("Angels & Demons", "Dan Brown", 55),                               # 12
+]
+
+
+def collapse(books):
+    titles, authors, weights = zip(*books)
+    return find_duplicate_editions(list(titles), list(authors), np.array(weights)).tolist()
+
+
+def test_work_title_drops_edition_notes():
+    assert work_title("Emma (Penguin Classics) [Large Print]") == "emma"
+    # a title made only of a note keeps it
+    assert work_title("(Untitled)") == "untitled"
+
+
+def test_editions_are_collapsed_into_the_most_rated():
+    representatives = collapse(BOOKS)
+
+    assert representatives[:3] == [1, 1, 1]
+    assert representatives[4:6] == [4, 4]
+    assert representatives[9:11] == [10, 10]
+    # namesakes, series volumes and unrelated titles are kept
+    for i in (3, 6, 7, 8, 11, 12):
+        assert representatives[i] == i
+
+
+def test_collapsing_does_not_depend_on_item_order():
+    order = np.random.default_rng(3).permutation(len(BOOKS))
+    representatives = collapse([BOOKS[i] for i in order])
+
+    expected = collapse(BOOKS)
+    assert all(expected[order[k]] == order[r] for k, r in enumerate(representatives))
+
+
+def test_signature_agreement_estimates_jaccard_similarity():
+    works = [work_title("The Lord of the Rings: The Two Towers"), work_title("Lord of the Rings - Two Towers")]
+    shingles = [trigram_codes(work) for work in works]
+    a, b = (set(s.tolist()) for s in shingles)
+
+    signatures = minhash_signatures(shingles, num_perm = 256)
+
+    estimate = (signatures[0] == signatures[1]).mean()
+    assert abs(estimate - len(a & b) / len(a | b)) < 0.1
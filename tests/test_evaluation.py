@@ -0,0 +1,72 @@
+# Offline evaluation tests: the held-out split sizes, recall, precision and NDCG on a hand-computed case, and the
+# evaluation completing with null latencies when no user qualifies for the held-out split.
+import pickle
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import csr_matrix
+
+from src.components import evaluation
+from src.components.evaluation import RecommenderEvaluator, format_report, holdout_split
+from src.components.serving_artifacts import popularity_keys
+from src.core.config_entity import EvaluationConfig
+
+
+def ratings_frame(rows):
+    return pd.DataFrame(rows, columns = ["user_id", "title_id", "rating"])
+
+
+def evaluator(tmp_path, final_ratings, **overrides):
+    pickle.dump(final_ratings, open(tmp_path / "final_ratings.pkl", "wb"))
+    settings = dict(final_ratings_obj_path = tmp_path / "final_ratings.pkl", report_path = tmp_path / "report.json",
+                    engines = ["popularity", "cosine:5"], k = 2, holdout_fraction = 0.5, min_user_ratings = 2,
+                    batch_size = 16, n_workers = 1, seed = 0)
+    config = EvaluationConfig(**dict(settings, **overrides))
+    return RecommenderEvaluator(SimpleNamespace(evaluation_config = lambda: config))
+
+
+def test_holdout_split_sizes():
+    rows = [(1, title, 5) for title in range(10, 15)] + [(2, title, 7) for title in (10, 11, 12)] + [(3, 10, 9)]
+    # implicit ratings are dropped and the editions of a title rated twice are averaged
+    rows += [(2, 13, 0), (2, 10, 9)]
+
+    train, test = holdout_split(ratings_frame(rows), holdout_fraction = 0.5, min_user_ratings = 2, seed = 1)
+
+    assert train.shape == test.shape == (3, 5)
+    # ceil(0.5 * 5), ceil(0.5 * 3) and none below min_user_ratings
+    assert np.diff(test.indptr).tolist() == [3, 2, 0]
+    assert np.diff(train.indptr).tolist() == [2, 1, 1]
+    both = train + test
+    assert both.nnz == train.nnz + test.nnz == 9
+    assert both[1, 0] == 8
+    assert (holdout_split(ratings_frame(rows), 0.5, 2, seed = 1)[1] != test).nnz == 0
+
+
+def test_metrics_on_a_hand_computed_case():
+    # user 0 rated book 0 and holds out books 1 and 3, user 1 rated book 1 and holds out book 2
+    train = csr_matrix(np.array([[4, 0, 0, 0], [0, 6, 0, 0]], dtype = np.float32))
+    test = csr_matrix(np.array([[0, 5, 0, 7], [0, 0, 8, 0]], dtype = np.float32))
+    neighbours = csr_matrix((4, 4), dtype = np.float32)
+    # the popularity engine ranks the unrated books 1, 2, 3
+    evaluation._init_worker(train, test, neighbours, popularity_keys(np.array([0, 3, 2, 1])), 2)
+
+    result = evaluation._evaluate_chunk(np.array([0, 1]))
+
+    # user 0 gets books 1 and 2: one of two held-out books at rank 1; user 1 gets books 2 and 3: a hit at rank 1
+    assert result["users"] == 2
+    assert result["recall"] == pytest.approx(1 / 2 + 1)
+    assert result["precision"] == pytest.approx(1 / 2 + 1 / 2)
+    assert result["ndcg"] == pytest.approx(1 / (1 + 1 / np.log2(3)) + 1)
+    assert result["recommended"].tolist() == [1, 2, 3]
+
+
+def test_evaluation_without_evaluated_users(tmp_path):
+    final_ratings = ratings_frame([(1, 10, 8), (1, 11, 6), (2, 10, 7), (2, 12, 9)])
+
+    report = evaluator(tmp_path, final_ratings, min_user_ratings = 100).evaluate()
+
+    assert report["users"] == 0
+    assert report["engines"]["popularity"]["user_latency"] == {"p50_ms": None, "p95_ms": None}
+    assert "popularity" in format_report(report)
@@ -0,0 +1,62 @@
+# HTTP API tests: unknown books are client errors (404), missing or malformed parameters are bad requests (400) and
+# only failures of the recommenders themselves are server errors (500).
+import json
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.core.exception import AppException
+from src.recommender.http_api import RecommendationHTTPServer
+
+
+class StubRecommender:
+    books = {"Dune", "Emma", "Broken"}
+
+    def has_book(self, book_name):
+        return book_name in self.books
+
+    def recommend(self, book_name):
+        if book_name == "Broken":
+            raise AppException(RuntimeError("artifacts unreadable"), sys)
+        return [book_name], ["url"]
+
+    def recommend_for_books(self, book_names, k = 5):
+        return [name for name in book_names if name in self.books][:k], []
+
+
+@pytest.fixture
+def api():
+    server = RecommendationHTTPServer(ml_recommender = StubRecommender()).start()
+    yield server.url
+    server.stop()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout = 5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_known_book_is_recommended(api):
+    assert get(f"{api}/recommend?book=Dune") == (200, {"books": ["Dune"], "posters": ["url"]})
+
+
+def test_unknown_books_are_not_found(api):
+    status, payload = get(f"{api}/recommend?book=Unknown")
+    assert status == 404 and "Unknown" in payload["error"]
+    assert get(f"{api}/recommend/books?book=Unknown&book=Other")[0] == 404
+    # one known seed is enough
+    assert get(f"{api}/recommend/books?book=Unknown&book=Emma") == (200, {"books": ["Emma"], "posters": []})
+
+
+def test_bad_requests(api):
+    assert get(f"{api}/recommend")[0] == 400
+    assert get(f"{api}/recommend/books?book=Dune&k=many")[0] == 400
+
+
+def test_recommender_failures_are_server_errors(api):
+    assert get(f"{api}/recommend?book=Broken")[0] == 500
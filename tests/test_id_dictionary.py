@@ -0,0 +1,43 @@
+# Id dictionary tests: keys keep their ids across save and reload, new keys are appended after the saved ones,
+# non string and missing keys are encoded consistently and unknown keys are missing when adding is disabled.
+import numpy as np
+
+from src.components.id_dictionary import MISSING_ID, IdDictionary
+
+
+def test_ids_survive_save_and_reload(tmp_path):
+    dictionary = IdDictionary(tmp_path, "isbn")
+    ids = dictionary.encode(["b", "a", "b", "ünïcode", "c"])
+    assert ids.dtype == np.int32
+    assert ids.tolist() == [0, 1, 0, 2, 3]
+    dictionary.save()
+
+    reloaded = IdDictionary(tmp_path, "isbn")
+    assert len(reloaded) == 4
+    assert reloaded.encode(["c", "ünïcode", "a", "b"], add = False).tolist() == [3, 2, 1, 0]
+    assert reloaded.decode([0, 1, 2, 3]).tolist() == ["b", "a", "ünïcode", "c"]
+
+    # new keys are appended after the saved ones and persisted on the next save
+    assert reloaded.encode(["d", "a"]).tolist() == [4, 1]
+    reloaded.save()
+    assert IdDictionary(tmp_path, "isbn").decode([4]).tolist() == ["d"]
+
+
+def test_missing_and_unknown_keys(tmp_path):
+    dictionary = IdDictionary(tmp_path, "user")
+    # integer keys are encoded by their string form, so they match the same keys read as strings
+    assert dictionary.encode([276725, None, "276725"]).tolist() == [0, MISSING_ID, 0]
+    assert dictionary.encode(["unknown", 276725], add = False).tolist() == [MISSING_ID, 0]
+    assert len(dictionary) == 1
+
+
+def test_unchanged_dictionary_is_not_rewritten(tmp_path):
+    dictionary = IdDictionary(tmp_path, "title")
+    dictionary.encode(["a"])
+    dictionary.save()
+    mtime = dictionary.data_path.stat().st_mtime_ns
+
+    reloaded = IdDictionary(tmp_path, "title")
+    reloaded.encode(["a"])
+    reloaded.save()
+    assert reloaded.data_path.stat().st_mtime_ns == mtime
@@ -0,0 +1,47 @@
+# Log file tests: per-process log files of exited processes are pruned down to the configured number, while the
+# files of running processes and unrelated files are kept.
+import os
+import time
+import subprocess
+import sys
+
+from src.core import logger
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_prune_keeps_running_and_recent_exited_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "LOG_DIR", str(tmp_path))
+    old_pid, recent_pid = exited_pid(), exited_pid()
+    files = {
+        "old": [f"app.{old_pid}.log", f"app.{old_pid}.log.1"],
+        "recent": [f"app.{recent_pid}.log"],
+        "running": [f"app.{os.getpid()}.log", f"app.{os.getppid()}.log"],
+        "other": ["app.log", "events.jsonl"],
+    }
+    for names in files.values():
+        for name in names:
+            (tmp_path / name).write_text("record\n")
+    # the old exited process wrote last an hour ago
+    for name in files["old"]:
+        os.utime(tmp_path / name, (time.time() - 3600, time.time() - 3600))
+
+    logger.prune_log_files(dict(logger.LOG_CONFIG, log_file = "app.log", keep_exited = 1))
+
+    remaining = sorted(path.name for path in tmp_path.iterdir())
+    assert remaining == sorted(files["recent"] + files["running"] + files["other"])
+
+
+def test_stop_listener_is_idempotent(monkeypatch):
+    listener = logger.start_listener(logger.AsyncQueueHandler(None), [])
+    monkeypatch.setattr(logger, "listener", listener)
+    monkeypatch.setattr(logger, "_listener_running", True)
+
+    logger.stop_listener()
+    logger.stop_listener()
+
+    assert not logger._listener_running
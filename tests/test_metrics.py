@@ -0,0 +1,52 @@
+# Instrumentation tests: tracked operations report the RSS growth they caused rather than the process lifetime peak,
+# the Prometheus file is rewritten by the background flush and not by the tracked call, and the module imports
+# without the Unix-only resource module.
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+from src.core import metrics
+from src.core.config_entity import MetricsConfig
+from src.core.metrics import MetricsRegistry, track
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_rss_delta_is_per_operation(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", MetricsRegistry())
+    with track("large") as large:
+        buffer = np.ones(64 << 20, dtype=np.uint8)
+    with track("small") as small:
+        pass
+    del buffer
+
+    assert large["rss_delta_bytes"] >= 32 << 20
+    # a small operation after a large one is not charged with the process peak
+    assert small["rss_delta_bytes"] < 8 << 20
+
+
+def test_prometheus_file_is_written_by_the_background_flush(tmp_path, monkeypatch):
+    config = MetricsConfig(enabled = True, events_file_path = tmp_path / "events.jsonl",
+                           prometheus_file_path = tmp_path / "metrics.prom", flush_interval = 0.2,
+                           trace_memory = False, http_port = 0)
+    registry = MetricsRegistry(config)
+    monkeypatch.setattr(metrics, "_registry", registry)
+
+    with track("request"):
+        pass
+    assert not config.prometheus_file_path.exists()
+
+    deadline = time.monotonic() + 5
+    while not config.prometheus_file_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    registry._stop_flushing.set()
+    assert 'bookrec_operation_seconds_count{operation="request"} 1' in config.prometheus_file_path.read_text()
+
+
+def test_imports_without_resource_module():
+    code = "import sys; sys.modules['resource'] = None; import src.core.metrics, src.pipeline.stage_runner as s; " \
+           "assert not s.isolation_supported()"
+    subprocess.run([sys.executable, "-c", code], cwd = PROJECT_ROOT, check = True)
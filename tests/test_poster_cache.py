@@ -0,0 +1,134 @@
+# Poster cache tests against a local HTTP stand-in of the image host: posters are downloaded, resized and stored by
+# content hash, missing, placeholder and undecodable images are marked dead, transient failures are retried by the
+# next fetch, and long-lived instances pick up posters fetched by another instance (the fetch_posters.py job).
+import io
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from src.components import poster_cache
+from src.components.poster_cache import PosterCache
+from src.core.configuration import AppConfiguration
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / "config"
+
+
+def jpeg(size, color = (200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class ImageHost(BaseHTTPRequestHandler):
+    # path -> (status, body)
+    routes = {
+        "/cover.jpg": (200, jpeg((400, 600))),
+        "/other.jpg": (200, jpeg((400, 600), (30, 30, 200))),
+        "/placeholder.gif": (200, jpeg((1, 1))),
+        "/broken.jpg": (200, b"not an image"),
+        "/gone.jpg": (410, b""),
+        "/throttled.jpg": (429, b""),
+    }
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        status, body = self.routes.get(self.path, (404, b""))
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def image_host():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHost)
+    server.hits = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app_config(tmp_path, monkeypatch):
+    # the configured relative artifact paths resolve inside the test directory
+    monkeypatch.chdir(tmp_path)
+    return AppConfiguration(config_filepath = CONFIG_DIR / "config.yaml", config_schemapath = CONFIG_DIR / "schema.yaml")
+
+
+def test_fetch_resizes_and_marks_dead_posters(image_host, app_config):
+    server, base = image_host
+    urls = [f"{base}/cover.jpg", f"{base}/placeholder.gif", f"{base}/broken.jpg", f"{base}/missing.jpg",
+            f"{base}/gone.jpg"]
+    cache = PosterCache(app_config)
+
+    summary = cache.fetch(urls, max_workers = 4)
+
+    assert summary == {"ok": 1, "dead": 4, "error": 0, "skipped": 0}
+    cover = Path(cache.resolve(urls[0]))
+    assert cover.exists() and cover.parent.parent == cache.objects_dir
+    with Image.open(cover) as image:
+        width, height = cache.poster_cache_config.display_size
+        assert image.width <= width and image.height <= height
+    assert cache.index[urls[1]]["error"] == "placeholder image"
+    assert cache.index[urls[3]]["error"] == "HTTP 404"
+    # dead posters render the local placeholder, posters never fetched keep their url
+    assert cache.resolve_many(urls[1:]) == [str(cache.placeholder_path)] * 4
+    assert cache.resolve(f"{base}/unknown.jpg") == f"{base}/unknown.jpg"
+
+
+def test_fetch_skips_cached_posters(image_host, app_config):
+    server, base = image_host
+    cache = PosterCache(app_config)
+    cache.fetch([f"{base}/cover.jpg"], max_workers = 2)
+
+    summary = PosterCache(app_config).fetch([f"{base}/cover.jpg", f"{base}/other.jpg"], max_workers = 2)
+
+    assert summary == {"ok": 1, "dead": 0, "error": 0, "skipped": 1}
+    assert sorted(server.hits) == ["/cover.jpg", "/other.jpg"]
+
+
+def test_long_lived_instance_sees_posters_fetched_later(image_host, app_config, monkeypatch):
+    monkeypatch.setattr(poster_cache, "INDEX_CHECK_INTERVAL", 0)
+    server, base = image_host
+    url = f"{base}/cover.jpg"
+    serving = PosterCache(app_config)
+    assert serving.resolve(url) == url
+
+    PosterCache(app_config).fetch([url], max_workers = 2)
+
+    assert Path(serving.resolve(url)).exists()
+
+
+def test_transient_failures_are_retried_by_the_next_fetch(image_host, app_config, monkeypatch):
+    server, base = image_host
+    urls = [f"{base}/throttled.jpg", "http://127.0.0.1:1/unreachable.jpg"]
+    cache = PosterCache(app_config)
+
+    assert cache.fetch(urls, max_workers = 2) == {"ok": 0, "dead": 0, "error": 2, "skipped": 0}
+    # posters that failed transiently keep their url until they are fetched
+    assert cache.resolve_many(urls) == urls
+
+    monkeypatch.setitem(ImageHost.routes, "/throttled.jpg", ImageHost.routes["/cover.jpg"])
+    summary = PosterCache(app_config).fetch(urls, max_workers = 2)
+
+    assert summary == {"ok": 1, "dead": 0, "error": 1, "skipped": 0}
+    assert server.hits.count("/throttled.jpg") == 2
+
+
+def test_decompression_bomb_is_marked_dead(image_host, app_config, monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    server, base = image_host
+    cache = PosterCache(app_config)
+
+    summary = cache.fetch([f"{base}/cover.jpg", f"{base}/missing.jpg"], max_workers = 2)
+
+    assert summary == {"ok": 0, "dead": 2, "error": 0, "skipped": 0}
+    assert "decompression bomb" in cache.index[f"{base}/cover.jpg"]["error"]
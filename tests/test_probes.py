@@ -0,0 +1,95 @@
+# Readiness probe tests: /ready and /health are served whether or not metrics are enabled, /ready gates on the
+# warm-up, a process with warm-up disabled is ready at once without a warm-up thread, and the warm-up copes with an
+# empty catalogue.
+import json
+import socket
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core import metrics, readiness
+from src.core.config_entity import WarmupConfig
+from src.core.metrics import MetricsRegistry
+from src.recommender import warmup
+from src.recommender.warmup import ServingWarmup
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port, path):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout = 5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    """
+    Starts a fresh metrics endpoint on a free port with a registry of the given enabled state.
+    """
+    servers = []
+    monkeypatch.setattr(readiness, "_state", {"status": readiness.STARTING, "started_at": 0, "components": {}})
+
+    def start(enabled):
+        registry = MetricsRegistry()
+        registry.enabled = enabled
+        monkeypatch.setattr(metrics, "_registry", registry)
+        monkeypatch.setattr(metrics, "_server", None)
+        port = free_port()
+        servers.append(metrics.start_metrics_server(port))
+        return port
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_probes_follow_readiness(endpoint, enabled):
+    port = endpoint(enabled)
+
+    assert get(port, "/health")[0] == 200
+    status, body = get(port, "/ready")
+    assert status == 503 and json.loads(body)["status"] == readiness.STARTING
+
+    readiness.set_status(readiness.READY)
+    assert get(port, "/ready")[0] == 200
+    assert get(port, "/metrics")[0] == (200 if enabled else 404)
+
+
+def test_port_zero_disables_endpoint(monkeypatch):
+    monkeypatch.setattr(metrics, "_server", None)
+    assert metrics.start_metrics_server(0) is None
+
+
+def test_disabled_warmup_is_ready_without_thread(monkeypatch):
+    monkeypatch.setattr(warmup, "_warmup_thread", None)
+    monkeypatch.setattr(readiness, "_state", {"status": readiness.STARTING, "started_at": 0, "components": {}})
+    app_config = SimpleNamespace(warmup_config = lambda: SimpleNamespace(enabled = False))
+
+    assert warmup.start_warmup(app_config) is warmup.WARMUP_DISABLED
+    assert readiness.readiness()[0]
+    # calling it again is a no-op
+    assert warmup.start_warmup(app_config) is warmup.WARMUP_DISABLED
+
+
+def test_ml_warmup_skips_sampling_an_empty_catalogue():
+    artifacts = SimpleNamespace(arrays = {}, title_index = None, item_neighbours = None, user_profiles = None,
+                                book_names = np.array([], dtype = object), user_ids = np.array([], dtype = np.int32))
+    recommender = SimpleNamespace(obj_loaded = True, artifacts = artifacts)
+    config = WarmupConfig(enabled = True, ml = True, semantic = False, touch_pages = True, ml_requests = 5,
+                          semantic_queries = [])
+
+    detail = ServingWarmup(SimpleNamespace(warmup_config = lambda: config), ml_recommender = recommender).warm_ml()
+
+    assert detail == {"status": "ok", "requests": 0, "touched_bytes": 0}
@@ -0,0 +1,75 @@
+# Semantic result cache tests: the version follows rebuilds of a single-collection Chroma store but not reads of it,
+# cache hits do not write to the database, and the database stays within max_entries keeping the recently hit entries.
+from types import SimpleNamespace
+
+import chromadb
+import pytest
+
+from src.components.result_cache import SemanticResultCache, vectorstore_version
+from src.core.config_entity import SemanticCacheConfig
+
+
+def build_store(persist_dir, n_documents):
+    client = chromadb.PersistentClient(path = str(persist_dir))
+    if "books" in [collection.name for collection in client.list_collections()]:
+        client.delete_collection("books")
+    collection = client.create_collection("books")
+    collection.add(ids = [str(i) for i in range(n_documents)], documents = [f"book {i}" for i in range(n_documents)],
+                   embeddings = [[float(i), 1.0, 0.0] for i in range(n_documents)])
+    return collection
+
+
+def test_version_follows_chroma_rebuilds_only(tmp_path):
+    books_path = tmp_path / "books.pkl"
+    collection = build_store(tmp_path, 10)
+    version = vectorstore_version(tmp_path, books_path)
+
+    collection.query(query_embeddings = [[1.0, 1.0, 0.0]], n_results = 3)
+    chromadb.PersistentClient(path = str(tmp_path)).get_collection("books").count()
+    assert vectorstore_version(tmp_path, books_path) == version
+
+    collection.add(ids = ["new"], documents = ["new book"], embeddings = [[0.0, 0.0, 1.0]])
+    added = vectorstore_version(tmp_path, books_path)
+    assert added != version
+
+    build_store(tmp_path, 10)
+    assert vectorstore_version(tmp_path, books_path) not in (version, added)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    def create(max_entries, memory_entries = 0):
+        config = SemanticCacheConfig(enabled = True, db_file_path = tmp_path / "results.sqlite3",
+                                     chroma_persist_dir = tmp_path / "store", final_books_obj_path = tmp_path / "books",
+                                     max_entries = max_entries, memory_entries = memory_entries)
+        return SemanticResultCache(SimpleNamespace(semantic_cache_config = lambda: config))
+    return create
+
+
+def test_hits_do_not_write(cache):
+    result_cache = cache(max_entries = 100)
+    result_cache.put("query", 5, ["a"], ["url"])
+    conn = result_cache.connection()
+    changes = conn.total_changes
+
+    for _ in range(10):
+        assert result_cache.get("query", 5) == (["a"], ["url"])
+
+    assert conn.total_changes == changes
+
+
+def test_database_is_pruned_to_max_entries_by_recency(cache):
+    result_cache = cache(max_entries = 20)
+    for i in range(20):
+        result_cache.put(f"query {i}", 5, [str(i)], ["url"])
+    # hit the oldest entries, their queued access times are written before pruning
+    for i in range(5):
+        assert result_cache.get(f"query {i}", 5) is not None
+
+    for i in range(20, 30):
+        result_cache.put(f"query {i}", 5, [str(i)], ["url"])
+
+    count = result_cache.connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    assert count <= 20
+    assert all(result_cache.get(f"query {i}", 5) is not None for i in range(5))
+    assert result_cache.get("query 10", 5) is None
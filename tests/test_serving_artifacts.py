@@ -0,0 +1,99 @@
+# Serving artifact tests: the memory-mapped artifacts answer the same nearest neighbour queries as the trained
+# brute force NearestNeighbors model, titles resolve to their catalogue rows, and user recommendations never
+# include books the user already rated.
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse import csr_matrix
+from sklearn.neighbors import NearestNeighbors
+
+from src.components.serving_artifacts import ServingArtifacts, export_serving_artifacts
+from src.recommender.ml_recommender import MLRecommender
+
+N_BOOKS, N_USERS = 60, 40
+
+
+def pivot_table(seed = 0, sort_titles = True):
+    rng = np.random.default_rng(seed)
+    # continuous ratings, so no two books are at exactly the same distance
+    ratings = np.where(rng.random((N_BOOKS, N_USERS)) < 0.3, rng.uniform(1, 10, (N_BOOKS, N_USERS)), 0)
+    titles = [f"Book {i:03d}" for i in range(N_BOOKS)]
+    if not sort_titles:
+        titles = titles[::-1]
+    return pd.DataFrame(ratings, index = pd.Index(titles, name = "Title"),
+                        columns = pd.Index(np.arange(100, 100 + N_USERS), name = "user_id"))
+
+
+def final_ratings(books_pivot_table):
+    titles = books_pivot_table.index
+    return pd.DataFrame({"Title": titles, "image_url": [f"http://posters/{i}.jpg" for i in range(len(titles))]})
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    table = pivot_table()
+    export_serving_artifacts(table, final_ratings(table), tmp_path / "serving")
+    return table, ServingArtifacts(tmp_path / "serving")
+
+
+def test_kneighbors_matches_nearest_neighbors_model(artifacts):
+    table, served = artifacts
+    model = NearestNeighbors(algorithm = "brute").fit(csr_matrix(table.to_numpy()))
+    rows = np.arange(N_BOOKS)
+
+    distances, indices = served.kneighbors(rows, n_neighbors = 6)
+    expected_distances, expected_indices = model.kneighbors(table.to_numpy(), n_neighbors = 6)
+
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(distances, expected_distances, rtol = 1e-4, atol = 1e-3)
+    # the query book is its own nearest neighbour
+    np.testing.assert_array_equal(indices[:, 0], rows)
+
+
+def test_kneighbors_caps_neighbours_at_catalogue_size(artifacts):
+    _, served = artifacts
+    distances, indices = served.kneighbors([3], n_neighbors = N_BOOKS + 10)
+
+    assert indices.shape == (1, N_BOOKS)
+    assert sorted(indices[0]) == list(range(N_BOOKS))
+    assert np.all(np.diff(distances[0]) >= 0)
+
+
+@pytest.mark.parametrize("sort_titles", [True, False])
+def test_find_book(tmp_path, sort_titles):
+    table = pivot_table(sort_titles = sort_titles)
+    export_serving_artifacts(table, final_ratings(table), tmp_path / "serving")
+    served = ServingArtifacts(tmp_path / "serving")
+
+    for row in (0, 17, N_BOOKS - 1):
+        assert served.find_book(table.index[row]) == row
+    # normalized lookups ignore case and punctuation
+    assert served.find_book("  book 017!") == table.index.get_loc("Book 017")
+    assert list(served.book_names.take([5, 1])) == [table.index[5], table.index[1]]
+    assert list(served.poster_urls.take([5])) == ["http://posters/5.jpg"]
+    with pytest.raises(KeyError):
+        served.find_book("No Such Book")
+
+
+def test_recommend_for_users_excludes_rated_books(tmp_path):
+    table = pivot_table()
+    # user 101 rated every book but the last two
+    table[101] = 5.0
+    table.iloc[-2:, table.columns.get_loc(101)] = 0
+    export_serving_artifacts(table, final_ratings(table), tmp_path / "serving")
+    recommender = MLRecommender.__new__(MLRecommender)
+    recommender.artifacts = ServingArtifacts(tmp_path / "serving")
+    user_ids = [int(user_id) for user_id in table.columns] + [999]
+
+    results = recommender.recommend_for_users(user_ids, k = 10)
+
+    for user_id, (books, posters) in zip(user_ids[:-1], results):
+        rated = set(table.index[table[user_id] > 0])
+        assert not rated & set(books)
+        assert len(set(books)) == len(books) == min(10, N_BOOKS - len(rated))
+        assert len(posters) == len(books)
+    # fewer than k unrated books: only the unrated ones are returned
+    assert sorted(results[1][0]) == sorted(table.index[-2:])
+    # an unknown user gets the most rated books
+    counts = (table > 0).sum(axis = 1)
+    assert counts[results[-1][0]].tolist() == sorted(counts, reverse = True)[:10]
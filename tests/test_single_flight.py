@@ -0,0 +1,231 @@
+# Concurrency tests of the single-flight request coalescing: bursts of identical requests must collapse into one
+# backend call per key, on the threaded and asyncio paths, for results and exceptions alike.
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.core.single_flight import SingleFlight
+from src.recommender import ml_recommender
+from src.recommender.ml_recommender import MLRecommender
+
+N_CALLERS = 16
+
+
+class CountingBackend:
+    """
+    Backend counting its calls per key. Every call blocks until `n_waiters` callers joined the in-flight call,
+    so the whole burst is guaranteed to overlap with it.
+    """
+    def __init__(self, flight, n_waiters, error = None):
+        self.flight = flight
+        self.n_waiters = n_waiters
+        self.error = error
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, key):
+        with self.lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+        deadline = time.monotonic() + 5
+        while self.flight.stats["coalesced"] < self.n_waiters and time.monotonic() < deadline:
+            time.sleep(0.001)
+        if self.error is not None:
+            raise self.error
+        return ("result", key)
+
+
+def burst(n_threads, target):
+    """
+    Starts `n_threads` threads behind a barrier, so they all call `target(index)` at once.
+    Returns:
+        list: Result or raised exception of every thread.
+    """
+    barrier = threading.Barrier(n_threads)
+    results = [None] * n_threads
+
+    def run(index):
+        barrier.wait()
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_threaded_burst_runs_backend_once():
+    flight = SingleFlight()
+    backend = CountingBackend(flight, N_CALLERS - 1)
+
+    results = burst(N_CALLERS, lambda _: flight.do("book", backend, "book"))
+
+    assert backend.calls == {"book": 1}
+    assert results == [("result", "book")] * N_CALLERS
+    assert flight.stats == {"executed": 1, "coalesced": N_CALLERS - 1}
+    assert flight.calls == {}
+
+
+def test_threaded_burst_runs_backend_once_per_key():
+    flight = SingleFlight()
+    keys = ["a", "b", "c", "d"]
+    backend = CountingBackend(flight, N_CALLERS * len(keys) - len(keys))
+
+    results = burst(N_CALLERS * len(keys), lambda index: flight.do(keys[index % len(keys)], backend,
+                                                                     keys[index % len(keys)]))
+
+    assert backend.calls == {key: 1 for key in keys}
+    assert results == [("result", keys[index % len(keys)]) for index in range(N_CALLERS * len(keys))]
+
+
+def test_threaded_burst_shares_exception():
+    flight = SingleFlight()
+    error = ValueError("backend failed")
+    backend = CountingBackend(flight, N_CALLERS - 1, error = error)
+
+    results = burst(N_CALLERS, lambda _: flight.do("book", backend, "book"))
+
+    assert backend.calls == {"book": 1}
+    assert all(result is error for result in results)
+    # the key is released, the next call runs the backend again
+    backend.error = None
+    assert flight.do("book", backend, "book") == ("result", "book")
+    assert backend.calls == {"book": 2}
+
+
+def test_async_burst_runs_backend_once():
+    flight = SingleFlight()
+    backend = CountingBackend(flight, N_CALLERS - 1)
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.gather(*(flight.do_async("book", backend, "book", executor = executor)
+                                          for _ in range(N_CALLERS)))
+
+    results = asyncio.run(main())
+    assert backend.calls == {"book": 1}
+    assert results == [("result", "book")] * N_CALLERS
+
+
+def test_async_burst_of_coroutine_shares_exception():
+    flight = SingleFlight()
+    calls = []
+
+    async def backend(key):
+        calls.append(key)
+        while flight.stats["coalesced"] < N_CALLERS - 1:
+            await asyncio.sleep(0.001)
+        raise KeyError(key)
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("book", backend, "book") for _ in range(N_CALLERS)),
+                                    return_exceptions = True)
+
+    results = asyncio.run(main())
+    assert calls == ["book"]
+    assert all(isinstance(result, KeyError) for result in results)
+    assert flight.calls == {}
+
+
+def test_async_and_threaded_callers_share_one_call():
+    flight = SingleFlight()
+    backend = CountingBackend(flight, N_CALLERS)
+
+    async def async_caller():
+        return await flight.do_async("book", backend, "book")
+
+    results = burst(N_CALLERS + 1, lambda index: asyncio.run(async_caller()) if index % 2 else
+                    flight.do("book", backend, "book"))
+    assert backend.calls == {"book": 1}
+    assert results == [("result", "book")] * (N_CALLERS + 1)
+
+
+class FakeArtifacts:
+    """
+    Serving artifacts stand-in counting the title lookups and neighbour searches.
+    """
+    build_id = "test-build"
+
+    def __init__(self, flight):
+        self.flight = flight
+        self.book_names = np.array([f"book {row}" for row in range(10)], dtype=object)
+        self.poster_urls = np.array([f"http://posters/{row}.jpg" for row in range(10)], dtype=object)
+        self.lookups = 0
+        self.searches = 0
+        self.lock = threading.Lock()
+
+    def find_book(self, title):
+        with self.lock:
+            self.lookups += 1
+        return int(np.flatnonzero(self.book_names == title)[0])
+
+    def kneighbors(self, rows, n_neighbors):
+        with self.lock:
+            self.searches += 1
+        deadline = time.monotonic() + 5
+        while self.flight.stats["coalesced"] < N_CALLERS - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return None, (np.arange(n_neighbors)[None, :] + rows[0]) % len(self.book_names)
+
+
+@pytest.fixture
+def recommender(monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(ml_recommender, "_recommend_flight", flight)
+    recommender = MLRecommender.__new__(MLRecommender)
+    recommender.artifacts = FakeArtifacts(flight)
+    return recommender
+
+
+def test_recommend_burst_collapses_neighbour_searches(recommender):
+    results = burst(N_CALLERS, lambda _: recommender.recommend("book 3"))
+
+    assert recommender.artifacts.searches == 1
+    # the title is resolved once per request, not again by the shared computation
+    assert recommender.artifacts.lookups == N_CALLERS
+    books, posters = results[0]
+    assert list(books) == ["book 3", "book 4", "book 5", "book 6", "book 7", "book 8"]
+    assert all(list(result[0]) == list(books) for result in results)
+
+
+def test_recommend_async_burst_collapses_neighbour_searches(recommender):
+    async def main():
+        return await asyncio.gather(*(recommender.recommend_async("book 3") for _ in range(N_CALLERS)))
+
+    results = asyncio.run(main())
+    assert recommender.artifacts.searches == 1
+    assert recommender.artifacts.lookups == N_CALLERS
+    assert all(list(result[0]) == list(results[0][0]) for result in results)
+
+
+def test_unresolved_titles_are_coalesced_only_when_identical(monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(ml_recommender, "_recommend_flight", flight)
+    recommender = MLRecommender.__new__(MLRecommender)
+    recommender.artifacts = None
+    titles = ["Dune", " Dune", "Dune "]
+    calls = []
+    lock = threading.Lock()
+
+    def _recommend(book_name, book_id = None):
+        with lock:
+            calls.append(book_name)
+        deadline = time.monotonic() + 5
+        while flight.stats["coalesced"] < N_CALLERS - len(titles) and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return [book_name], []
+
+    recommender._recommend = _recommend
+    results = burst(N_CALLERS, lambda index: recommender.recommend(titles[index % len(titles)]))
+
+    assert sorted(calls) == sorted(titles)
+    # every caller receives the result computed for its own title
+    assert [result[0] for result in results] == [[titles[index % len(titles)]] for index in range(N_CALLERS)]
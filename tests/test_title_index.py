@@ -0,0 +1,53 @@
+# Title index tests: normalization, exact lookups, and the typeahead order of prefix, fuzzy (trigram) and substring
+# matches, which never span two adjacent titles.
+import pytest
+
+from src.components.serving_artifacts import StringArray
+from src.components.title_index import TitleIndex, build_title_index_arrays, normalize_title
+
+TITLES = ["The Hobbit", "Harry Potter and the Chamber of Secrets", "Harry Potter &amp; the Sorcerer's Stone",
+          "Harry Tales", "A Harry Christmas", "Dune", "Dune Messiah", "Children of Dune", "Café Society"]
+
+
+@pytest.fixture
+def index():
+    return TitleIndex(build_title_index_arrays(TITLES), StringArray.from_strings(TITLES))
+
+
+def test_normalize_title():
+    assert normalize_title("Harry Potter &amp; the Sorcerer's Stone") == "harry potter the sorcerer s stone"
+    assert normalize_title("  Café   Society!! ") == "cafe society"
+    assert normalize_title("___") == ""
+
+
+def test_lookup(index):
+    assert index.lookup("Dune") == 5
+    assert index.lookup("harry potter & the sorcerer's stone") == 2
+    assert index.lookup("CAFE SOCIETY") == 8
+    assert index.lookup("Dune Messiah 2") is None
+
+
+def test_prefix_matches_come_first_in_title_order(index):
+    results = index.search("harry")
+
+    assert results[:3] == [TITLES[1], TITLES[2], TITLES[3]]
+    assert TITLES[4] in results[3:]
+    assert len(results) == len(set(results))
+    assert index.search("harry", limit = 2) == [TITLES[1], TITLES[2]]
+
+
+def test_fuzzy_matches_typos(index):
+    assert index.search("hobit")[0] == "The Hobbit"
+    assert index.search("dune mesiah")[0] == "Dune Messiah"
+
+
+def test_substring_matches_backfill(index):
+    # too short a part of the title for a trigram match, found as a substring
+    assert index.search("ssia") == ["Dune Messiah"]
+    # "dune" + "dune messiah" are stored back to back, a match across them is not a title match
+    assert index.search("nedu") == []
+
+
+def test_empty_queries(index):
+    assert index.search("") == []
+    assert index.search("?!") == []
@@ -0,0 +1,28 @@
+# File: warmup.py
+import sys
+import json
+import argparse
+from dataclasses import replace
+from src.core.logger import logging
+from src.core.exception import AppException
+from src.recommender.warmup import ServingWarmup
+
+# Deploy hook warming up the host page cache with the serving artifacts before the app processes start
+# Usage: python warmup.py [--no-semantic]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the recommenders and run synthetic requests, exit 1 when not ready.")
+    parser.add_argument("--no-semantic", action="store_true", help="skip the semantic recommender")
+    args = parser.parse_args()
+
+    try:
+        warmup = ServingWarmup()
+        if args.no_semantic:
+            warmup.warmup_config = replace(warmup.warmup_config, semantic = False)
+        ready, state = warmup.run()
+        print(json.dumps(state, indent = 2))
+
+    except Exception as e:
+        logging.error(f"Warm-up terminated: {e}", exc_info=True)
+        raise AppException(e, sys)
+
+    sys.exit(0 if ready else 1)